@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Motor de análisis concurrente con IA para casos de prueba.
+
+`ExcelTestAnalyzer` envía a Claude los casos problemáticos de una planilla. En
+lugar de hacerlo uno a uno, las llamadas se reparten entre varios hilos con un
+límite de concurrencia, un token bucket que respeta el límite de peticiones por
+minuto de la cuenta y reintentos con espera exponencial y jitter ante respuestas
+429 (rate limit), 529 (sobrecarga) y errores transitorios de red.
+
+Los resultados se devuelven en el orden de entrada y el progreso se notifica en
+el hilo que llama (los callbacks pueden depender del contexto de Flask).
+
+Configuración mediante variables de entorno:
+    EXCEL_AI_MAX_CONCURRENCY      llamadas simultáneas a la API (defecto 4)
+    EXCEL_AI_REQUESTS_PER_MINUTE  peticiones por minuto, 0 = sin límite (defecto 50)
+    EXCEL_AI_MAX_RETRIES          reintentos por caso ante errores transitorios (defecto 4)
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """
+    Limitador de ritmo compartido entre hilos.
+
+    Args:
+        rate: fichas que se reponen por segundo (0 = sin límite)
+        capacity: ráfaga máxima permitida
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: int) -> 'TokenBucket':
+        # Ráfaga pequeña: el límite de la API se mide en ventanas cortas
+        return cls(requests_per_minute / 60.0, capacity=max(1.0, requests_per_minute / 60.0 * 5))
+
+    def acquire(self):
+        """Bloquea hasta obtener una ficha"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Segundos indicados por la cabecera retry-after de la respuesta, si existe"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        return min(MAX_BACKOFF_SECONDS, max(0.0, float(headers.get('retry-after'))))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, 529 (sobrecarga), 5xx y errores de conexión/timeout"""
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    name = type(error).__name__
+    return 'Connection' in name or 'Timeout' in name
+
+
+class ConcurrentAIAnalyzer:
+    """
+    Ejecuta llamadas bloqueantes a la API en paralelo con límite de ritmo y reintentos.
+
+    Args:
+        max_concurrency: llamadas simultáneas
+        requests_per_minute: ritmo máximo de peticiones (0 = sin límite)
+        max_retries: reintentos por llamada ante errores transitorios
+        base_delay: espera base del backoff exponencial en segundos
+    """
+
+    def __init__(self, max_concurrency: int = 4, requests_per_minute: int = 50,
+                 max_retries: int = 4, base_delay: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.bucket = TokenBucket.per_minute(requests_per_minute)
+
+    @classmethod
+    def from_env(cls) -> 'ConcurrentAIAnalyzer':
+        return cls(
+            max_concurrency=_env_int('EXCEL_AI_MAX_CONCURRENCY', 4),
+            requests_per_minute=_env_int('EXCEL_AI_REQUESTS_PER_MINUTE', 50, minimum=0),
+            max_retries=_env_int('EXCEL_AI_MAX_RETRIES', 4, minimum=0),
+        )
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        # Full jitter: evita que los hilos reintenten todos a la vez
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.base_delay * 2 ** attempt))
+
+    def call(self, fn: Callable[[Any], Any], item: Any) -> Any:
+        """Llama a `fn(item)` respetando el ritmo y reintentando errores transitorios"""
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                return fn(item)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                logger.warning(f"⏳ Error transitorio de la API ({_status_code(e) or type(e).__name__}), "
+                               f"reintento {attempt}/{self.max_retries} en {delay:.1f}s")
+                time.sleep(delay)
+
+    def run(self, items: Sequence[Any], fn: Callable[[Any], Any],
+            on_progress: Optional[Callable[[int, int, Any], None]] = None) -> List[Tuple[Any, Optional[Exception]]]:
+        """
+        Procesa `items` en paralelo.
+
+        Args:
+            items: elementos a procesar
+            fn: función bloqueante `fn(item) -> resultado`
+            on_progress: `on_progress(completados, total, item)` tras cada elemento,
+                llamado desde el hilo que ejecuta `run`
+
+        Returns:
+            Lista de (resultado, error) en el mismo orden que `items`
+        """
+        results: List[Tuple[Any, Optional[Exception]]] = [(None, None)] * len(items)
+        if not items:
+            return results
+
+        workers = min(self.max_concurrency, len(items))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='excel-ai') as executor:
+            futures = {executor.submit(self.call, fn, item): index for index, item in enumerate(items)}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    results[index] = (future.result(), None)
+                except Exception as e:
+                    results[index] = (None, e)
+                if on_progress:
+                    on_progress(completed, len(items), items[index])
+        return results
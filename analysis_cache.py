@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Caché persistente de los análisis con IA de casos de prueba.
+
+Volver a subir la misma planilla o re-analizar un caso sin cambios repetía cada
+llamada a Claude. Los resultados se guardan en SQLite con una clave que es el hash
+de los campos normalizados del caso, el modo de datos, la versión del prompt y el
+modelo: cambiar cualquiera de ellos invalida la entrada sin borrar nada.
+
+El archivo SQLite (en modo WAL) se comparte entre todos los procesos del servidor.
+Las entradas expiran tras un TTL y, si se supera el máximo, se descartan las usadas
+hace más tiempo (LRU). Los contadores de aciertos y fallos se llevan por proceso y
+acumulados en la propia base de datos.
+
+Configuración mediante variables de entorno:
+    ANALYSIS_CACHE_ENABLED      activar la caché (defecto true)
+    ANALYSIS_CACHE_PATH         ruta del archivo SQLite (defecto <tmp>/qa_pilot_analysis_cache.sqlite3)
+    ANALYSIS_CACHE_TTL_SECONDS  vigencia de una entrada, 0 = sin expiración (defecto 2592000, 30 días)
+    ANALYSIS_CACHE_MAX_ENTRIES  entradas máximas antes de descartar por LRU (defecto 5000)
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _normalize(value: Any) -> str:
+    """Texto sin espacios redundantes; 'nan' de pandas equivale a vacío"""
+    text = _WHITESPACE.sub(' ', str(value if value is not None else '')).strip()
+    return '' if text.lower() == 'nan' else text
+
+
+def make_key(fields: Iterable[Any], data_mode: str, prompt_version: str, model: str) -> str:
+    """Clave del análisis: sha256 de los campos normalizados y de los parámetros del prompt"""
+    payload = json.dumps(
+        [[_normalize(f) for f in fields], data_mode, prompt_version, model],
+        ensure_ascii=False, separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Caché clave -> resultado JSON en SQLite con TTL y descarte LRU.
+
+    Args:
+        path: archivo SQLite compartido
+        ttl: segundos de vigencia de una entrada (0 = sin expiración)
+        max_entries: entradas máximas conservadas
+    """
+
+    def __init__(self, path: str, ttl: int = 2592000, max_entries: int = 5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_cache ('
+                ' key TEXT PRIMARY KEY, value TEXT NOT NULL,'
+                ' created_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access ON analysis_cache (last_access)')
+            conn.execute('CREATE TABLE IF NOT EXISTS analysis_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    @classmethod
+    def from_env(cls) -> 'AnalysisCache':
+        path = os.getenv('ANALYSIS_CACHE_PATH') or os.path.join(
+            tempfile.gettempdir(), 'qa_pilot_analysis_cache.sqlite3'
+        )
+        return cls(
+            path,
+            ttl=_env_int('ANALYSIS_CACHE_TTL_SECONDS', 2592000, minimum=0),
+            max_entries=_env_int('ANALYSIS_CACHE_MAX_ENTRIES', 5000),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Una conexión por operación: las llamadas llegan desde varios hilos
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, name: str):
+        conn.execute(
+            'INSERT INTO analysis_cache_stats (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,),
+        )
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Resultado guardado para `key`, o None si no existe o expiró"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT value, created_at FROM analysis_cache WHERE key = ?', (key,)).fetchone()
+                if row is not None and self._expired(row[1], now):
+                    conn.execute('DELETE FROM analysis_cache WHERE key = ?', (key,))
+                    row = None
+                if row is None:
+                    self._count(conn, 'misses')
+                else:
+                    conn.execute('UPDATE analysis_cache SET last_access = ? WHERE key = ?', (now, key))
+                    self._count(conn, 'hits')
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error leyendo caché de análisis: {e}")
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, value: Dict):
+        """Guarda un resultado y descarta las entradas expiradas o sobrantes"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO analysis_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                if self.ttl:
+                    conn.execute('DELETE FROM analysis_cache WHERE created_at < ?', (now - self.ttl,))
+                conn.execute(
+                    'DELETE FROM analysis_cache WHERE key IN ('
+                    ' SELECT key FROM analysis_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error guardando en caché de análisis: {e}")
+            return
+        with self._lock:
+            self.writes += 1
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM analysis_cache')
+
+    def get_stats(self) -> Dict[str, Any]:
+        try:
+            with self._connect() as conn:
+                entries = conn.execute('SELECT COUNT(*) FROM analysis_cache').fetchone()[0]
+                shared = dict(conn.execute('SELECT name, value FROM analysis_cache_stats').fetchall())
+        except sqlite3.Error as e:
+            entries, shared = None, {'error': str(e)}
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'shared': shared,
+            }
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """Caché compartida del proceso, o None si está desactivada o no se pudo abrir"""
+    global _cache
+    if os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = AnalysisCache.from_env()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Caché de análisis no disponible: {e}")
+                return None
+        return _cache
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Trabajos en segundo plano para el análisis de planillas Excel.
+
+`/api/analyze_excel` guardaba el archivo, extraía los casos y ejecutaba el
+análisis híbrido completo antes de responder: con planillas grandes la petición
+superaba los timeouts del proxy y ocupaba un hilo del servidor durante minutos.
+Ahora la subida crea un trabajo y responde de inmediato con su id; el análisis se
+ejecuta en un pool de hilos y el progreso se consulta por polling o por SSE.
+
+Cada trabajo se guarda como JSON (junto al archivo subido) en un directorio
+persistente que pueden compartir varios procesos del servidor. Cada trabajo
+registra su dueño (host:pid) y un heartbeat que el dueño renueva mientras lo
+tiene en cola o en ejecución; otro proceso sólo vuelve a encolar los trabajos
+cuyo heartbeat venció (su dueño murió o se reinició). Las modificaciones de un
+registro se serializan entre procesos con un archivo de bloqueo. Los trabajos
+terminados se conservan para consultar el resultado hasta que vence su
+retención; la limpieza se hace periódicamente.
+
+Configuración mediante variables de entorno:
+    ANALYSIS_JOBS_DIR              directorio de trabajos (defecto <tmp>/qa_pilot_analysis_jobs)
+    ANALYSIS_JOBS_MAX_WORKERS      análisis simultáneos (defecto 2)
+    ANALYSIS_JOBS_RETENTION_HOURS  horas que se conservan los trabajos terminados (defecto 24)
+    ANALYSIS_JOBS_STALE_SECONDS    segundos sin heartbeat para considerar huérfano un trabajo (defecto 120)
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import shutil
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from event_bus import event_bus, analysis_topic
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ('en_cola', 'en_progreso')
+FINISHED_STATUSES = ('completado', 'fallido')
+LOCK_TIMEOUT_SECONDS = 10.0
+LOCK_STALE_SECONDS = 30.0  # un bloqueo más antiguo lo dejó un proceso que murió
+PRUNE_INTERVAL_SECONDS = 600
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class AnalysisJobStore:
+    """Registros de trabajo <job_id>.json y archivos subidos <job_id>/ en `directory`"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f'{job_id}.json')
+
+    @contextmanager
+    def _locked(self, job_id: str):
+        """Bloqueo del registro entre hilos y procesos (archivo <job_id>.lock creado con O_EXCL)"""
+        lock_path = os.path.join(self.directory, f'{job_id}.lock')
+        deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+        with self._lock:
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                            os.remove(lock_path)
+                            continue
+                    except OSError:
+                        continue
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f'Registro de trabajo bloqueado: {job_id}')
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                os.close(fd)
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+
+    def upload_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        # Los ids vienen de la URL: sólo se aceptan los generados por create()
+        if not job_id or not job_id.replace('-', '').isalnum():
+            return None
+        try:
+            with open(self._record_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, record: Dict[str, Any]):
+        path = self._record_path(record['id'])
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def update(self, job_id: str, owner: Optional[str] = None, **fields) -> Optional[Dict[str, Any]]:
+        """
+        Modifica el registro; con `owner`, sólo si el trabajo sigue perteneciendo a ese
+        proceso (devuelve None si otro proceso lo reclamó).
+        """
+        with self._locked(job_id):
+            record = self.read(job_id)
+            if record is None or (owner is not None and record.get('owner') != owner):
+                return None
+            record.update(fields, updated_at=datetime.now().isoformat())
+            if owner is not None:
+                record['heartbeat'] = time.time()
+            self.write(record)
+            return record
+
+    def claim(self, job_id: str, owner: str, stale_seconds: float) -> Optional[Dict[str, Any]]:
+        """Toma un trabajo pendiente si no tiene dueño o su heartbeat venció"""
+        with self._locked(job_id):
+            record = self.read(job_id)
+            if record is None or record.get('status') not in PENDING_STATUSES:
+                return None
+            current = record.get('owner')
+            if current not in (None, owner) and time.time() - (record.get('heartbeat') or 0) <= stale_seconds:
+                return None
+            record.update(owner=owner, heartbeat=time.time())
+            self.write(record)
+            return record
+
+    def heartbeat(self, job_id: str, owner: str):
+        """Renueva el heartbeat de un trabajo propio"""
+        with self._locked(job_id):
+            record = self.read(job_id)
+            if record is not None and record.get('owner') == owner:
+                record['heartbeat'] = time.time()
+                self.write(record)
+
+    def create(self, filename: str, params: Dict[str, Any], owner: Optional[str] = None) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        os.makedirs(self.upload_dir(job_id), exist_ok=True)
+        now = datetime.now().isoformat()
+        record = {
+            'id': job_id,
+            'status': 'en_cola',
+            'progress': 0,
+            'message': 'En cola',
+            'details': '',
+            'filename': filename,
+            'file_path': os.path.join(self.upload_dir(job_id), filename),
+            'params': params,
+            'result': None,
+            'error': None,
+            'owner': owner,
+            'heartbeat': time.time(),
+            'created_at': now,
+            'updated_at': now,
+        }
+        with self._locked(job_id):
+            self.write(record)
+        return record
+
+    def remove_upload(self, job_id: str):
+        shutil.rmtree(self.upload_dir(job_id), ignore_errors=True)
+
+    def list_records(self) -> List[Dict[str, Any]]:
+        records = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                record = self.read(name[:-5])
+                if record is not None:
+                    records.append(record)
+        return records
+
+    def prune(self, retention_seconds: int):
+        """Elimina los trabajos terminados más antiguos que la retención"""
+        cutoff = time.time() - retention_seconds
+        for record in self.list_records():
+            if record.get('status') not in FINISHED_STATUSES:
+                continue
+            try:
+                updated = datetime.fromisoformat(record['updated_at']).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if updated < cutoff:
+                self.remove_upload(record['id'])
+                try:
+                    os.remove(self._record_path(record['id']))
+                except OSError:
+                    pass
+
+
+class AnalysisJobManager:
+    """
+    Ejecuta trabajos de análisis en un pool de hilos y publica su progreso.
+
+    Args:
+        store: almacén persistente de trabajos
+        run_job: función `run_job(file_path, params, progress_callback) -> dict` que
+            realiza el análisis; su resultado se guarda en el trabajo
+        max_workers: análisis simultáneos
+        retention_seconds: tiempo que se conservan los trabajos terminados
+        stale_seconds: tiempo sin heartbeat tras el cual otro proceso puede reclamar un trabajo
+    """
+
+    def __init__(self, store: AnalysisJobStore, run_job: Callable[..., Dict[str, Any]],
+                 max_workers: int = 2, retention_seconds: int = 86400, stale_seconds: int = 120):
+        self.store = store
+        self.run_job = run_job
+        self.retention_seconds = retention_seconds
+        self.stale_seconds = stale_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='excel-analysis')
+        self._active = set()  # trabajos de este proceso en cola o en ejecución
+        self._active_lock = threading.Lock()
+        self._last_prune = 0.0
+        self._stop = threading.Event()
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop, name='excel-analysis-heartbeat', daemon=True
+        )
+        self._maintenance_thread.start()
+
+    @classmethod
+    def from_env(cls, run_job: Callable[..., Dict[str, Any]]) -> 'AnalysisJobManager':
+        directory = os.getenv('ANALYSIS_JOBS_DIR') or os.path.join(
+            tempfile.gettempdir(), 'qa_pilot_analysis_jobs'
+        )
+        return cls(
+            AnalysisJobStore(directory),
+            run_job,
+            max_workers=_env_int('ANALYSIS_JOBS_MAX_WORKERS', 2),
+            retention_seconds=_env_int('ANALYSIS_JOBS_RETENTION_HOURS', 24) * 3600,
+            stale_seconds=_env_int('ANALYSIS_JOBS_STALE_SECONDS', 120, minimum=10),
+        )
+
+    def create(self, filename: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Crea un trabajo propiedad de este proceso (se ejecuta con submit())"""
+        return self.store.create(filename, params, owner=self.owner)
+
+    def submit(self, job_id: str):
+        with self._active_lock:
+            self._active.add(job_id)
+        self._executor.submit(self._run, job_id)
+        self._prune_if_due()
+
+    def _prune_if_due(self):
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        try:
+            self.store.prune(self.retention_seconds)
+        except OSError as e:
+            logger.warning(f"⚠️ Error limpiando trabajos de análisis: {e}")
+
+    def resume_pending(self) -> int:
+        """
+        Vuelve a encolar los trabajos huérfanos (sin heartbeat de su dueño durante
+        `stale_seconds`, p. ej. tras un reinicio); devuelve cuántos.
+        """
+        self._prune_if_due()
+        pending = [r for r in self.store.list_records() if r.get('status') in PENDING_STATUSES]
+        resumed = 0
+        for record in sorted(pending, key=lambda r: r.get('created_at', '')):
+            with self._active_lock:
+                if record['id'] in self._active:
+                    continue
+            if not self.store.claim(record['id'], self.owner, self.stale_seconds):
+                continue
+            self.store.update(record['id'], owner=self.owner, status='en_cola', progress=0,
+                              message='Reanudado tras reinicio')
+            self.submit(record['id'])
+            resumed += 1
+        if resumed:
+            logger.info(f"🔁 Trabajos de análisis reanudados: {resumed}")
+        return resumed
+
+    def _maintenance_loop(self):
+        """Renueva el heartbeat de los trabajos propios y reclama los huérfanos"""
+        interval = max(1.0, self.stale_seconds / 4)
+        while not self._stop.wait(interval):
+            with self._active_lock:
+                active = list(self._active)
+            try:
+                for job_id in active:
+                    self.store.heartbeat(job_id, self.owner)
+                self.resume_pending()
+            except (OSError, TimeoutError) as e:
+                logger.warning(f"⚠️ Error en mantenimiento de trabajos de análisis: {e}")
+
+    def _publish(self, record: Dict[str, Any], event: str):
+        topic = analysis_topic(record['id'])
+        if not event_bus.has_subscribers(topic):
+            return
+        data = public_view(record)
+        if event != 'finished':
+            data.pop('result', None)
+        event_bus.publish(topic, event, data)
+
+    def _run(self, job_id: str):
+        try:
+            self._execute(job_id)
+        finally:
+            with self._active_lock:
+                self._active.discard(job_id)
+
+    def _execute(self, job_id: str):
+        # Las escrituras llevan owner: si otro proceso reclamó el trabajo, se descartan
+        record = self.store.update(job_id, owner=self.owner, status='en_progreso', message='Iniciando análisis...')
+        if record is None:
+            return
+        self._publish(record, 'progress')
+
+        def progress_callback(progress, message, details=''):
+            updated = self.store.update(job_id, owner=self.owner, progress=int(progress),
+                                        message=message, details=details)
+            if updated is not None:
+                self._publish(updated, 'progress')
+
+        try:
+            result = self.run_job(record['file_path'], record.get('params') or {}, progress_callback)
+            record = self.store.update(job_id, owner=self.owner, status='completado', progress=100,
+                                       message='Análisis completado', result=result)
+        except Exception as e:
+            logger.error(f"❌ Error en trabajo de análisis {job_id}: {e}")
+            record = self.store.update(job_id, owner=self.owner, status='fallido',
+                                       message='Error en el análisis', error=str(e))
+        if record is None:
+            logger.warning(f"⚠️ Trabajo de análisis {job_id} reclamado por otro proceso, resultado descartado")
+            return
+        self.store.remove_upload(job_id)
+        self._publish(record, 'finished')
+
+    def shutdown(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
+
+def public_view(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Trabajo sin rutas internas, para las respuestas de la API"""
+    return {k: v for k, v in record.items() if k not in ('file_path', 'params')}
@@ -1,6 +1,6 @@
 import os
 import sys
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import logging
 
 # Configurar logger temprano
@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 
 # Configuración simplificada para Pydantic (ya no necesaria en browser-use 0.2.6)
 
-from flask import Flask, render_template, request, session, flash, redirect, url_for, jsonify, send_from_directory, send_file
+from flask import Flask, render_template, request, session, flash, redirect, url_for, jsonify, send_from_directory, send_file, Response
 import secrets
 import traceback
 from utils import load_env_vars, save_api_keys_to_env, API_KEYS_TO_MANAGE
@@ -36,6 +36,9 @@ from pydantic import SecretStr # Para manejar claves API seguras
 import json
 import json as json_module
 import threading
+import concurrent.futures
+from collections import OrderedDict
+import atexit
 from dotenv import load_dotenv
 import asyncio
 import requests  # Para RapidAPI Screenshot
@@ -249,7 +252,7 @@ def save_execution_to_database(task_id, test_data, history_entry):
     """Guarda una ejecución de test en la base de datos PostgreSQL"""
     try:
         db_integration = get_db_integration()
-        if not db_integration or not db_integration.test_connection():
+        if not db_integration or not db_integration.is_connected():
             print("DEBUG: Base de datos no disponible para guardar ejecución")
             return
         
@@ -333,6 +336,16 @@ from excel_api_routes import register_excel_routes
 
 # Importar integración de base de datos
 from db_integration import init_db_integration, get_db_integration
+from browser_pool import (get_isolation_mode, get_browser_pool, get_browser_pools_stats,
+                          shutdown_browser_pools, BrowserPoolUnavailable, PooledRun, ISOLATION_POOL)
+
+from suite_scheduler import SuiteScheduler, get_suite_max_parallel
+from log_store import TaskLogStore
+from status_store import TestStatusDB, get_status_version, build_status_etag
+from event_bus import (event_bus, iter_sse, get_heartbeat_seconds, task_topic, suite_topic,
+                       TooManySubscribers)
+from media_index import MediaIndex, get_reconcile_interval
+atexit.register(shutdown_browser_pools)
 
 app = Flask(__name__)
 
@@ -374,13 +387,61 @@ test_dir = None
 os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
 os.makedirs(SCRIPTS_DIR, exist_ok=True)
 
+# Índice de capturas y scripts para que /history no recorra el disco (ver media_index.py)
+media_index = MediaIndex.from_env(
+    [SCREENSHOTS_DIR, os.path.join(os.getcwd(), "test_screenshots")], SCRIPTS_DIR
+)
+media_index.start_reconciler(get_reconcile_interval())
+atexit.register(media_index.stop)
+
 # Determinar la ruta del ejecutable de Python
 python_exe = sys.executable
 print(f"INFO: Usando ejecutable Python: {python_exe}")
 
 # Almacenamiento simple en memoria para el estado de los tests (NO APTO PARA PRODUCCIÓN)
 # En producción usar base de datos, Redis, etc.
-test_status_db = {}
+test_status_db = TestStatusDB()  # task_id -> VersionedStatus (ver status_store.py)
+
+# Logs stdout/stderr de cada test (buffers circulares fuera de test_status_db y de db_lock)
+task_log_store = TaskLogStore.from_env()
+
+def append_task_output(task_id, output_key, text):
+    """Agrega texto al log 'stdout' o 'stderr' de una tarea"""
+    task_log_store.append(task_id, output_key, text)
+
+def get_task_output(task_id, output_key):
+    """Devuelve el log completo 'stdout' o 'stderr' de una tarea"""
+    return task_log_store.get_text(task_id, output_key)
+
+# Estados finales de un test (cierran el canal de eventos)
+TEST_FINAL_STATES = ('success', 'error', 'stopped', 'completed')
+
+def resumen_estado_test(task_id, status):
+    """Campos livianos del estado de un test que se envían por el canal de eventos"""
+    return {
+        'task_id': task_id,
+        'version': get_status_version(status),
+        'status': status.get('status'),
+        'message': status.get('message'),
+        'current_action': status.get('current_action'),
+        'current_step': status.get('current_step'),
+        'icon': status.get('icon'),
+        'screenshots_count': len(status.get('screenshots') or [])
+    }
+
+def _publicar_cambio_estado(task_id, status):
+    # Se ejecuta con db_lock tomado por quien modificó el estado: sólo encola, nunca bloquea
+    topic = task_topic(task_id)
+    if event_bus.has_subscribers(topic):
+        event_bus.publish(topic, 'status', resumen_estado_test(task_id, status))
+
+def _publicar_lineas_log(task_id, output_key, lines, cursor):
+    topic = task_topic(task_id)
+    if event_bus.has_subscribers(topic):
+        event_bus.publish(topic, 'log', {'stream': output_key, 'lines': lines, 'cursor': cursor})
+
+test_status_db.on_change = _publicar_cambio_estado
+task_log_store.on_lines = _publicar_lineas_log
 
 # Tracking de ejecuciones de suite activas
 active_suite_executions = {}  # {execution_id: {'thread': thread_obj, 'suite_id': suite_id, 'stop_flag': threading.Event()}}
@@ -584,7 +645,8 @@ def database_status():
     """Verificar estado de la base de datos"""
     try:
         db_integration = get_db_integration()
-        connection_ok = db_integration.test_connection()
+        # Comprobación real (no en caché): esta vista es el diagnóstico de la conexión
+        connection_ok = db_integration.health.refresh()
         
         if connection_ok:
             # Obtener estadísticas básicas
@@ -605,7 +667,10 @@ def database_status():
                 }
         else:
             stats = {'connection': False}
-            
+        
+        stats['health'] = db_integration.health.get_stats()
+        stats['pool'] = db_integration.db_manager.engine.pool.status()
+        
         return jsonify({
             'success': True,
             'database_status': stats
@@ -662,13 +727,7 @@ def api_save_test_to_db():
         
         # Buscar el test en el historial usando el nuevo servicio
         history_service = get_history_service()
-        history_items = history_service.get_history_items(limit=200)
-        
-        test_data = None
-        for item in history_items:
-            if item['id'] == task_id:
-                test_data = item
-                break
+        test_data = history_service.get_history_item(task_id)
         
         if not test_data:
             return jsonify({
@@ -803,6 +862,21 @@ def api_bulk_delete_orphaned_cases():
             'error': str(e)
         }), 500
 
+def get_history_filters_from_request():
+    """Filtros y paginación del historial a partir de los parámetros de la petición."""
+    filters = {}
+    for arg in ('before', 'status', 'date_from', 'date_to', 'test_case_id'):
+        value = request.args.get(arg, '').strip()
+        if value:
+            filters[arg] = value
+    for arg in ('date_from', 'date_to'):
+        if arg in filters:
+            try:
+                datetime.fromisoformat(filters[arg])
+            except ValueError:
+                del filters[arg]
+    return filters
+
 @app.route('/history')
 def history():
     """Vista para mostrar el historial de tests."""
@@ -810,183 +884,85 @@ def history():
     
     # Usar el nuevo servicio de historial basado en BD
     history_service = get_history_service()
-    sorted_history = history_service.get_history_items(limit=100)
+    history_filters = get_history_filters_from_request()
+    limit = min(request.args.get('limit', 100, type=int) or 100, 500)
+    history_page = history_service.get_history_page(limit=limit, **history_filters)
+    sorted_history = history_page['items']
+    scripts_missing = 0
+    
+    # Marcar cada ejecución según su caso asociado en BD (resuelto por el servicio con un join)
+    for item in sorted_history:
+        associated_case = item.get('db_case')
+        if associated_case:
+            # Si tiene suite, agregar información de la suite
+            if associated_case.get('suite_id'):
+                item['is_in_suite'] = True
+                item['suite_id'] = associated_case.get('suite_id')
+            else:
+                item['is_available_case'] = True
+        else:
+            item['is_execution_only'] = True
     
-    # Verificar qué ejecuciones tienen casos asociados en la BD
     db_integration = get_db_integration()
     if db_integration and db_integration.is_connected():
-        try:
-            # Obtener todos los casos de la BD para verificar relaciones
-            all_test_cases = db_integration.get_test_cases(limit=1000)
-            
-            # Crear mapas para verificaciones rápidas
-            cases_by_name = {}
-            cases_by_suite = {}
-            
-            for case in all_test_cases:
-                case_name = case.get('nombre', '').lower()
-                case_code = case.get('codigo', '').lower()
-                
-                # Mapear por nombre y código
-                if case_name:
-                    cases_by_name[case_name] = case
-                if case_code:
-                    cases_by_name[case_code] = case
-                
-                # Mapear por suite
-                suite_id = case.get('suite_id')
-                if suite_id:
-                    if suite_id not in cases_by_suite:
-                        cases_by_suite[suite_id] = []
-                    cases_by_suite[suite_id].append(case)
-            
-            # Enriquecer cada item del historial con información de BD
-            for item in sorted_history:
-                item_name = item.get('name', '').lower()
-                item_id = item.get('id', '')[:8].lower()
-                
-                # Verificar si este historial tiene caso asociado en BD
-                associated_case = None
-                
-                # Buscar por nombre exacto
-                if item_name in cases_by_name:
-                    associated_case = cases_by_name[item_name]
-                # Buscar por ID parcial en código
-                elif any(item_id in code for code in cases_by_name.keys()):
-                    associated_case = next((case for code, case in cases_by_name.items() if item_id in code), None)
-                
-                # Agregar información del caso asociado
-                if associated_case:
-                    item['db_case'] = {
-                        'id': associated_case.get('id'),
-                        'nombre': associated_case.get('nombre'),
-                        'codigo': associated_case.get('codigo'),
-                        'suite_id': associated_case.get('suite_id'),
-                        'status': associated_case.get('status', 'draft')
-                    }
-                    
-                    # Si tiene suite, agregar información de la suite
-                    if associated_case.get('suite_id'):
-                        item['is_in_suite'] = True
-                        item['suite_id'] = associated_case.get('suite_id')
-                    else:
-                        item['is_available_case'] = True
-                else:
-                    item['is_execution_only'] = True
-                    
-        except Exception as e:
-            logger.warning(f"No se pudo enriquecer historial con datos de BD: {e}")
-        
-        # Enriquecer datos si necesitan mejoras
+        # Enriquecer datos desde el índice de medios (sin accesos a disco por item)
         for item in sorted_history:
             # Asegurar que todos los items tienen un nombre
             if not item.get('name'):
                 item['name'] = f"Test {item.get('id', '')[:8]}"
             
-            # Verificar scripts asociados y actualizar si necesario
+            # Verificar scripts asociados y buscar por ID si el registrado no existe
             script_path = item.get('script_path')
-            if script_path and not os.path.exists(script_path):
-                # Intentar encontrar por ID
-                test_id = item.get('id', '')
-                if test_id:
-                    for filename in os.listdir(SCRIPTS_DIR):
-                        if test_id[:8] in filename and filename.endswith('.py'):
-                            item['script_path'] = os.path.join(SCRIPTS_DIR, filename)
-                            print(f"DEBUG /history: Actualizada ruta de script para {item['name']}: {item['script_path']}")
-                            break
+            if script_path and not media_index.script_exists(script_path):
+                item['script_path'] = media_index.find_script(item.get('id', '')[:8])
+            if not item.get('script_path'):
+                scripts_missing += 1
             
-            # Verificar capturas existentes y filtrar las que no existen físicamente
+            # Filtrar las capturas que ya no existen
             if item.get('screenshots'):
-                print(f"DEBUG /history: Validando {len(item['screenshots'])} capturas para {item['name']}")
                 valid_screenshots = []
-                
                 for screenshot in item['screenshots']:
-                    if isinstance(screenshot, dict):
-                        # Verificar si el archivo existe físicamente
-                        screenshot_path = screenshot.get('path')
-                        if screenshot_path and os.path.exists(screenshot_path):
+                    if not isinstance(screenshot, dict):
+                        continue
+                    screenshot_path = screenshot.get('path')
+                    if screenshot_path and media_index.screenshot_exists(screenshot_path):
+                        valid_screenshots.append(screenshot)
+                        continue
+                    # Si no tiene path válido, intentar reconstruir la ruta desde la URL
+                    url = screenshot.get('url', '')
+                    if url.startswith('/media/screenshots/'):
+                        relative_path = url.replace('/media/screenshots/', '')
+                        full_path = os.path.join(SCREENSHOTS_DIR, relative_path.replace('/', os.path.sep))
+                        if media_index.screenshot_exists(full_path):
+                            screenshot['path'] = full_path
                             valid_screenshots.append(screenshot)
-                        else:
-                            # Si no tiene path, intentar reconstruir la ruta desde la URL
-                            url = screenshot.get('url', '')
-                            if url.startswith('/media/screenshots/'):
-                                relative_path = url.replace('/media/screenshots/', '')
-                                full_path = os.path.join(SCREENSHOTS_DIR, relative_path.replace('/', os.path.sep))
-                                if os.path.exists(full_path):
-                                    # Actualizar el path si existe
-                                    screenshot['path'] = full_path
-                                    valid_screenshots.append(screenshot)
-                                else:
-                                    print(f"DEBUG /history: Captura eliminada o no encontrada: {screenshot.get('name', 'Sin nombre')}")
                 
-                # Actualizar la lista con solo las capturas válidas
                 if len(valid_screenshots) != len(item['screenshots']):
-                    print(f"DEBUG /history: Actualizando capturas de {len(item['screenshots'])} a {len(valid_screenshots)} para {item['name']}")
+                    logger.debug(f"/history: capturas de {item['name']}: {len(item['screenshots'])} -> {len(valid_screenshots)}")
                     item['screenshots'] = valid_screenshots
             
-            # Buscar capturas adicionales en el directorio del test (solo si existe)
-            if 'test_dir' in item and item['test_dir'] and os.path.exists(item['test_dir']):
-                test_dir = item['test_dir']
-                
-                # Buscar imágenes PNG en este directorio que no estén ya en la lista
-                existing_names = {s.get('name') for s in item.get('screenshots', []) if isinstance(s, dict)}
-                
-                try:
-                    print(f"DEBUG /history: Buscando capturas adicionales en directorio {test_dir}")
-                    for file in os.listdir(test_dir):
-                        if file.lower().endswith('.png') and file not in existing_names:
-                            file_path = os.path.join(test_dir, file)
-                            if os.path.exists(file_path):  # Verificar que existe antes de agregar
-                                rel_path = os.path.relpath(file_path, SCREENSHOTS_DIR)
-                                url_path = rel_path.replace(os.path.sep, '/')
-                                
-                                new_screenshot = {
-                                    'url': f'/media/screenshots/{url_path}',
-                                    'path': file_path,
-                                    'name': file
-                                }
-                                
-                                if not item.get('screenshots'):
-                                    item['screenshots'] = []
-                                item['screenshots'].append(new_screenshot)
-                                print(f"DEBUG /history: Agregada captura adicional: {file}")
-                except Exception as e:
-                    print(f"ERROR /history: No se pudieron recuperar capturas adicionales de {test_dir}: {e}")
-            
-            # Buscar capturas en test_screenshots (directorio principal sin duplicación)
-            test_id_full = item.get('id', '')
-            test_screenshots_dir = os.path.join(os.getcwd(), "test_screenshots", test_id_full)
-            
-            if os.path.exists(test_screenshots_dir) and test_screenshots_dir != item.get('test_dir'):
-                try:
-                    print(f"DEBUG /history: Buscando capturas adicionales en {test_screenshots_dir}")
-                    dir_screenshots = []
-                    for file in os.listdir(test_screenshots_dir):
-                        if file.lower().endswith('.png'):
-                            file_path = os.path.join(test_screenshots_dir, file)
-                            rel_path = os.path.relpath(file_path, os.getcwd())
-                            url_path = rel_path.replace(os.path.sep, '/')
-                            
-                            dir_screenshots.append({
-                                'url': f'/media/screenshots/{url_path}',
-                                'path': file_path,
-                                'name': file
-                            })
-                    
-                    if dir_screenshots:
-                        print(f"DEBUG /history: Se encontraron {len(dir_screenshots)} capturas adicionales en {test_screenshots_dir}")
-                        # Añadir capturas o actualizar lista existente
-                        if not item.get('screenshots'):
-                            item['screenshots'] = dir_screenshots
-                        else:
-                            # Agregar solo capturas no duplicadas
-                            existing_urls = {s.get('url') for s in item.get('screenshots', []) if isinstance(s, dict)}
-                            for ss in dir_screenshots:
-                                if ss.get('url') not in existing_urls:
-                                    item['screenshots'].append(ss)
-                                    existing_urls.add(ss.get('url'))
-                except Exception as e:
-                    print(f"ERROR /history: No se pudieron recuperar capturas adicionales de {test_screenshots_dir}: {e}")
+            # Agregar capturas del directorio del test y de test_screenshots/<id> que no estén registradas
+            test_dir = item.get('test_dir')
+            test_screenshots_dir = os.path.join(os.getcwd(), "test_screenshots", item.get('id', ''))
+            existing_urls = {s.get('url') for s in item.get('screenshots') or [] if isinstance(s, dict)}
+            extra_dirs = [(test_dir, SCREENSHOTS_DIR)]
+            if test_screenshots_dir != test_dir:
+                extra_dirs.append((test_screenshots_dir, os.getcwd()))
+            for directory, base_dir in extra_dirs:
+                if not directory:
+                    continue
+                for file in media_index.list_screenshots(directory):
+                    if not file.lower().endswith('.png'):
+                        continue
+                    file_path = os.path.join(directory, file)
+                    url_path = os.path.relpath(file_path, base_dir).replace(os.path.sep, '/')
+                    url = f'/media/screenshots/{url_path}'
+                    if url in existing_urls:
+                        continue
+                    if not item.get('screenshots'):
+                        item['screenshots'] = []
+                    item['screenshots'].append({'url': url, 'path': file_path, 'name': file})
+                    existing_urls.add(url)
     
     # Información de debug
     logger.info(f"📊 Historial cargado: {len(sorted_history)} elementos desde BD")
@@ -995,17 +971,13 @@ def history():
         ss_count = len(sorted_history[0].get('screenshots', []))
         logger.debug(f"Capturas: {ss_count}")
     
-    # Verificar que todos los tests tienen su script
-    scripts_missing = 0
-    for item in sorted_history:
-        script_path = item.get('script_path', '')
-        if not script_path or not os.path.exists(script_path):
-            scripts_missing += 1
-    
     if scripts_missing > 0:
         logger.debug(f"{scripts_missing} de {len(sorted_history)} tests no tienen script válido")
     
-    return render_template('history.html', history=sorted_history)
+    # El cursor no forma parte de los filtros que se conservan al pasar de página
+    page_filters = {k: v for k, v in history_filters.items() if k != 'before'}
+    return render_template('history.html', history=sorted_history,
+                           next_cursor=history_page['next_cursor'], history_filters=page_filters)
 
 @app.route('/get_history')
 def get_history():
@@ -1013,43 +985,19 @@ def get_history():
     try:
         # Usar el mismo servicio que usa /history pero devolver JSON
         history_service = get_history_service()
-        sorted_history = history_service.get_history_items(limit=100)
+        limit = min(request.args.get('limit', 100, type=int) or 100, 500)
+        history_page = history_service.get_history_page(limit=limit, **get_history_filters_from_request())
+        sorted_history = history_page['items']
         
         # Filtrar solo ejecuciones que NO han sido guardadas como casos en BD
         # para evitar duplicación en bulk execution
-        db_integration = get_db_integration()
-        filtered_history = []
-        
-        if db_integration and db_integration.is_connected():
-            try:
-                # Obtener casos existentes en BD
-                all_test_cases = db_integration.get_test_cases(limit=1000)
-                case_names = {case.get('nombre', '').lower() for case in all_test_cases}
-                case_codes = {case.get('codigo', '').lower() for case in all_test_cases}
-                
-                # Filtrar historial excluyendo los que ya están como casos en BD
-                for item in sorted_history:
-                    item_name = item.get('name', '').lower()
-                    item_id = item.get('id', '')[:8].lower()
-                    
-                    # Solo incluir si NO está en la BD como caso
-                    is_in_bd = (item_name in case_names or 
-                               any(item_id in code for code in case_codes))
-                    
-                    if not is_in_bd:
-                        filtered_history.append(item)
-                        
-            except Exception as e:
-                logger.warning(f"Error filtrando historial para bulk execution: {e}")
-                # Si hay error, usar el historial completo
-                filtered_history = sorted_history
-        else:
-            filtered_history = sorted_history
+        filtered_history = [item for item in sorted_history if not item.get('db_case')]
         
         return jsonify({
             'status': 'success',
             'history': filtered_history,
-            'total': len(filtered_history)
+            'total': len(filtered_history),
+            'next_cursor': history_page['next_cursor']
         })
         
     except Exception as e:
@@ -1087,18 +1035,11 @@ def save_test_as_playwright():
     # Verificar que el script exista
     script_path = test_data.get('script_path')
     if not script_path or not os.path.exists(script_path):
-        # Intentar buscar el script en test_scripts por ID
-        test_id_short = test_id[:8]
-        possible_scripts = []
-        
-        for filename in os.listdir(SCRIPTS_DIR):
-            if test_id_short in filename and filename.endswith('.py'):
-                possible_script = os.path.join(SCRIPTS_DIR, filename)
-                possible_scripts.append(possible_script)
-        
-        if possible_scripts:
-            # Usar el script más reciente que coincida con el ID
-            script_path = max(possible_scripts, key=os.path.getmtime)
+        # Intentar buscar el script en test_scripts por ID (el más reciente que coincida)
+        possible_script = media_index.find_script(test_id[:8])
+        
+        if possible_script and os.path.exists(possible_script):
+            script_path = possible_script
             print(f"DEBUG: Script encontrado por ID: {script_path}")
         else:
             return jsonify({'status': 'error', 'message': 'Script de test no encontrado'}), 404
@@ -1143,6 +1084,7 @@ def save_test_as_playwright():
         if script_path.startswith(SCRIPTS_DIR):
             try:
                 os.remove(script_path)
+                media_index.discard_script(script_path)
                 print(f"DEBUG: Archivo original eliminado: {script_path}")
             except Exception as e:
                 print(f"ERROR: No se pudo eliminar el archivo original: {e}")
@@ -1660,8 +1602,6 @@ def run_playwright_case():
             'status': 'queued',
             'message': 'Preparando ejecución de caso Playwright...',
             'original_instructions': f'Ejecutando caso Playwright: {case_name}',
-            'stdout': '',
-            'stderr': '',
             'current_action': 'Inicializando...',
             'icon': 'fa-play-circle',
             'url': 'Caso Playwright',
@@ -1744,10 +1684,10 @@ def execute_playwright_case(task_id, case_path, headless=True):
                         decoded_line = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]', '', decoded_line)
                         decoded_line = ''.join(c if ord(c) < 128 else '?' for c in decoded_line)
                         
+                        append_task_output(task_id, output_key, decoded_line)
+                        
                         with db_lock:
                             if task_id in test_status_db:
-                                test_status_db[task_id][output_key] += decoded_line
-                                
                                 # Detectar indicaciones de progreso
                                 if output_key == 'stdout':
                                     if 'Iniciando' in decoded_line:
@@ -1761,6 +1701,7 @@ def execute_playwright_case(task_id, case_path, headless=True):
                                         if match and match.group(1):
                                             screenshot_path = match.group(1)
                                             if os.path.exists(screenshot_path):
+                                                media_index.register_screenshot(screenshot_path)
                                                 relative_path = os.path.relpath(screenshot_path, SCREENSHOTS_DIR)
                                                 url = f'/media/screenshots/{relative_path}'
                                                 test_status_db[task_id]['screenshots'].append({
@@ -1783,6 +1724,9 @@ def execute_playwright_case(task_id, case_path, headless=True):
         
         # Esperar finalización del proceso
         return_code = process.wait()
+        stdout_thread.join(timeout=2)
+        stderr_thread.join(timeout=2)
+        task_log_store.finish(task_id)
         
         # Procesar resultado
         with db_lock:
@@ -1935,93 +1879,174 @@ def run_test():
         print(traceback.format_exc())
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+# Última mtime vista de cada test_dir, para escanear capturas sólo cuando el directorio cambia
+# (LRU acotado: los tests terminados dejan de consultarse y salen solos)
+TEST_DIR_MTIMES_MAX_ENTRIES = 512
+_test_dir_mtimes = OrderedDict()
+_test_dir_mtimes_lock = threading.Lock()
+
+def sincronizar_capturas_test_dir(status_info):
+    """Agrega a status_info['screenshots'] las capturas de test_dir que aún no estén registradas"""
+    test_dir = status_info.get('test_dir')
+    screenshots = status_info.get('screenshots')
+    if not test_dir or not isinstance(screenshots, list):
+        return
+    try:
+        mtime = os.stat(test_dir).st_mtime
+    except OSError:
+        return
+    # La clave incluye la lista para volver a escanear si el estado se reinicia
+    cache_key = (test_dir, id(screenshots))
+    with _test_dir_mtimes_lock:
+        if _test_dir_mtimes.get(cache_key) == mtime:
+            _test_dir_mtimes.move_to_end(cache_key)
+            return
+        _test_dir_mtimes[cache_key] = mtime
+        _test_dir_mtimes.move_to_end(cache_key)
+        while len(_test_dir_mtimes) > TEST_DIR_MTIMES_MAX_ENTRIES:
+            _test_dir_mtimes.popitem(last=False)
+
+    # El directorio se lista fuera del lock; la lista del estado sólo se modifica bajo db_lock
+    try:
+        files = sorted(file for file in os.listdir(test_dir) if file.lower().endswith('.png'))
+    except Exception as e:
+        logger.error(f"Error al buscar capturas adicionales: {e}")
+        return
+    with db_lock:
+        existing_urls = {s.get('url', '') for s in screenshots if isinstance(s, dict)}
+        for file in files:
+            file_path = os.path.join(test_dir, file)
+            rel_path = os.path.relpath(file_path, SCREENSHOTS_DIR)
+            url_path = rel_path.replace(os.path.sep, '/')
+            url = f'/media/screenshots/{url_path}'
+            
+            # Si esta URL no está en la lista de capturas, agregarla
+            if url not in existing_urls:
+                screenshots.append({
+                    'url': url,
+                    'path': file_path,
+                    'name': file
+                })
+                existing_urls.add(url)
+                logger.debug(f"Añadida captura adicional encontrada: {file}")
+
+def sanitize_status_data(data):
+    """Sanitiza recursivamente un estado de test para enviarlo como JSON"""
+    if isinstance(data, dict):
+        # Si es un diccionario con información de capturas, asegurar que las URLs están bien formateadas
+        if 'url' in data and 'path' in data and isinstance(data['path'], str) and data['path'].endswith('.png'):
+            # Normalizar la ruta (sin tocar disco) cuando la captura está dentro de SCREENSHOTS_DIR
+            try:
+                file_path = os.path.abspath(data['path'])
+                if file_path.startswith(os.path.abspath(SCREENSHOTS_DIR) + os.path.sep):
+                    rel_path = os.path.relpath(file_path, SCREENSHOTS_DIR)
+                    url_path = rel_path.replace(os.path.sep, '/')
+                    data = dict(data, url=f'/media/screenshots/{url_path}')
+            except Exception as e:
+                logger.error(f"Error al normalizar URL de captura: {e}")
+        
+        return {k: sanitize_status_data(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [sanitize_status_data(item) for item in data]
+    elif isinstance(data, str):
+        try:
+            # Sanitizar string: eliminar caracteres no ASCII, no imprimibles y escapar JSON
+            sanitized = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]', '', data)
+            sanitized = ''.join(c if ord(c) < 128 else '?' for c in sanitized)
+            sanitized = sanitized.replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+            return sanitized
+        except Exception as e:
+            logger.exception(f"Error sanitizando string")
+            return "[Contenido no representable]"
+    else:
+        return data
+
+def _status_response(payload, etag):
+    """Respuesta JSON con ETag; Cache-Control no-cache obliga al navegador a revalidar (304)"""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _not_modified_response(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/test_status/<task_id>')
 def get_test_status(task_id):
-    global test_status_db
+    """
+    Estado de un test, con soporte de polling incremental.
+
+    Sin parámetros devuelve el estado completo. Si el cliente envía alguno de
+    `version`, `stdout_cursor`, `stderr_cursor` o `screenshots_count` (los valores
+    de la respuesta anterior), sólo recibe lo que cambió desde entonces. En ambos
+    modos se responde 304 si nada cambió (comparando la versión o el header If-None-Match).
+    """
     try:
-        logger.debug(f"=== GET_TEST_STATUS INICIADO ===")
-        logger.debug(f"Obteniendo estado para task_id={task_id}")
-        logger.debug(f"test_status_db contiene {len(test_status_db)} elementos")
-        logger.debug(f"Claves en test_status_db: {list(test_status_db.keys())}")
-        
-        # Función auxiliar para sanitizar diccionarios recursivamente
-        def sanitize_dict(data):
-            if isinstance(data, dict):
-                # Si es un diccionario con información de capturas, asegurar que las URLs están bien formateadas
-                if 'url' in data and 'path' in data and isinstance(data['path'], str) and data['path'].endswith('.png'):
-                    # Normalizar la ruta para que use el formato correcto en URLs
-                    try:
-                        file_path = data['path']
-                        if os.path.exists(file_path):
-                            rel_path = os.path.relpath(file_path, SCREENSHOTS_DIR)
-                            url_path = rel_path.replace(os.path.sep, '/')
-                            data['url'] = f'/media/screenshots/{url_path}'
-                    except Exception as e:
-                        logger.error(f"Error al normalizar URL de captura: {e}")
-                
-                return {k: sanitize_dict(v) for k, v in data.items()}
-            elif isinstance(data, list):
-                return [sanitize_dict(item) for item in data]
-            elif isinstance(data, str):
-                try:
-                    # Sanitizar string: eliminar caracteres no ASCII, no imprimibles y escapar JSON
-                    sanitized = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]', '', data)
-                    sanitized = ''.join(c if ord(c) < 128 else '?' for c in sanitized)
-                    sanitized = sanitized.replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
-                    return sanitized
-                except Exception as e:
-                    logger.exception(f"Error sanitizando string")
-                    return "[Contenido no representable]"
-            else:
-                return data
-        
         status_info = get_test_status_unified(task_id)
-        logger.debug(f"status_info encontrado: {status_info is not None}")
         
         if status_info:
-            logger.debug(f"Estado encontrado: {status_info.get('status', 'N/A')}")
-            logger.debug(f"Mensaje: {status_info.get('message', 'N/A')}")
-            logger.debug(f"Acción actual: {status_info.get('current_action', 'N/A')}")
+            logger.debug(f"Estado encontrado para {task_id}: {status_info.get('status', 'N/A')}")
             
             try:
-                logger.debug(f"Encontrado status_info para {task_id}, sanitizando...")
+                # Registrar capturas que existan en disco pero no en el estado (sólo si test_dir cambió)
+                sincronizar_capturas_test_dir(status_info)
                 
-                # Verificar si hay capturas y si están correctamente formateadas
-                if 'screenshots' in status_info and isinstance(status_info['screenshots'], list):
-                    logger.debug(f"Capturas encontradas: {len(status_info['screenshots'])}")
-                    # Verificar si test_dir existe y tiene capturas que no estén en la lista
-                    test_dir = status_info.get('test_dir')
-                    if test_dir and os.path.exists(test_dir):
-                        existing_urls = {s.get('url', '') for s in status_info['screenshots'] if isinstance(s, dict)}
-                        try:
-                            for file in os.listdir(test_dir):
-                                if file.lower().endswith('.png'):
-                                    file_path = os.path.join(test_dir, file)
-                                    rel_path = os.path.relpath(file_path, SCREENSHOTS_DIR)
-                                    url_path = rel_path.replace(os.path.sep, '/')
-                                    url = f'/media/screenshots/{url_path}'
-                                    
-                                    # Si esta URL no está en la lista de capturas, agregarla
-                                    if url not in existing_urls:
-                                        status_info['screenshots'].append({
-                                            'url': url,
-                                            'path': file_path,
-                                            'name': file
-                                        })
-                                        existing_urls.add(url)
-                                        logger.debug(f"Añadida captura adicional encontrada: {file}")
-                        except Exception as e:
-                            logger.error(f"Error al buscar capturas adicionales: {e}")
+                version = get_status_version(status_info)
+                stdout_cursor = task_log_store.get_cursor(task_id, 'stdout')
+                stderr_cursor = task_log_store.get_cursor(task_id, 'stderr')
+                screenshots = list(status_info.get('screenshots') or [])
+                etag = build_status_etag(version, stdout_cursor, stderr_cursor, len(screenshots))
+                
+                if request.if_none_match.contains(etag):
+                    return _not_modified_response(etag)
+                
+                delta_params = ('version', 'stdout_cursor', 'stderr_cursor', 'screenshots_count')
+                if any(param in request.args for param in delta_params):
+                    client_version = request.args.get('version', type=int)
+                    client_cursors = {
+                        'stdout': request.args.get('stdout_cursor', 0, type=int),
+                        'stderr': request.args.get('stderr_cursor', 0, type=int),
+                    }
+                    client_screenshots = max(request.args.get('screenshots_count', 0, type=int), 0)
+                    
+                    if (client_version == version and client_cursors['stdout'] == stdout_cursor
+                            and client_cursors['stderr'] == stderr_cursor and client_screenshots == len(screenshots)):
+                        return _not_modified_response(etag)
+                    
+                    delta = {'delta': True, 'version': version}
+                    if client_version != version:
+                        delta.update({k: v for k, v in status_info.items() if k not in ('stdout', 'stderr', 'screenshots')})
+                    for output_key in ('stdout', 'stderr'):
+                        lines, next_cursor, truncated = task_log_store.read(task_id, output_key, client_cursors[output_key])
+                        delta[output_key] = ''.join(lines)
+                        delta[f'{output_key}_cursor'] = next_cursor
+                        if truncated:
+                            delta[f'{output_key}_truncated'] = True
+                    delta['screenshots'] = screenshots[client_screenshots:]
+                    delta['screenshots_count'] = len(screenshots)
+                    
+                    return _status_response(sanitize_status_data(delta), etag)
+                
+                # Estado completo: los logs viven en task_log_store; se devuelve la parte en memoria (acotada)
+                full_status = dict(status_info)
+                full_status['screenshots'] = screenshots
+                full_status['screenshots_count'] = len(screenshots)
+                full_status['version'] = version
+                if task_log_store.has_task(task_id):
+                    for output_key in ('stdout', 'stderr'):
+                        full_status[output_key] = task_log_store.get_tail(task_id, output_key)
+                        full_status[f'{output_key}_cursor'] = task_log_store.get_cursor(task_id, output_key)
                 
                 # Sanitizar datos
-                sanitized_info = sanitize_dict(status_info)
-                logger.debug(f"Sanitización completada, preparando respuesta JSON")
+                sanitized_info = sanitize_status_data(full_status)
                 
                 # Intentar convertir a JSON con manejo explícito de errores
                 # Primero intentar con dumps para detectar problemas
                 try:
-                    json_text = json_module.dumps(sanitized_info)
-                    logger.debug(f"json.dumps exitoso, longitud={len(json_text)}")
+                    json_module.dumps(sanitized_info)
                 except Exception as json_dumps_error:
                     logger.error(f"Error en json.dumps: {json_dumps_error}")
                     # Si hay error, hacer una sanitización más agresiva de stdout/stderr
@@ -2042,12 +2067,7 @@ def get_test_status(task_id):
                     )
                     logger.debug("Re-sanitización completada")
                 
-                # Ahora intentar jsonify con la data potencialmente re-sanitizada
-                logger.debug("Generando respuesta JSON con jsonify")
-                response = jsonify(sanitized_info)
-                logger.debug("Respuesta JSON generada correctamente")
-                logger.debug(f"=== GET_TEST_STATUS COMPLETADO EXITOSAMENTE ===")
-                return response
+                return _status_response(sanitized_info, etag)
                 
             except Exception as json_error:
                 logger.exception(f"Error al convertir a JSON")
@@ -2094,6 +2114,99 @@ def get_test_status(task_id):
             'details': str(e).replace('\\u', '\\\\u')  # Sanitizar unicode en el mensaje de error
         }), 200  # Código 200 para que el frontend pueda mostrar el mensaje
 
+def _sse_response(generator):
+    return Response(generator, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/events/test/<task_id>')
+def stream_test_events(task_id):
+    """
+    Canal SSE de un test: 'snapshot' inicial y luego eventos 'status', 'log' y 'screenshot'.
+
+    El stream se cierra cuando el test llega a un estado final. Un evento 'resync'
+    indica que el cliente se atrasó y debe pedir el estado completo a /test_status.
+    """
+    try:
+        # Suscribirse antes de tomar el snapshot para no perder eventos intermedios
+        subscription = event_bus.subscribe(task_topic(task_id))
+    except TooManySubscribers as e:
+        return jsonify({'error': str(e)}), 503
+
+    with db_lock:
+        status = test_status_db.get(task_id)
+        snapshot = resumen_estado_test(task_id, status) if status else {'task_id': task_id, 'status': 'not_found'}
+        screenshots = list(status.get('screenshots') or []) if status else []
+    snapshot['stdout_cursor'] = task_log_store.get_cursor(task_id, 'stdout')
+    snapshot['stderr_cursor'] = task_log_store.get_cursor(task_id, 'stderr')
+    snapshot['screenshots'] = [{'url': s.get('url'), 'name': s.get('name')} for s in screenshots if isinstance(s, dict)]
+    enviadas = {'screenshots': len(screenshots)}
+
+    def capturas_nuevas():
+        with db_lock:
+            status = test_status_db.get(task_id)
+            nuevas = list((status.get('screenshots') or [])[enviadas['screenshots']:]) if status else []
+        enviadas['screenshots'] += len(nuevas)
+        return [('screenshot', {'url': s.get('url'), 'name': s.get('name')}) for s in nuevas if isinstance(s, dict)]
+
+    def terminado(event, data):
+        return event in ('snapshot', 'status') and data.get('status') in TEST_FINAL_STATES
+
+    return _sse_response(iter_sse(subscription, get_heartbeat_seconds(), initial_events=[('snapshot', snapshot)],
+                                  is_finished=terminado, extra_events=capturas_nuevas))
+
+@app.route('/events/suite/<execution_id>')
+def stream_suite_events(execution_id):
+    """Canal SSE de una ejecución de suite: 'snapshot', 'case_result' y 'suite_finished'."""
+    try:
+        subscription = event_bus.subscribe(suite_topic(execution_id))
+    except TooManySubscribers as e:
+        return jsonify({'error': str(e)}), 503
+
+    snapshot = {'execution_id': execution_id, 'status': 'starting', 'cases': []}
+    results_file = os.path.join(tempfile.gettempdir(), f"suite_results_{execution_id}.json")
+    try:
+        with open(results_file, 'r') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    def terminado(event, data):
+        return event == 'suite_finished' or (event == 'snapshot' and data.get('status') in ('completed', 'stopped', 'error'))
+
+    return _sse_response(iter_sse(subscription, get_heartbeat_seconds(), initial_events=[('snapshot', snapshot)],
+                                  is_finished=terminado))
+
+@app.route('/test_logs/<task_id>')
+def get_test_logs(task_id):
+    """
+    Devuelve sólo las líneas nuevas del log de un test.
+
+    Query params:
+        stream: 'stdout' (defecto) o 'stderr'
+        cursor: cursor devuelto por la llamada anterior (defecto 0)
+        limit: máximo de líneas a devolver (defecto 1000)
+    """
+    stream = request.args.get('stream', 'stdout')
+    if stream not in ('stdout', 'stderr'):
+        return jsonify({'error': "stream debe ser 'stdout' o 'stderr'"}), 400
+    cursor = request.args.get('cursor', 0, type=int)
+    limit = min(max(request.args.get('limit', 1000, type=int), 1), 10000)
+
+    if not task_log_store.has_task(task_id):
+        return jsonify({'task_id': task_id, 'stream': stream, 'lines': [], 'cursor': 0,
+                        'truncated': False, 'found': False})
+
+    lines, next_cursor, truncated = task_log_store.read(task_id, stream, cursor, limit)
+    return jsonify({
+        'task_id': task_id,
+        'stream': stream,
+        'lines': lines,
+        'cursor': next_cursor,
+        'has_more': next_cursor < task_log_store.get_cursor(task_id, stream),
+        'truncated': truncated,
+        'found': True
+    })
+
 @app.route('/debug/test_status_db')
 def debug_test_status_db():
     """Endpoint de debug para verificar el estado de test_status_db."""
@@ -2124,6 +2237,19 @@ def debug_test_status_db():
             'traceback': traceback.format_exc()
         }), 500
 
+@app.route('/debug/browser_pool')
+def debug_browser_pool():
+    """Endpoint de debug con el estado del pool de navegadores."""
+    return jsonify({
+        'isolation_mode': get_isolation_mode(),
+        'pools': get_browser_pools_stats()
+    })
+
+@app.route('/debug/media_index')
+def debug_media_index():
+    """Endpoint de debug con el estado del índice de capturas y scripts."""
+    return jsonify(media_index.get_stats())
+
 # Ruta para servir archivos de screenshots estáticamente
 @app.route('/media/screenshots/<path:filename>')
 def static_media(filename):
@@ -2298,6 +2424,10 @@ def formatear_instrucciones(instrucciones):
     instrucciones = '\n'.join(line.strip() for line in instrucciones.split('\n') if line.strip())
     return instrucciones
 
+
+AGENT_MAX_STEPS = 15  # pasos máximos del agente, en subproceso y en el pool
+
+
 def generar_script_test_nuevo(url, instrucciones, headless=True, max_tiempo=600, capturar_pasos=False, browser='chrome', fullscreen=True):
     """Genera un script de test para browser-use."""
     print(f"DEBUG: generar_script_test_nuevo llamado con params: url='{url}', headless={headless}, max_tiempo={max_tiempo}, capturar_pasos={capturar_pasos}, browser={browser}, fullscreen={fullscreen}")
@@ -2441,7 +2571,12 @@ browser = Browser(
             minimum_wait_page_load_time=1.0,
             wait_for_network_idle_page_load_time=2.0,
             maximum_wait_page_load_time=15.0,
-            wait_between_actions=0.5
+            wait_between_actions=0.5,
+            incremental_dom_snapshots=True,  # reutilizar el DOM si la página no cambió entre pasos
+            adaptive_page_load_wait=True,  # aprender por dominio cuánto esperar a que la red quede inactiva
+            screenshot_format='jpeg',  # capturas para el modelo: JPEG reducido (menos tokens de imagen)
+            screenshot_quality=80,
+            screenshot_max_size=1024
         )
         # No especificar browser_binary_path para usar navegador built-in de Playwright
     )
@@ -2483,7 +2618,7 @@ async def main():
             browser=browser
         )
         print("DEBUG: Agente creado")
-        await agent.run(max_steps=15)
+        await agent.run(max_steps={AGENT_MAX_STEPS})
         print("DEBUG: Test completado exitosamente")
 
         # --- Captura después de navegar ---
@@ -2510,8 +2645,376 @@ if __name__ == "__main__":
 """
     return script_template
 
+def registrar_resultado_test(task_id, url, instrucciones, final_status, final_message, final_icon,
+                             final_stdout, final_stderr, return_code, script_path, screenshots_found,
+                             browser, headless, fullscreen, screenshots, max_tiempo):
+    """Registra el estado final de un test en test_status_db, el historial y la base de datos."""
+    # El script del test pudo escribir capturas sin anunciarlas: actualizar el índice una vez aquí
+    media_index.refresh_directory(os.path.join(os.getcwd(), "test_screenshots", task_id))
+    media_index.refresh_directory(test_status_db.get(task_id, {}).get('test_dir'))
+    for screenshot in screenshots_found or []:
+        if isinstance(screenshot, dict) and screenshot.get('path'):
+            media_index.register_screenshot(screenshot['path'])
+    with db_lock:
+        if task_id in test_status_db: 
+            update_data = {
+                'status': final_status,
+                'message': final_message,
+                'screenshots': screenshots_found,
+                'icon': final_icon,
+                'current_action': 'Finalizado',
+                'url': url  # Añadir la URL al estado final
+            }
+            test_status_db[task_id].update(update_data)
+
+            # Añadir el test al historial una vez completado
+            print(f"DEBUG: Intentando añadir test {task_id} al historial. Estado actual: {final_status}")
+            print(f"DEBUG: Historial actual tiene {len(history_db)} elementos")
+
+            # Asegurar que todos los campos necesarios están presentes
+            test_data = test_status_db[task_id].copy()
+            if 'url' not in test_data or not test_data['url']:
+                test_data['url'] = url
+
+            add_result = add_to_history(task_id, test_data)
+            logger.info(f"Resultado de guardar en BD: {add_result}")
+
+            # ===============================================================
+            # REGISTRO AUTOMÁTICO EN BASE DE DATOS
+            # ===============================================================
+            try:
+                db_integration = get_db_integration()
+                if db_integration and db_integration.is_connected():
+                    print(f"DEBUG: Intentando registrar test {task_id} en base de datos...")
+
+                    # Obtener las instrucciones originales correctamente
+                    original_instructions = test_status_db[task_id].get('original_instructions', instrucciones)
+                    print(f"DEBUG: Instrucciones originales obtenidas ({len(original_instructions)} chars): {original_instructions[:100]}...")
+
+                    # Crear caso de prueba en BD
+                    test_case_data = {
+                        'nombre': f'Test {task_id[:8]} - {datetime.now().strftime("%Y%m%d_%H%M%S")}',
+                        'codigo': f'AUTO-{task_id[:8]}',
+                        'tipo': 'ui',
+                        'prioridad': 'media',
+                        'objetivo': 'Prueba ejecutada desde la interfaz web de QA-Pilot',
+                        'pasos': original_instructions,
+                        'resultado_esperado': 'Ejecución exitosa según las instrucciones proporcionadas',
+                        'url_objetivo': url,
+                        'es_valido': True,
+                        'status': 'approved' if final_status == 'success' else 'draft',
+                        'created_by': 'qa_pilot_web',
+                        'instrucciones_qa_pilot': original_instructions,
+                        'metadata_json': {
+                            'execution_id': task_id,
+                            'browser': browser,
+                            'headless': headless,
+                            'screenshots_enabled': screenshots,
+                            'max_tiempo': max_tiempo,
+                            'execution_timestamp': datetime.now().isoformat(),
+                            'final_status': final_status,
+                            'final_message': final_message
+                        }
+                    }
+
+                    print(f"DEBUG: Datos del caso a guardar: {test_case_data}")
+                    case_id = db_integration.save_test_case(test_case_data)
+                    print(f"DEBUG: ✅ Caso de prueba guardado en BD con ID: {case_id}")
+
+                    # Crear ejecución de prueba en BD
+                    if case_id:
+                        execution_data = {
+                            'test_case_id': case_id,
+                            'execution_type': 'manual',
+                            'status': 'passed' if final_status == 'success' else 'failed',
+                            'result_details': final_message,
+                            'error_message': final_stderr if final_status != 'success' else None,
+                            'url_executed': url,
+                            'script_path': script_path if script_path else None,
+                            'stdout_log': final_stdout,
+                            'stderr_log': final_stderr,
+                            'return_code': return_code,
+                            'duration_seconds': int((time.time() - float(test_status_db[task_id].get('start_time', time.time())))),
+                            'browser_config': {
+                                'browser': browser,
+                                'headless': headless,
+                                'fullscreen': fullscreen,
+                                'screenshots_enabled': screenshots
+                            },
+                            'executed_by': 'qa_pilot_web',
+                            'metadata_json': {
+                                'task_id': task_id,
+                                'screenshots_count': len(test_data.get('screenshots', [])),
+                                'execution_source': 'web_interface'
+                            }
+                        }
+
+                        print(f"DEBUG: Datos de ejecución a guardar: {execution_data}")
+                        execution_id = db_integration.create_test_execution(execution_data)
+                        print(f"DEBUG: ✅ Ejecución de prueba registrada en BD con ID: {execution_id}")
+
+                        # Registrar screenshots en BD si existen
+                        if execution_id and test_data.get('screenshots'):
+                            for idx, screenshot in enumerate(test_data['screenshots']):
+                                if isinstance(screenshot, dict) and 'path' in screenshot:
+                                    screenshot_data = {
+                                        'execution_id': execution_id,
+                                        'test_case_id': case_id,
+                                        'name': screenshot.get('name', f'screenshot_{idx}'),
+                                        'description': f'Captura automática del paso {idx + 1}',
+                                        'step_number': idx + 1,
+                                        'screenshot_type': 'step',
+                                        'file_path': screenshot['path'],
+                                        'file_name': os.path.basename(screenshot['path']),
+                                        'file_size_bytes': os.path.getsize(screenshot['path']) if os.path.exists(screenshot['path']) else 0,
+                                        'url_captured': url,
+                                        'timestamp_ms': int(time.time() * 1000),
+                                        'is_valid': True,
+                                        'metadata_json': {
+                                            'task_id': task_id,
+                                            'url_web': screenshot.get('url', ''),
+                                            'capture_source': 'qa_pilot_web'
+                                        }
+                                    }
+
+                                    try:
+                                        screenshot_id = db_integration.save_screenshot(screenshot_data)
+                                        print(f"DEBUG: Screenshot registrado en BD con ID: {screenshot_id}")
+                                    except Exception as ss_error:
+                                        print(f"DEBUG: Error al guardar screenshot en BD: {ss_error}")
+
+                        # Actualizar información en test_status_db
+                        test_status_db[task_id]['db_case_id'] = str(case_id)
+                        test_status_db[task_id]['db_execution_id'] = str(execution_id)
+
+                else:
+                    print(f"DEBUG: ❌ Base de datos no disponible o no conectada, test {task_id} solo guardado en historial")
+
+            except Exception as db_error:
+                print(f"ERROR: ❌ Error al registrar test en base de datos: {db_error}")
+                print(f"ERROR: Traceback completo:")
+                print(traceback.format_exc())
+
+            # Guardar una copia de seguridad en disco
+            try:
+                persist_history_to_disk() # type: ignore
+            except Exception as e:
+                print(f"DEBUG: Error al persistir historial: {e}")
+
+POOL_BROWSERS = ('chrome', 'chromium')
+
+
+def pool_incompatibility(model_name, browser):
+    """
+    Motivo por el que un test no puede ejecutarse en el pool de navegadores, o None.
+
+    El pool sólo tiene navegadores Chromium y el agente en proceso sólo usa modelos de
+    Anthropic; el resto de configuraciones se ejecutan en subproceso.
+    """
+    if (browser or 'chrome').lower() not in POOL_BROWSERS:
+        return f"navegador '{browser}' no disponible en el pool"
+    if not (model_name or '').startswith('claude'):
+        return f"modelo '{model_name}' no soportado en el pool"
+    return None
+
+
+def run_test_background_pooled(task_id, url, instrucciones, headless, max_tiempo, screenshots, model_name='claude-3-5-sonnet-20240620', browser='chrome', fullscreen=True):
+    """
+    Ejecuta un test dentro del proceso usando un BrowserContext prestado por el pool de navegadores.
+
+    Lanza BrowserPoolUnavailable si el pool no puede iniciarse, no entrega un navegador
+    antes de comenzar el test o la configuración pedida no es compatible con el pool
+    (ver pool_incompatibility); en ese caso el llamador debe usar el modo subproceso.
+    """
+    reason = pool_incompatibility(model_name, browser)
+    if reason:
+        raise BrowserPoolUnavailable(reason)
+    pool = get_browser_pool(headless=bool(headless))
+
+    max_tiempo = max(max_tiempo, 60)  # Asegurar un mínimo de 60 segundos
+    capturar_pasos = bool(screenshots)
+    task_dir = os.path.join(SCREENSHOTS_DIR, task_id)
+    os.makedirs(task_dir, exist_ok=True)
+    agent_started = threading.Event()
+
+    print(f"DEBUG [run_test_background_pooled]: Iniciando tarea {task_id} en pool (headless={headless})")
+
+    def append_output(output_key, text):
+        append_task_output(task_id, output_key, text)
+
+    def registrar_captura(output_path):
+        relative_path = os.path.relpath(output_path, SCREENSHOTS_DIR).replace(os.path.sep, '/')
+        with db_lock:
+            if task_id in test_status_db:
+                test_status_db[task_id].setdefault('screenshots', []).append({
+                    'url': f'/media/screenshots/{relative_path}',
+                    'path': output_path,
+                    'name': os.path.basename(output_path)
+                })
+
+    # Script equivalente para el historial (re-ejecución y generación de Playwright), igual que en subproceso
+    script_path = os.path.join(SCRIPTS_DIR, f"test_{task_id}.py")
+    try:
+        script_content = generar_script_test_nuevo(
+            url=url,
+            instrucciones=instrucciones,
+            headless=headless,
+            max_tiempo=max_tiempo,
+            capturar_pasos=capturar_pasos,
+            browser=browser,
+            fullscreen=fullscreen
+        )
+        with open(script_path, 'w', encoding='utf-8-sig', errors='replace') as f:
+            f.write(script_content)
+        media_index.register_script(script_path)
+    except OSError as e:
+        logger.warning(f"⚠️ No se pudo guardar el script del test {task_id}: {e}")
+        script_path = None
+
+    # Se actualiza el estado existente: conserva original_instructions y created_at fijados por las rutas
+    with db_lock:
+        test_status_db.setdefault(task_id, {}).update({
+            'status': 'running',
+            'message': 'Ejecutando en pool de navegadores...',
+            'screenshots': [],
+            'icon': 'fa-spinner fa-spin',
+            'current_action': 'Esperando navegador del pool...',
+            'current_step': 0,
+            'start_time': time.time(),
+            'test_dir': task_dir,
+            'script_path': script_path,
+            'url': url,
+            'execution_mode': 'pool'
+        })
+
+    async def ejecutar(pool):
+        anthropic_key = os.getenv('ANTHROPIC_API_KEY')
+        if not anthropic_key:
+            raise Exception("ANTHROPIC_API_KEY no encontrada")
+        llm = ChatAnthropic(
+            model=model_name,
+            api_key=anthropic_key,
+            temperature=0.1,
+            max_tokens=4000
+        )
+        context_config = BrowserContextConfig(
+            browser_window_size={"width": 1920, "height": 1080} if fullscreen else {"width": 1280, "height": 720},
+            minimum_wait_page_load_time=1.0,
+            wait_for_network_idle_page_load_time=2.0,
+            maximum_wait_page_load_time=15.0,
+            wait_between_actions=0.5,
+            incremental_dom_snapshots=True,  # reutilizar el DOM si la página no cambió entre pasos
+            adaptive_page_load_wait=True,  # aprender por dominio cuánto esperar a que la red quede inactiva
+            screenshot_format='jpeg',  # capturas para el modelo: JPEG reducido (menos tokens de imagen)
+            screenshot_quality=80,
+            screenshot_max_size=1024
+        )
+
+        async with pool.lease(context_config) as context:
+            agent_started.set()
+            with db_lock:
+                if task_id in test_status_db:
+                    test_status_db[task_id]['started_at'] = time.time()
+
+            async def on_step(state, model_output, step):
+                goal = model_output.current_state.next_goal if model_output else ''
+                append_output('stdout', f"DEBUG: Paso {step}: {goal}\n")
+                with db_lock:
+                    if task_id in test_status_db:
+                        test_status_db[task_id]['current_step'] = step
+                        test_status_db[task_id]['current_action'] = f"Paso {step}: {goal}"[:200]
+                if capturar_pasos:
+                    output_path = os.path.join(task_dir, f"paso_{step}.png")
+                    try:
+                        # Evidencia a resolución completa: state.screenshot va comprimido y reducido para el modelo
+                        screenshot_b64 = await context.take_screenshot()
+                        with open(output_path, 'wb') as f:
+                            f.write(base64.b64decode(screenshot_b64))
+                        registrar_captura(output_path)
+                        append_output('stdout', f"INFO: Captura del paso {step} guardada en: {output_path}\n")
+                    except Exception as e:
+                        append_output('stderr', f"Error guardando captura del paso {step}: {e}\n")
+
+            # Las capturas del historial del agente van a disco (una vez por imagen distinta) en lugar
+            # de quedar en memoria como base64 durante toda la ejecución
+            history_screenshots_dir = tempfile.mkdtemp(prefix=f"qa_pilot_history_{task_id[:8]}_")
+
+            # Se inyectan navegador y contexto para que el agente no los cierre al terminar
+            agent = Agent(
+                task=f"Navega a {url} y luego: {instrucciones}",
+                llm=llm,
+                browser=context.browser,
+                browser_context=context,
+                register_new_step_callback=on_step,
+                screenshot_store_dir=history_screenshots_dir
+            )
+            append_output('stdout', "DEBUG: Agente creado\n")
+            try:
+                history = await agent.run(max_steps=AGENT_MAX_STEPS)
+            finally:
+                # Sólo se usa el resultado final del historial; la evidencia se guarda aparte en task_dir
+                shutil.rmtree(history_screenshots_dir, ignore_errors=True)
+
+            if capturar_pasos:
+                try:
+                    page = await context.get_current_page()
+                    output_path = os.path.join(task_dir, "final.png")
+                    await page.screenshot(path=output_path)
+                    registrar_captura(output_path)
+                except Exception as e:
+                    append_output('stderr', f"Error en captura final: {e}\n")
+            return history
+
+    future = pool.submit(ejecutar)
+    with subprocess_processes_lock:
+        active_subprocess_processes[task_id] = PooledRun(future, task_id)
+
+    final_status, final_message, final_icon, return_code = 'error', 'Error desconocido', 'fa-times-circle', 1
+    try:
+        try:
+            history = future.result(timeout=max_tiempo + pool.config.acquire_timeout)
+            final_result = history.final_result() if history else None
+            append_output('stdout', f"INFO: Resultado final del agente: {final_result}\n")
+            final_status, final_icon, return_code = 'success', 'fa-check-circle', 0
+            final_message = f"Completado: {final_result}" if final_result else 'Test completado exitosamente'
+        except BrowserPoolUnavailable:
+            if not agent_started.is_set():
+                raise
+            final_message = 'El pool de navegadores dejó de estar disponible'
+        except concurrent.futures.CancelledError:
+            final_status, final_message, final_icon = 'stopped', 'Detenido por el usuario', 'fa-stop-circle'
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            final_message = f'Tiempo máximo de ejecución excedido ({max_tiempo}s)'
+            final_icon = 'fa-clock'
+        except Exception as e:
+            final_message = str(e)
+            append_output('stderr', f"ERROR: {e}\nTRACEBACK: {traceback.format_exc()}\n")
+    finally:
+        with subprocess_processes_lock:
+            active_subprocess_processes.pop(task_id, None)
+
+    task_log_store.finish(task_id)
+    final_stdout = get_task_output(task_id, 'stdout')
+    final_stderr = get_task_output(task_id, 'stderr')
+    with db_lock:
+        screenshots_found = list(test_status_db.get(task_id, {}).get('screenshots', []))
+
+    registrar_resultado_test(
+        task_id, url, instrucciones, final_status, final_message, final_icon,
+        final_stdout, final_stderr, return_code, script_path, screenshots_found,
+        browser, headless, fullscreen, screenshots, max_tiempo
+    )
+
 def run_test_background(task_id, url, instrucciones, headless, max_tiempo, screenshots, gemini_key, model_name='claude-3-5-sonnet-20240620', browser='chrome', fullscreen=True):
     """Ejecuta un test en background."""
+    if get_isolation_mode() == ISOLATION_POOL:
+        try:
+            return run_test_background_pooled(task_id, url, instrucciones, headless, max_tiempo, screenshots,
+                                              model_name=model_name, browser=browser, fullscreen=fullscreen)
+        except BrowserPoolUnavailable as e:
+            logger.warning(f"⚠️ Pool de navegadores no disponible para {task_id}, usando subproceso: {e}")
+
     script_path = None
     global test_status_db
     global test_dir
@@ -2541,6 +3044,7 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
             # Tomar captura con pyautogui
             captura = pyautogui.screenshot()
             captura.save(output_path)
+            media_index.register_screenshot(output_path)
             
             # Registrar la captura en la base de datos del test
             with db_lock:
@@ -2603,6 +3107,7 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
                             
                             if os.path.exists(screenshot_path):
                                 print(f"DEBUG: El archivo existe en: {screenshot_path}")
+                                media_index.register_screenshot(screenshot_path)
                                 # Registrar captura en la base de datos del test
                                 with db_lock:
                                     if task_id in test_status_db:
@@ -2678,40 +3183,30 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
                             human_status_update = f"Ejecutando paso {paso_num}: {paso_desc[:30]}..."
                             current_step_update = paso_num + 3  # Offset para los pasos iniciales
                
-                with db_lock:
-                    if task_id in test_status_db:
-                        # Sanitizar la línea antes de agregarla al diccionario
-                        if isinstance(decoded_line, str):
-                            sanitized_line = ''.join(c if ord(c) < 128 else '?' for c in decoded_line)
-                        else:
-                            sanitized_line = str(decoded_line)
-                        
-                        # Inicializar la clave del output si no existe
-                        if output_key not in test_status_db[task_id]:
-                            test_status_db[task_id][output_key] = ''
-                            
-                        test_status_db[task_id][output_key] += sanitized_line
+                # La línea ya viene sanitizada (ASCII) desde la decodificación
+                append_task_output(task_id, output_key, decoded_line)
+                
+                if human_status_update and human_status_update != last_human_status:
+                    with db_lock:
+                        if task_id not in test_status_db:
+                            break
+                        # Sanitizar también el status update
+                        safe_status = ''.join(c if ord(c) < 128 else '?' for c in human_status_update)
+                        test_status_db[task_id]['current_action'] = safe_status
+                        last_human_status = human_status_update
                         
-                        if human_status_update and human_status_update != last_human_status:
-                            # Sanitizar también el status update
-                            safe_status = ''.join(c if ord(c) < 128 else '?' for c in human_status_update)
-                            test_status_db[task_id]['current_action'] = safe_status
-                            last_human_status = human_status_update
-                            
-                            # Actualizar paso actual si tenemos la información
-                            if current_step_update is not None:
-                                test_status_db[task_id]['current_step'] = current_step_update
-
-                            # Comentado para evitar capturas duplicadas - las capturas se manejan en el script
-                            # if capturar_pasos and human_status_update:
-                            #     estado_nombre = re.sub(r'[^a-z0-9_\-]', '', human_status_update.lower().replace(' ', '_'))
-                            #     threading.Thread(
-                            #         target=capturar_pantalla_interna, 
-                            #         args=(f"estado_{estado_nombre}",),
-                            #         daemon=True
-                            #     ).start()
-                    else:
-                        break 
+                        # Actualizar paso actual si tenemos la información
+                        if current_step_update is not None:
+                            test_status_db[task_id]['current_step'] = current_step_update
+
+                        # Comentado para evitar capturas duplicadas - las capturas se manejan en el script
+                        # if capturar_pasos and human_status_update:
+                        #     estado_nombre = re.sub(r'[^a-z0-9_\-]', '', human_status_update.lower().replace(' ', '_'))
+                        #     threading.Thread(
+                        #         target=capturar_pantalla_interna, 
+                        #         args=(f"estado_{estado_nombre}",),
+                        #         daemon=True
+                        #     ).start()
         except ValueError:
             pass
         except Exception as e:
@@ -2735,14 +3230,13 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
         print(f"DEBUG [run_test_background]: Directorio test_screenshots creado: {test_screenshots_dir}")
 
         # Inicializar estructura en test_status_db
+        task_log_store.reset(task_id)
         with db_lock:
             if task_id not in test_status_db:
                 test_status_db[task_id] = {}
             test_status_db[task_id].update({
                 'status': 'generating',
                 'message': 'Generando script...',
-                'stdout': '',
-                'stderr': '',
                 'current_action': 'Preparando...',
                 'screenshots': [],
                 'test_dir': test_dir if capturar_pasos else None,
@@ -2765,6 +3259,7 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
         # Escribir el script con codificación UTF-8 y BOM
         with open(script_path, 'w', encoding='utf-8-sig', errors='replace') as f:
             f.write(script_content)
+        media_index.register_script(script_path)
 
         with db_lock:
             if task_id not in test_status_db:
@@ -2824,6 +3319,9 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
             with subprocess_processes_lock:
                 active_subprocess_processes[task_id] = proceso
                 logger.info(f"🔄 Proceso {proceso.pid} registrado para task_id {task_id}")
+            with db_lock:
+                if task_id in test_status_db:
+                    test_status_db[task_id]['started_at'] = time.time()
 
             # Configurar la codificación de la consola en Windows
             if platform.system() == 'Windows':
@@ -2858,9 +3356,10 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
                     test_status_db[task_id].update({
                         'status': 'error',
                         'message': str(e),
-                        'stderr': f"\nError al iniciar proceso: {str(e)}\n",
                         'icon': 'fa-exclamation-triangle'
                     })
+            append_task_output(task_id, 'stderr', f"\nError al iniciar proceso: {str(e)}\n")
+            task_log_store.finish(task_id)
             return
             
         stdout_thread = threading.Thread(target=stream_reader, args=(proceso.stdout, 'stdout'), daemon=True)
@@ -2883,15 +3382,15 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
             except:
                 pass
             return_code = -9
+            append_task_output(task_id, 'stderr', f"\nTiempo máximo excedido ({max_tiempo}s)\n")
             with db_lock:
                 if task_id in test_status_db:
-                    test_status_db[task_id]['stderr'] += f"\nTiempo máximo excedido ({max_tiempo}s)\n"
                     test_status_db[task_id]['current_action'] = "Timeout"
         except Exception as e:
             return_code = -1
+            append_task_output(task_id, 'stderr', f"\nError: {str(e)}\n")
             with db_lock:
                  if task_id in test_status_db:
-                     test_status_db[task_id]['stderr'] += f"\nError: {str(e)}\n"
                      test_status_db[task_id]['current_action'] = "Error"
             if proceso and proceso.poll() is None:
                  try: proceso.kill()
@@ -2914,13 +3413,14 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
                 except:
                     pass
 
+            task_log_store.finish(task_id)
             with db_lock:
-                if task_id in test_status_db:
-                    final_stdout = test_status_db[task_id].get('stdout', '')
-                    final_stderr = test_status_db[task_id].get('stderr', '')
-                else:
-                     final_status = 'desconocido'
-                     return
+                task_exists = task_id in test_status_db
+            if not task_exists:
+                final_status = 'desconocido'
+                return
+            final_stdout = get_task_output(task_id, 'stdout')
+            final_stderr = get_task_output(task_id, 'stderr')
 
             if timeout_ocurrido:
                  final_status = 'error'
@@ -2940,160 +3440,20 @@ def run_test_background(task_id, url, instrucciones, headless, max_tiempo, scree
                 final_message = f"Error: {error_summary[:150]}{'...' if len(error_summary) > 150 else ''}"
                 final_icon = 'fa-times-circle'
 
-            with db_lock:
-                 if task_id in test_status_db: 
-                     update_data = {
-                         'status': final_status,
-                         'message': final_message,
-                         'screenshots': screenshots_found,
-                         'icon': final_icon,
-                         'current_action': 'Finalizado',
-                         'url': url  # Añadir la URL al estado final
-                     }
-                     test_status_db[task_id].update(update_data)
-                     
-                     # Añadir el test al historial una vez completado
-                     print(f"DEBUG: Intentando añadir test {task_id} al historial. Estado actual: {final_status}")
-                     print(f"DEBUG: Historial actual tiene {len(history_db)} elementos")
-                     
-                     # Asegurar que todos los campos necesarios están presentes
-                     test_data = test_status_db[task_id].copy()
-                     if 'url' not in test_data or not test_data['url']:
-                         test_data['url'] = url
-                     
-                     add_result = add_to_history(task_id, test_data)
-                     logger.info(f"Resultado de guardar en BD: {add_result}")
-                     
-                     # ===============================================================
-                     # REGISTRO AUTOMÁTICO EN BASE DE DATOS
-                     # ===============================================================
-                     try:
-                         db_integration = get_db_integration()
-                         if db_integration and db_integration.is_connected():
-                             print(f"DEBUG: Intentando registrar test {task_id} en base de datos...")
-                             
-                             # Obtener las instrucciones originales correctamente
-                             original_instructions = test_status_db[task_id].get('original_instructions', instrucciones)
-                             print(f"DEBUG: Instrucciones originales obtenidas ({len(original_instructions)} chars): {original_instructions[:100]}...")
-                             
-                             # Crear caso de prueba en BD
-                             test_case_data = {
-                                 'nombre': f'Test {task_id[:8]} - {datetime.now().strftime("%Y%m%d_%H%M%S")}',
-                                 'codigo': f'AUTO-{task_id[:8]}',
-                                 'tipo': 'ui',
-                                 'prioridad': 'media',
-                                 'objetivo': 'Prueba ejecutada desde la interfaz web de QA-Pilot',
-                                 'pasos': original_instructions,
-                                 'resultado_esperado': 'Ejecución exitosa según las instrucciones proporcionadas',
-                                 'url_objetivo': url,
-                                 'es_valido': True,
-                                 'status': 'approved' if final_status == 'success' else 'draft',
-                                 'created_by': 'qa_pilot_web',
-                                 'instrucciones_qa_pilot': original_instructions,
-                                 'metadata_json': {
-                                     'execution_id': task_id,
-                                     'browser': browser,
-                                     'headless': headless,
-                                     'screenshots_enabled': screenshots,
-                                     'max_tiempo': max_tiempo,
-                                     'execution_timestamp': datetime.now().isoformat(),
-                                     'final_status': final_status,
-                                     'final_message': final_message
-                                 }
-                             }
-                             
-                             print(f"DEBUG: Datos del caso a guardar: {test_case_data}")
-                             case_id = db_integration.save_test_case(test_case_data)
-                             print(f"DEBUG: ✅ Caso de prueba guardado en BD con ID: {case_id}")
-                             
-                             # Crear ejecución de prueba en BD
-                             if case_id:
-                                 execution_data = {
-                                     'test_case_id': case_id,
-                                     'execution_type': 'manual',
-                                     'status': 'passed' if final_status == 'success' else 'failed',
-                                     'result_details': final_message,
-                                     'error_message': final_stderr if final_status != 'success' else None,
-                                     'url_executed': url,
-                                     'script_path': script_path if script_path else None,
-                                     'stdout_log': final_stdout,
-                                     'stderr_log': final_stderr,
-                                     'return_code': return_code,
-                                     'duration_seconds': int((time.time() - float(test_status_db[task_id].get('start_time', time.time())))),
-                                     'browser_config': {
-                                         'browser': browser,
-                                         'headless': headless,
-                                         'fullscreen': fullscreen,
-                                         'screenshots_enabled': screenshots
-                                     },
-                                     'executed_by': 'qa_pilot_web',
-                                     'metadata_json': {
-                                         'task_id': task_id,
-                                         'screenshots_count': len(test_data.get('screenshots', [])),
-                                         'execution_source': 'web_interface'
-                                     }
-                                 }
-                                 
-                                 print(f"DEBUG: Datos de ejecución a guardar: {execution_data}")
-                                 execution_id = db_integration.create_test_execution(execution_data)
-                                 print(f"DEBUG: ✅ Ejecución de prueba registrada en BD con ID: {execution_id}")
-                                 
-                                 # Registrar screenshots en BD si existen
-                                 if execution_id and test_data.get('screenshots'):
-                                     for idx, screenshot in enumerate(test_data['screenshots']):
-                                         if isinstance(screenshot, dict) and 'path' in screenshot:
-                                             screenshot_data = {
-                                                 'execution_id': execution_id,
-                                                 'test_case_id': case_id,
-                                                 'name': screenshot.get('name', f'screenshot_{idx}'),
-                                                 'description': f'Captura automática del paso {idx + 1}',
-                                                 'step_number': idx + 1,
-                                                 'screenshot_type': 'step',
-                                                 'file_path': screenshot['path'],
-                                                 'file_name': os.path.basename(screenshot['path']),
-                                                 'file_size_bytes': os.path.getsize(screenshot['path']) if os.path.exists(screenshot['path']) else 0,
-                                                 'url_captured': url,
-                                                 'timestamp_ms': int(time.time() * 1000),
-                                                 'is_valid': True,
-                                                 'metadata_json': {
-                                                     'task_id': task_id,
-                                                     'url_web': screenshot.get('url', ''),
-                                                     'capture_source': 'qa_pilot_web'
-                                                 }
-                                             }
-                                             
-                                             try:
-                                                 screenshot_id = db_integration.save_screenshot(screenshot_data)
-                                                 print(f"DEBUG: Screenshot registrado en BD con ID: {screenshot_id}")
-                                             except Exception as ss_error:
-                                                 print(f"DEBUG: Error al guardar screenshot en BD: {ss_error}")
-                                 
-                                 # Actualizar información en test_status_db
-                                 test_status_db[task_id]['db_case_id'] = str(case_id)
-                                 test_status_db[task_id]['db_execution_id'] = str(execution_id)
-                                 
-                         else:
-                             print(f"DEBUG: ❌ Base de datos no disponible o no conectada, test {task_id} solo guardado en historial")
-                             
-                     except Exception as db_error:
-                         print(f"ERROR: ❌ Error al registrar test en base de datos: {db_error}")
-                         print(f"ERROR: Traceback completo:")
-                         print(traceback.format_exc())
-                     
-                     # Guardar una copia de seguridad en disco
-                     try:
-                         persist_history_to_disk() # type: ignore
-                     except Exception as e:
-                         print(f"DEBUG: Error al persistir historial: {e}")
+            registrar_resultado_test(
+                task_id, url, instrucciones, final_status, final_message, final_icon,
+                final_stdout, final_stderr, return_code, script_path, screenshots_found,
+                browser, headless, fullscreen, screenshots, max_tiempo
+            )
 
     except Exception as e:
+        append_task_output(task_id, 'stderr', f"\nError: {str(e)}\n")
+        task_log_store.finish(task_id)
         with db_lock:
              if task_id in test_status_db:
-                current_stderr = test_status_db[task_id].get('stderr', '')
                 test_status_db[task_id].update({
                     'status': 'error',
                     'message': str(e),
-                    'stderr': current_stderr + f"\nError: {str(e)}\n",
                     'icon': 'fa-bomb',
                     'current_action': 'Error'
                 })
@@ -3228,7 +3588,7 @@ def generate_playwright_endpoint(task_id):
         return jsonify({'error': 'Test ID no encontrado'}), 404
 
     instrucciones = status_info.get('original_instructions', 'Instrucciones no disponibles') 
-    log_ejecucion = status_info.get('stdout', '') + "\n" + status_info.get('stderr', '')
+    log_ejecucion = get_task_output(task_id, 'stdout') + "\n" + get_task_output(task_id, 'stderr')
 
     print(f"DEBUG: Instrucciones para task {task_id}: {instrucciones[:100]}...")
     print(f"DEBUG: Log para task {task_id}: {log_ejecucion[:100]}...")
@@ -3440,6 +3800,7 @@ def delete_screenshots():
                 
                 if os.path.exists(screenshot_path):
                     os.remove(screenshot_path)
+                    media_index.discard_screenshot(screenshot_path)
                     deleted_count += 1
                     logger.info(f"Captura eliminada: {screenshot_path}")
                 else:
@@ -3448,6 +3809,7 @@ def delete_screenshots():
                         if screenshot_name in files:
                             full_path = os.path.join(root, screenshot_name)
                             os.remove(full_path)
+                            media_index.discard_screenshot(full_path)
                             deleted_count += 1
                             logger.info(f"Captura eliminada: {full_path}")
                             break
@@ -3507,10 +3869,12 @@ def delete_test_from_history():
             script_path = os.path.join('test_scripts', f'test_{test_id}.py')
             if os.path.exists(script_path):
                 os.remove(script_path)
+                media_index.discard_script(script_path)
                 logger.info(f"Archivo de script eliminado: {script_path}")
             screenshot_dir = os.path.join('test_screenshots', test_id)
             if os.path.exists(screenshot_dir):
                 shutil.rmtree(screenshot_dir)
+                media_index.discard_directory(screenshot_dir)
                 logger.info(f"Directorio de capturas eliminado: {screenshot_dir}")
         except Exception as e:
             logger.warning(f"Error al eliminar archivos locales: {e}")
@@ -4094,27 +4458,253 @@ def api_execute_test_suite(suite_id):
             })
         
         else:
-            # Modo ejecución real: ejecutar casos uno por uno usando run_test_background
+            # Modo ejecución real: ejecutar casos en paralelo con SuiteScheduler
             logger.info(f"🚀 Ejecutando suite {suite_id}: {len(test_cases)} casos")
             
             # Generar ID único para esta ejecución
             execution_id = str(uuid.uuid4())
+            max_parallel = get_suite_max_parallel(data.get('max_parallel'))
             
             # Función para ejecutar suite en segundo plano
             def execute_suite_real_background():
                 results_file = None
                 stop_flag = threading.Event()
+                results_lock = threading.Lock()
+                
+                def ejecutar_caso(i, case):
+                    """Ejecuta un caso de la suite y devuelve su resultado (bloqueante)"""
+                    case_task_id = f"{execution_id}_case_{i+1}"
+                    case_name = case['nombre']
+                    case_url = case['url_objetivo'] or 'https://example.com'
+                    case_instructions = case['pasos'] or 'Navegar por la página web'
+                    
+                    logger.info(f"📝 Ejecutando caso {i+1}/{len(test_cases)}: {case_name}")
+                    
+                    try:
+                        # Configuración para la ejecución
+                        case_max_tiempo = 300  # 5 minutos por caso
+                        case_screenshots = True
+                        
+                        # Obtener API key (usar cualquiera disponible)
+                        api_key = os.getenv('GEMINI_API_KEY') or os.getenv('ANTHROPIC_API_KEY') or os.getenv('OPENAI_API_KEY')
+                        if not api_key:
+                            raise Exception("No hay API keys disponibles para ejecutar el caso")
+                        
+                        # Determinar modelo basado en la API key disponible
+                        if os.getenv('ANTHROPIC_API_KEY'):
+                            model_name = 'claude-3-5-sonnet-20240620'
+                        elif os.getenv('OPENAI_API_KEY'):
+                            model_name = 'gpt-4'
+                        else:
+                            model_name = 'gemini-1.5-pro'
+                        
+                        # Ejecución secuencial: MCP con navegador visible; en paralelo, según headless
+                        modo = 'MCP - Navegador Visible' if max_parallel == 1 else f'headless={headless}'
+                        logger.info(f"🎯 Ejecutando {case_name} con URL: {case_url} ({modo})")
+                        
+                        # Inicializar estado en test_status_db
+                        with db_lock:
+                            test_status_db[case_task_id] = {
+                                'status': 'running',
+                                'start_time': datetime.now().isoformat(),
+                                'case_name': case_name,
+                                'suite_id': suite_id,  # Agregar referencia a la suite
+                                'execution_mode': 'mcp_suite'  # Marcar como ejecución de suite con MCP
+                            }
+                        
+                        # El hilo del caso activa este evento al terminar (éxito, error o excepción)
+                        case_finished = threading.Event()
+                        
+                        def run_case_thread():
+                            try:
+                                if max_parallel > 1:
+                                    # Varios casos a la vez: respetar el headless de la suite (pool de
+                                    # navegadores o subproceso) en lugar de abrir N navegadores visibles
+                                    run_test_background(case_task_id, case_url, case_instructions, headless,
+                                                        case_max_tiempo, case_screenshots, api_key, model_name,
+                                                        'chrome', True)
+                                else:
+                                    run_test_background_suite_mcp(case_task_id, case_url, case_instructions,
+                                                                  case_max_tiempo, case_screenshots, api_key, model_name, 'chrome')
+                            except Exception as run_error:
+                                with db_lock:
+                                    if case_task_id in test_status_db:
+                                        test_status_db[case_task_id]['status'] = 'error'
+                                        test_status_db[case_task_id]['message'] = str(run_error)
+                            finally:
+                                case_finished.set()
+                        
+                        execution_thread = threading.Thread(target=run_case_thread)
+                        case_start = time.time()
+                        execution_thread.start()
+                        
+                        # Esperar el fin del caso o la detención de la suite, sin sondeo
+                        max_wait_time = case_max_tiempo + 60  # Tiempo extra de gracia
+                        scheduler.wait_case(case_finished, max_wait_time)
+                        
+                        if stop_flag.is_set() and not case_finished.is_set():
+                            logger.info(f"🛑 Deteniendo caso {case_name} por solicitud del usuario")
+                            
+                            # Terminar el proceso subprocess si existe
+                            with subprocess_processes_lock:
+                                proceso = active_subprocess_processes.get(case_task_id)
+                            if proceso is not None:
+                                try:
+                                    if proceso.poll() is None:
+                                        logger.info(f"🔪 Terminando proceso subprocess PID {proceso.pid} para caso {case_name}")
+                                        proceso.terminate()
+                                        try:
+                                            proceso.wait(timeout=3)
+                                        except subprocess.TimeoutExpired:
+                                            proceso.kill()
+                                            proceso.wait(timeout=2)
+                                except Exception as e:
+                                    logger.error(f"Error terminando proceso para caso {case_name}: {e}")
+                            
+                            # Marcar caso como detenido
+                            with db_lock:
+                                if case_task_id in test_status_db:
+                                    test_status_db[case_task_id]['status'] = 'stopped'
+                                    test_status_db[case_task_id]['message'] = 'Detenido por el usuario'
+                        
+                        # Esperar que el hilo termine completamente
+                        execution_thread.join(timeout=10)
+                        wait_time = int(time.time() - case_start)
+                        
+                        # Obtener resultado final desde Flask Y MCP
+                        case_success = False
+                        case_error_msg = None
+                        case_stopped = False
+                        
+                        # Primero verificar en Flask como fallback
+                        with db_lock:
+                            if case_task_id in test_status_db:
+                                final_status = test_status_db[case_task_id]
+                                case_success = final_status.get('status') in ['success', 'completed']
+                                case_error_msg = final_status.get('error', final_status.get('message'))
+                                case_stopped = final_status.get('status') == 'stopped'
+                        
+                        # Preparar resultado del caso
+                        if case_stopped:
+                            # Caso detenido por el usuario
+                            case_result = {
+                                'case_id': str(case['id']),
+                                'case_name': case_name,
+                                'task_id': case_task_id,
+                                'status': 'stopped',
+                                'message': 'Ejecución detenida por el usuario',
+                                'url': case_url,
+                                'duration': f'Detenido después de {wait_time} segundos'
+                            }
+                            logger.info(f"🛑 Caso {case_name} detenido por el usuario")
+                        elif case_success:
+                            case_result = {
+                                'case_id': str(case['id']),
+                                'case_name': case_name,
+                                'task_id': case_task_id,
+                                'status': 'success',
+                                'message': 'Caso ejecutado correctamente',
+                                'url': case_url,
+                                'duration': f'Aproximadamente {wait_time} segundos',
+                                'screenshots': f"/media/screenshots/{case_task_id}/",
+                                'execution_mode': 'mcp_suite'  # Marcar como ejecución MCP de suite
+                            }
+                            logger.info(f"✅ Caso {case_name} ejecutado correctamente")
+                        else:
+                            # Caso falló o tuvo timeout
+                            error_message = case_error_msg or f'Timeout después de {max_wait_time} segundos'
+                            case_result = {
+                                'case_id': str(case['id']),
+                                'case_name': case_name,
+                                'task_id': case_task_id,
+                                'execution_mode': 'mcp_suite',  # Marcar como ejecución MCP de suite
+                                'status': 'failed',
+                                'message': f'Error: {error_message}',
+                                'url': case_url,
+                                'error': error_message
+                            }
+                            logger.error(f"❌ Caso {case_name} falló: {error_message}")
+                        
+                    except Exception as case_error:
+                        logger.error(f"❌ Error ejecutando caso {case_name}: {case_error}")
+                        
+                        case_result = {
+                            'case_id': str(case['id']),
+                            'case_name': case_name,
+                            'task_id': case_task_id,
+                            'status': 'failed',
+                            'message': f'Error: {str(case_error)}',
+                            'url': case_url,
+                            'error': str(case_error)
+                        }
+                    
+                    case_result['case_index'] = i
+                    return case_result
+                
+                def registrar_resultado_caso(i, case_result):
+                    """Agrega el resultado de un caso a suite_results en cuanto termina"""
+                    with results_lock:
+                        if case_result['status'] == 'success':
+                            suite_results['success_count'] += 1
+                        else:
+                            suite_results['failed_count'] += 1  # Detenidos cuentan como fallo para estadísticas
+                        suite_results['cases'].append(case_result)
+                        suite_results['completed_cases'] += 1
+                        
+                        # Actualizar archivo de progreso después de cada caso
+                        try:
+                            with open(results_file, 'w') as f:
+                                json.dump(suite_results, f, indent=2)
+                        except Exception as save_error:
+                            logger.error(f"Error guardando progreso: {save_error}")
+                        
+                        # Log de progreso
+                        completed = suite_results['completed_cases']
+                        progress = completed / len(test_cases) * 100
+                        logger.info(f"📊 Progreso de suite: {progress:.1f}% ({completed}/{len(test_cases)})")
+                        
+                        event_bus.publish(suite_topic(execution_id), 'case_result', {
+                            'case': case_result,
+                            'progress': {
+                                'total_cases': suite_results['total_cases'],
+                                'completed_cases': completed,
+                                'success_count': suite_results['success_count'],
+                                'failed_count': suite_results['failed_count']
+                            }
+                        })
+                
+                def resultado_error_caso(i, case, error):
+                    """Resultado de un caso cuya ejecución lanzó una excepción no controlada"""
+                    return {
+                        'case_id': str(case.get('id')),
+                        'case_name': case.get('nombre'),
+                        'task_id': f"{execution_id}_case_{i+1}",
+                        'status': 'error',
+                        'message': f'Error: {error}',
+                        'url': case.get('url_objetivo') or 'https://example.com',
+                        'error': str(error),
+                        'case_index': i
+                    }
+                
+                scheduler = SuiteScheduler(
+                    run_case=ejecutar_caso,
+                    get_url=lambda case: case['url_objetivo'] or 'https://example.com',
+                    max_parallel=max_parallel,
+                    stop_flag=stop_flag,
+                    error_result=resultado_error_caso
+                )
                 
                 try:
                     with app.app_context():
-                        logger.info(f"🔄 Iniciando ejecución real de suite {suite_id}")
+                        logger.info(f"🔄 Iniciando ejecución real de suite {suite_id} ({max_parallel} casos en paralelo)")
                         
                         # Registrar esta ejecución como activa
                         with suite_executions_lock:
                             active_suite_executions[execution_id] = {
                                 'thread': threading.current_thread(),
-            'suite_id': suite_id,
+                                'suite_id': suite_id,
                                 'stop_flag': stop_flag,
+                                'scheduler': scheduler,
                                 'status': 'running',
                                 'start_time': datetime.now().isoformat()
                             }
@@ -4132,6 +4722,7 @@ def api_execute_test_suite(suite_id):
                             'failed_count': 0,
                             'cases': [],
                             'status': 'running',
+                            'max_parallel': max_parallel,
                             'start_time': datetime.now().isoformat()
                         }
                         
@@ -4139,221 +4730,30 @@ def api_execute_test_suite(suite_id):
                         with open(results_file, 'w') as f:
                             json.dump(suite_results, f, indent=2)
                         
-                        # Ejecutar cada caso individualmente
-                        for i, case in enumerate(test_cases):
-                            # Verificar si se ha solicitado detener la ejecución
-                            if stop_flag.is_set():
-                                logger.info(f"🛑 Ejecución detenida por el usuario en caso {i+1}/{len(test_cases)}")
-                                suite_results['status'] = 'stopped'
-                                suite_results['end_time'] = datetime.now().isoformat()
-                                break
-                            
-                            case_task_id = f"{execution_id}_case_{i+1}"
-                            case_name = case['nombre']
-                            case_url = case['url_objetivo'] or 'https://example.com'
-                            case_instructions = case['pasos'] or 'Navegar por la página web'
-                            
-                            logger.info(f"📝 Ejecutando caso {i+1}/{len(test_cases)}: {case_name}")
-                            
-                            try:
-                                # Configuración para la ejecución
-                                case_headless = headless
-                                case_max_tiempo = 300  # 5 minutos por caso
-                                case_screenshots = True
-                                
-                                # Obtener API key (usar cualquiera disponible)
-                                api_key = os.getenv('GEMINI_API_KEY') or os.getenv('ANTHROPIC_API_KEY') or os.getenv('OPENAI_API_KEY')
-                                if not api_key:
-                                    raise Exception("No hay API keys disponibles para ejecutar el caso")
-                                
-                                # Determinar modelo basado en la API key disponible
-                                if os.getenv('ANTHROPIC_API_KEY'):
-                                    model_name = 'claude-3-5-sonnet-20240620'
-                                elif os.getenv('OPENAI_API_KEY'):
-                                    model_name = 'gpt-4'
-                                else:
-                                    model_name = 'gemini-1.5-pro'
-                                
-                                # Ejecutar el caso usando MCP (SIEMPRE con navegador visible)
-                                logger.info(f"🎯 Ejecutando {case_name} con URL: {case_url} (MCP - Navegador Visible)")
-                                
-                                # Inicializar estado en test_status_db
-                                with db_lock:
-                                    test_status_db[case_task_id] = {
-                                        'status': 'running',
-                                        'start_time': datetime.now().isoformat(),
-                                        'case_name': case_name,
-                                        'suite_id': suite_id,  # Agregar referencia a la suite
-                                        'execution_mode': 'mcp_suite'  # Marcar como ejecución de suite con MCP
-                                    }
-                                
-                                # Ejecutar caso usando MCP con navegador visible (función específica para suites)
-                                execution_thread = threading.Thread(
-                                    target=run_test_background_suite_mcp,
-                                    args=(case_task_id, case_url, case_instructions, 
-                                          case_max_tiempo, case_screenshots, api_key, model_name, 'chrome')
-                                )
-                                execution_thread.start()
-                                
-                                # Esperar a que termine la ejecución monitoreando el estado
-                                max_wait_time = case_max_tiempo + 60  # Tiempo extra de gracia
-                                wait_time = 0
-                                case_completed = False
-                                
-                                while wait_time < max_wait_time:
-                                    time.sleep(5)  # Verificar cada 5 segundos
-                                    wait_time += 5
-                                    
-                                    # Verificar si se ha solicitado detener la ejecución
-                                    if stop_flag.is_set():
-                                        logger.info(f"🛑 Deteniendo caso {case_name} por solicitud del usuario")
-                                        
-                                        # Terminar el proceso subprocess si existe
-                                        with subprocess_processes_lock:
-                                            if case_task_id in active_subprocess_processes:
-                                                proceso = active_subprocess_processes[case_task_id]
-                                                try:
-                                                    if proceso.poll() is None:
-                                                        logger.info(f"🔪 Terminando proceso subprocess PID {proceso.pid} para caso {case_name}")
-                                                        proceso.terminate()
-                                                        try:
-                                                            proceso.wait(timeout=3)
-                                                        except subprocess.TimeoutExpired:
-                                                            proceso.kill()
-                                                            proceso.wait(timeout=2)
-                                                except Exception as e:
-                                                    logger.error(f"Error terminando proceso para caso {case_name}: {e}")
-                                        
-                                        # Marcar caso como detenido
-                                        with db_lock:
-                                            if case_task_id in test_status_db:
-                                                test_status_db[case_task_id]['status'] = 'stopped'
-                                                test_status_db[case_task_id]['message'] = 'Detenido por el usuario'
-                                        case_completed = True
-                                        break
-                                    
-                                    # Verificar estado en test_status_db Y en MCP
-                                    with db_lock:
-                                        if case_task_id in test_status_db:
-                                            case_status = test_status_db[case_task_id]
-                                            if case_status.get('status') in ['success', 'error', 'completed', 'stopped']:
-                                                case_completed = True
-                                                break
-                                    
-                                    # Verificar si el hilo aún está vivo
-                                    if not execution_thread.is_alive():
-                                        case_completed = True
-                                        break
-                                    
-                                    # Verificar si el proceso subprocess ha sido terminado externamente
-                                    with subprocess_processes_lock:
-                                        if case_task_id in active_subprocess_processes:
-                                            proceso = active_subprocess_processes[case_task_id]
-                                            if proceso.poll() is not None:  # Proceso ha terminado
-                                                logger.info(f"🔍 Proceso subprocess para caso {case_name} ha terminado")
-                                                case_completed = True
-                                                break
-                                
-                                # Esperar que el hilo termine completamente
-                                execution_thread.join(timeout=10)
-                                
-                                # Obtener resultado final desde Flask Y MCP
-                                case_success = False
-                                case_error_msg = None
-                                case_stopped = False
-                                
-                                # Primero verificar en Flask como fallback
-                                with db_lock:
-                                    if case_task_id in test_status_db:
-                                        final_status = test_status_db[case_task_id]
-                                        case_success = final_status.get('status') in ['success', 'completed']
-                                        case_error_msg = final_status.get('error', final_status.get('message'))
-                                        case_stopped = final_status.get('status') == 'stopped'
-                                
-                                # Preparar resultado del caso
-                                if case_stopped:
-                                    # Caso detenido por el usuario
-                                    case_result = {
-                                        'case_id': str(case['id']),
-                                        'case_name': case_name,
-                                        'task_id': case_task_id,
-                                        'status': 'stopped',
-                                        'message': 'Ejecución detenida por el usuario',
-                                        'url': case_url,
-                                        'duration': f'Detenido después de {wait_time} segundos'
-                                    }
-                                    suite_results['failed_count'] += 1  # Contar como fallo para estadísticas
-                                    logger.info(f"🛑 Caso {case_name} detenido por el usuario")
-                                elif case_success:
-                                    case_result = {
-                                        'case_id': str(case['id']),
-                                        'case_name': case_name,
-                                        'task_id': case_task_id,
-                                        'status': 'success',
-                                        'message': 'Caso ejecutado correctamente',
-                                        'url': case_url,
-                                        'duration': f'Aproximadamente {wait_time} segundos',
-                                        'screenshots': f"/media/screenshots/{case_task_id}/",
-                                        'execution_mode': 'mcp_suite'  # Marcar como ejecución MCP de suite
-                                    }
-                                    suite_results['success_count'] += 1
-                                    logger.info(f"✅ Caso {case_name} ejecutado correctamente")
-                                else:
-                                    # Caso falló o tuvo timeout
-                                    error_message = case_error_msg or f'Timeout después de {max_wait_time} segundos'
-                                    case_result = {
-                                        'case_id': str(case['id']),
-                                        'case_name': case_name,
-                                        'task_id': case_task_id,
-                                        'execution_mode': 'mcp_suite',  # Marcar como ejecución MCP de suite
-                                        'status': 'failed',
-                                        'message': f'Error: {error_message}',
-                                        'url': case_url,
-                                        'error': error_message
-                                    }
-                                    suite_results['failed_count'] += 1
-                                    logger.error(f"❌ Caso {case_name} falló: {error_message}")
-                                
-                            except Exception as case_error:
-                                logger.error(f"❌ Error ejecutando caso {case_name}: {case_error}")
-                                
-                                case_result = {
-                                    'case_id': str(case['id']),
-                                    'case_name': case_name,
-                                    'task_id': case_task_id,
-                                    'status': 'failed',
-                                    'message': f'Error: {str(case_error)}',
-                                    'url': case_url,
-                                    'error': str(case_error)
-                                }
-                                
-                                suite_results['failed_count'] += 1
-                            
-                            # Agregar resultado del caso
-                            suite_results['cases'].append(case_result)
-                            suite_results['completed_cases'] += 1
-                            
-                            # Actualizar archivo de progreso después de cada caso
-                            try:
-                                with open(results_file, 'w') as f:
-                                    json.dump(suite_results, f, indent=2)
-                            except Exception as save_error:
-                                logger.error(f"Error guardando progreso: {save_error}")
-                            
-                            # Log de progreso
-                            progress = (i + 1) / len(test_cases) * 100
-                            logger.info(f"📊 Progreso de suite: {progress:.1f}% ({i+1}/{len(test_cases)})")
+                        # Ejecutar los casos en paralelo; cada resultado se registra al terminar
+                        completed_all = scheduler.run(test_cases, registrar_resultado_caso)
                         
                         # Finalizar ejecución
-                        suite_results['status'] = 'completed'
-                        suite_results['end_time'] = datetime.now().isoformat()
+                        with results_lock:
+                            suite_results['cases'].sort(key=lambda c: c.get('case_index', 0))
+                            suite_results['status'] = 'completed' if completed_all else 'stopped'
+                            suite_results['end_time'] = datetime.now().isoformat()
                         
+                        if not completed_all:
+                            logger.info(f"🛑 Ejecución detenida por el usuario ({suite_results['completed_cases']}/{len(test_cases)} casos)")
                         logger.info(f"🏁 Suite {suite_id} completada: {suite_results['success_count']} éxitos, {suite_results['failed_count']} fallos")
                         
                         # Guardar resultados finales
                         with open(results_file, 'w') as f:
                             json.dump(suite_results, f, indent=2)
                         
+                        event_bus.publish(suite_topic(execution_id), 'suite_finished', {
+                            'status': suite_results['status'],
+                            'success_count': suite_results['success_count'],
+                            'failed_count': suite_results['failed_count'],
+                            'end_time': suite_results['end_time']
+                        })
+                        
                         # Guardar ejecuciones en base de datos para historial
                         try:
                             save_suite_execution_to_database(execution_id, suite_id, suite_results)
@@ -4371,7 +4771,7 @@ def api_execute_test_suite(suite_id):
                             error_results = {
                                 'execution_id': execution_id,
                                 'suite_id': suite_id,
-                        'status': 'error',
+                                'status': 'error',
                                 'error': str(e),
                                 'end_time': datetime.now().isoformat()
                             }
@@ -4379,6 +4779,7 @@ def api_execute_test_suite(suite_id):
                                 json.dump(error_results, f, indent=2)
                         except:
                             pass
+                    event_bus.publish(suite_topic(execution_id), 'suite_finished', {'status': 'error', 'error': str(e)})
                 
                 finally:
                     # Limpiar registro de ejecución activa
@@ -4386,20 +4787,21 @@ def api_execute_test_suite(suite_id):
                         if execution_id in active_suite_executions:
                             del active_suite_executions[execution_id]
                             logger.info(f"🧹 Ejecución {execution_id} removida del registro de ejecuciones activas")
-        
-        # Iniciar ejecución en hilo separado
+            
+            # Iniciar ejecución en hilo separado
             execution_thread = threading.Thread(target=execute_suite_real_background)
             execution_thread.daemon = False
-        execution_thread.start()
-        
-        return jsonify({
-            'success': True,
+            execution_thread.start()
+            
+            return jsonify({
+                'success': True,
                 'status': 'started',
                 'execution_id': execution_id,
                 'total_cases': len(test_cases),
-                'message': f'Ejecución real iniciada con {len(test_cases)} casos. Los casos se ejecutarán uno por uno.',
-                'note': 'Esta es una ejecución real que puede tomar varios minutos. Los casos se ejecutan secuencialmente.'
-        })
+                'max_parallel': max_parallel,
+                'message': f'Ejecución real iniciada con {len(test_cases)} casos ({max_parallel} en paralelo).',
+                'note': 'Esta es una ejecución real que puede tomar varios minutos. Los resultados se registran a medida que cada caso termina.'
+            })
         
     except Exception as e:
         logger.error(f"❌ Error en api_execute_test_suite: {e}")
@@ -4427,9 +4829,12 @@ def api_stop_suite_execution(suite_id):
             for execution_id, execution_data in executions_to_stop:
                 logger.info(f"🛑 Deteniendo ejecución {execution_id}")
                 
-                # Activar flag de detener
+                # Activar flag de detener (el scheduler además despierta a los casos en espera)
+                scheduler = execution_data.get('scheduler')
                 stop_flag = execution_data.get('stop_flag')
-                if stop_flag:
+                if scheduler:
+                    scheduler.stop()
+                elif stop_flag:
                     stop_flag.set()
                 
                 # Marcar como detenida
@@ -4545,7 +4950,7 @@ def save_suite_execution_to_database(execution_id, suite_id, suite_results):
     """Actualiza las ejecuciones existentes con metadatos de suite (no duplica casos)."""
     try:
         db_integration = get_db_integration()
-        if not db_integration or not db_integration.test_connection():
+        if not db_integration or not db_integration.is_connected():
             logger.warning("Base de datos no disponible para guardar metadatos de suite")
             return
         
@@ -4629,31 +5034,162 @@ class HistoryService:
     def __init__(self, db_integration):
         self.db_integration = db_integration
     
-    def get_history_items(self, limit=100):
-        """Obtener items del historial desde la base de datos."""
+    # Estados de BD que la vista de historial muestra como 'success'
+    SUCCESS_STATUSES = ('passed', 'completed')
+
+    @staticmethod
+    def encode_cursor(created_at, execution_id):
+        """Cursor de paginación keyset: '<created_at ISO>|<id>'"""
+        return f"{created_at.isoformat()}|{execution_id}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Devuelve (created_at, id) de un cursor, o None si no es válido"""
+        import uuid
+        try:
+            created_at, execution_id = cursor.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), uuid.UUID(execution_id)
+        except (AttributeError, ValueError):
+            return None
+
+    @staticmethod
+    def _case_summary(test_case):
+        """Datos del caso de BD asociado a un item del historial (o None)"""
+        if test_case is None:
+            return None
+        return {
+            'id': str(test_case.id),
+            'nombre': test_case.nombre,
+            'codigo': test_case.codigo,
+            'suite_id': str(test_case.suite_id) if test_case.suite_id else None,
+            'status': test_case.status or 'draft'
+        }
+
+    def get_history_items(self, limit=100, **filters):
+        """Obtener items del historial desde la base de datos (primera página)."""
+        return self.get_history_page(limit=limit, **filters)['items']
+
+    def get_history_item(self, execution_id):
+        """Obtener un único item del historial por ID de ejecución, o None."""
+        import uuid
+        try:
+            execution_id = uuid.UUID(str(execution_id))
+        except ValueError:
+            return None
+        items = self.get_history_page(limit=1, execution_id=execution_id)['items']
+        return items[0] if items else None
+
+    def get_history_page(self, limit=100, before=None, status=None, date_from=None, date_to=None,
+                         test_case_id=None, execution_id=None):
+        """
+        Obtener una página del historial con una única consulta con carga anticipada.
+
+        Los casos se cargan con joinedload y las capturas con selectinload (una consulta
+        adicional para toda la página), en lugar de una consulta por ejecución.
+
+        Args:
+            limit: tamaño de página
+            before: cursor devuelto en 'next_cursor' de la página anterior (keyset sobre
+                created_at, id; no usa OFFSET)
+            status: 'success' / 'error' (estado mostrado) o un estado de BD ('passed', 'failed', ...)
+            date_from / date_to: datetime o fecha ISO; filtra por created_at (una fecha sin
+                hora en date_to incluye todo ese día)
+            test_case_id: sólo ejecuciones de este caso
+            execution_id: sólo esta ejecución
+
+        Returns:
+            {'items': [...], 'next_cursor': str|None}
+        """
+        empty_page = {'items': [], 'next_cursor': None}
+        if test_case_id:
+            # Un id que no es UUID no coincide con ningún caso (y la consulta fallaría en la BD)
+            try:
+                test_case_id = uuid.UUID(str(test_case_id))
+            except ValueError:
+                return empty_page
         try:
             if not self.db_integration or not self.db_integration.is_connected():
                 logger.warning("Base de datos no disponible, retornando historial vacío")
-                return []
+                return empty_page
             
             with self.db_integration.get_session() as session:
-                from db_models import TestExecution, TestCase, Screenshot
-                from sqlalchemy import desc
+                from db_models import TestExecution, TestCase
+                from sqlalchemy import and_, or_
+                from sqlalchemy.orm import joinedload, selectinload, defer, load_only
+                
+                query = session.query(TestExecution).options(
+                    joinedload(TestExecution.test_case).load_only(
+                        TestCase.id, TestCase.nombre, TestCase.codigo, TestCase.suite_id,
+                        TestCase.status, TestCase.url_objetivo, TestCase.pasos
+                    ),
+                    selectinload(TestExecution.screenshots),
+                    # Los logs completos no se muestran en el historial
+                    defer(TestExecution.stdout_log),
+                    defer(TestExecution.stderr_log),
+                    defer(TestExecution.stack_trace),
+                )
                 
-                # Obtener ejecuciones recientes con sus casos de prueba
-                executions = session.query(TestExecution).join(
-                    TestCase, TestExecution.test_case_id == TestCase.id, isouter=True
-                ).order_by(desc(TestExecution.created_at)).limit(limit).all()
+                if status == 'success':
+                    query = query.filter(TestExecution.status.in_(self.SUCCESS_STATUSES))
+                elif status == 'error':
+                    query = query.filter(TestExecution.status.notin_(self.SUCCESS_STATUSES))
+                elif status:
+                    query = query.filter(TestExecution.status == status)
+                
+                if date_from:
+                    if isinstance(date_from, str):
+                        date_from = datetime.fromisoformat(date_from)
+                    query = query.filter(TestExecution.created_at >= date_from)
+                if date_to:
+                    if isinstance(date_to, str):
+                        try:
+                            date_to = date.fromisoformat(date_to)
+                        except ValueError:
+                            date_to = datetime.fromisoformat(date_to)
+                    if isinstance(date_to, datetime):
+                        query = query.filter(TestExecution.created_at <= date_to)
+                    else:
+                        # Fecha sin hora: incluye todo ese día
+                        query = query.filter(TestExecution.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+                
+                if test_case_id:
+                    query = query.filter(TestExecution.test_case_id == test_case_id)
+                if execution_id:
+                    query = query.filter(TestExecution.id == execution_id)
+                
+                if before:
+                    position = self.decode_cursor(before)
+                    if position:
+                        before_created_at, before_id = position
+                        query = query.filter(or_(
+                            TestExecution.created_at < before_created_at,
+                            and_(TestExecution.created_at == before_created_at, TestExecution.id < before_id)
+                        ))
+                
+                # Se pide una fila extra para saber si hay más páginas
+                executions = query.order_by(
+                    TestExecution.created_at.desc(), TestExecution.id.desc()
+                ).limit(limit + 1).all()
+                
+                has_more = len(executions) > limit
+                executions = executions[:limit]
+                
+                # Casos guardados desde el historial: no quedan ligados por FK (la ejecución
+                # apunta a su caso AUTO) sino por su código 'TC_<prefijo del id>' (columna única
+                # e indexada); se buscan para toda la página en una sola consulta
+                cases_by_code = {}
+                saved_codes = [f'TC_{str(e.id)[:8]}' for e in executions]
+                if saved_codes:
+                    cases_by_code = {
+                        case.codigo: case for case in session.query(TestCase).options(
+                            load_only(TestCase.id, TestCase.nombre, TestCase.codigo, TestCase.suite_id, TestCase.status)
+                        ).filter(TestCase.codigo.in_(saved_codes)).all()
+                    }
                 
                 history_items = []
                 for execution in executions:
-                    # Obtener screenshots para esta ejecución
-                    screenshots = session.query(Screenshot).filter_by(
-                        execution_id=execution.id
-                    ).all()
-                    
                     screenshot_list = []
-                    for screenshot in screenshots:
+                    for screenshot in execution.screenshots:
                         # Construir URL relativa para las capturas
                         relative_path = os.path.relpath(screenshot.file_path, SCREENSHOTS_DIR) if screenshot.file_path else None
                         screenshot_url = f'/media/screenshots/{relative_path}' if relative_path else None
@@ -4664,30 +5200,39 @@ class HistoryService:
                             'name': screenshot.name
                         })
                     
+                    test_case = execution.test_case
+                    associated_case = cases_by_code.get(f'TC_{str(execution.id)[:8]}') or test_case
+                    
                     # Crear item del historial
                     history_item = {
                         'id': str(execution.id),
-                        'name': execution.test_case.nombre if execution.test_case else f'Test {str(execution.id)[:8]}',
+                        'name': test_case.nombre if test_case else f'Test {str(execution.id)[:8]}',
                         'date': execution.created_at.strftime('%Y-%m-%d %H:%M:%S') if execution.created_at else '',
                         'date_timestamp': execution.created_at.timestamp() if execution.created_at else 0,
-                        'status': 'success' if execution.status in ['passed', 'completed'] else 'error',
-                        'url': execution.url_executed or (execution.test_case.url_objetivo if execution.test_case else ''),
-                        'instructions': execution.test_case.pasos if execution.test_case else '',
+                        'status': 'success' if execution.status in self.SUCCESS_STATUSES else 'error',
+                        'url': execution.url_executed or (test_case.url_objetivo if test_case else ''),
+                        'instructions': test_case.pasos if test_case else '',
                         'message': execution.result_details or f'Ejecución {execution.status}',
                         'screenshots': screenshot_list,
                         'test_dir': os.path.dirname(screenshot_list[0]['path']) if screenshot_list else None,
-                        'script_path': execution.script_path if execution.script_path and os.path.exists(execution.script_path) else None,
-                        'playwright_case': None  # TODO: agregar lógica para detectar casos Playwright
+                        # La existencia del script se verifica al usarlo, no por cada fila listada
+                        'script_path': execution.script_path or None,
+                        'playwright_case': None,  # TODO: agregar lógica para detectar casos Playwright
+                        'db_case': self._case_summary(associated_case)
                     }
                     
                     history_items.append(history_item)
                 
+                next_cursor = None
+                if has_more and executions and executions[-1].created_at:
+                    next_cursor = self.encode_cursor(executions[-1].created_at, executions[-1].id)
+                
                 logger.info(f"Cargados {len(history_items)} items del historial desde BD")
-                return history_items
+                return {'items': history_items, 'next_cursor': next_cursor}
                 
         except Exception as e:
             logger.error(f"Error cargando historial desde BD: {e}")
-            return []
+            return empty_page
     
     def update_test_name(self, test_id, new_name):
         """Actualizar el nombre de un test directamente en la base de datos."""
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la validación de filas de ExcelTestAnalyzer contra la implementación anterior fila a fila.
+
+Uso:
+    python benchmark_excel_analyzer.py [archivo.xlsx ...] [--rows N]
+
+Sin archivos se genera una planilla sintética de 10.000 filas (estructura URL + Paso a Paso,
+con IDs vacíos, URLs en la columna de destino o dentro de los pasos y filas de metadatos).
+Cada caso comprueba que ambas implementaciones producen exactamente los mismos TestCase antes
+de medir tres etapas:
+    - filas -> TestCase: validación de filas, conversión a texto y extracción de URL (fila a fila)
+    - validación básica: _enhanced_basic_validation (incluye generar instrucciones QA-Pilot)
+    - archivo completo: extract_test_cases + validación básica
+
+La salida por consola del analizador se descarta durante las mediciones.
+"""
+
+import os
+import re
+import sys
+import copy
+import time
+import random
+import tempfile
+import contextlib
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from excel_test_analyzer import (
+    ExcelTestAnalyzer, TestCase, HEADER_SCAN_ROWS, _column_names, _is_empty, _iter_sheet_rows,
+)
+
+
+class LegacyExcelTestAnalyzer(ExcelTestAnalyzer):
+    """Implementación anterior: cada fila y cada caso se procesan por separado en Python"""
+
+    def _rows_to_test_cases(self, columns, rows, column_mapping, case_counter):
+        test_cases = []
+        for values in rows:
+            row = dict(zip(columns, values))
+            for i in range(len(columns), len(values)):
+                row[f"Unnamed: {i}"] = values[i]
+            if self._is_valid_row(row):
+                test_case = self._create_test_case(row, column_mapping, case_counter + len(test_cases))
+                if test_case:
+                    test_cases.append(test_case)
+        return test_cases
+
+    def _is_valid_row(self, row: Dict[str, Any]) -> bool:
+        non_null_values = [val for val in row.values() if not _is_empty(val)]
+        if len(non_null_values) < 2:
+            return False
+        row_text = ' '.join([str(val) for val in non_null_values]).lower()
+        exclude_patterns = ['documento', 'analista', 'proyecto', 'fecha', 'version']
+        if any(pattern in row_text for pattern in exclude_patterns):
+            return False
+        return True
+
+    def _create_test_case(self, row: Dict[str, Any], column_mapping: Dict[str, str], case_counter: int) -> Optional[TestCase]:
+        def get_value(field: str) -> str:
+            if field in column_mapping and column_mapping[field] in row:
+                val = row[column_mapping[field]]
+                return "" if _is_empty(val) else str(val)
+            return ""
+
+        case_id = get_value('id')
+        if not case_id or case_id.lower() in ['nan', 'none', '']:
+            case_id = f"CP-{case_counter:03d}"
+        pasos = get_value('pasos')
+        datos_prueba = get_value('datos_prueba')
+        url_destino = get_value('url_destino')
+        if url_destino and url_destino.strip():
+            url_extraida = url_destino.strip()
+        else:
+            url_extraida = self._extract_url(pasos + " " + datos_prueba)
+        return TestCase(
+            id=case_id,
+            nombre=get_value('nombre'),
+            historia_usuario=get_value('historia_usuario'),
+            objetivo=get_value('objetivo'),
+            precondicion=get_value('precondicion'),
+            pasos=pasos,
+            datos_prueba=datos_prueba,
+            resultado_esperado=get_value('resultado_esperado'),
+            url_extraida=url_extraida
+        )
+
+    def _extract_url(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+        url_patterns = [
+            r'https?://[^\s]+',
+            r'www\.[^\s]+',
+            r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}[^\s]*'
+        ]
+        for pattern in url_patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            if matches:
+                url = matches[0].rstrip('.,;)')
+                try:
+                    parsed = urlparse(url if url.startswith('http') else f'https://{url}')
+                    if parsed.netloc:
+                        return url if url.startswith('http') else f'https://{url}'
+                except ValueError:
+                    continue
+        return None
+
+    def _enhanced_basic_validation(self, test_cases: List[TestCase]) -> List[TestCase]:
+        for test_case in test_cases:
+            if self._is_template_internal_case(test_case):
+                if test_case.nombre.strip() and test_case.pasos.strip():
+                    test_case.es_valido = True
+                    test_case.problemas = []
+                    test_case.sugerencias = ["🔄 Caso del Template.xlsx convertido automáticamente para web"]
+                    test_case.instrucciones_qa_pilot = self._generate_qa_pilot_instructions(test_case)
+                    continue
+            problemas = []
+            sugerencias = []
+            if test_case.url_extraida and test_case.pasos and len(test_case.pasos.strip()) > 10:
+                test_case.es_valido = True
+                sugerencias.append("✅ Estructura URL + Paso a Paso completa - Listo para ejecución")
+            elif test_case.pasos and len(test_case.pasos.strip()) > 20:
+                test_case.es_valido = True
+                sugerencias.append("✅ Pasos detallados detectados - Ejecutable")
+            else:
+                test_case.es_valido = False
+                if not test_case.url_extraida:
+                    problemas.append("No se detectó URL de destino")
+                if not test_case.pasos or len(test_case.pasos.strip()) < 10:
+                    problemas.append("Faltan pasos de ejecución detallados")
+            if test_case.es_valido:
+                if test_case.url_extraida:
+                    sugerencias.append("🎯 URL detectada desde columna de destino")
+                automation_keywords = ['localizar', 'hacer clic', 'escribir', 'presionar', 'verificar']
+                pasos_lower = test_case.pasos.lower()
+                keyword_count = sum(1 for keyword in automation_keywords if keyword in pasos_lower)
+                if keyword_count >= 3:
+                    sugerencias.append("🔧 Pasos bien estructurados para automatización")
+                elif keyword_count >= 1:
+                    sugerencias.append("📝 Pasos con buena base para automatización")
+                sugerencias.append("🚀 Optimizado para ejecución con browser-use")
+                test_case.instrucciones_qa_pilot = self._generate_qa_pilot_instructions(test_case)
+            else:
+                sugerencias.append("🔧 Completar información esencial para habilitar ejecución")
+            test_case.problemas = problemas
+            test_case.sugerencias = sugerencias
+        return test_cases
+
+    def _make_instruction_executable(self, instruction: str) -> str:
+        instruction = instruction.strip()
+        improvements = {
+            r'buscar (.+)': r'localizar la barra de búsqueda y escribir "\1", luego presionar Enter',
+            r'escribir (.+) en (.+)': r'localizar el campo "\2" y escribir "\1"',
+            r'ingresar (.+)': r'escribir "\1" en el campo correspondiente',
+            r'hacer clic en (.+)': r'localizar y hacer clic en el elemento "\1"',
+            r'presionar (.+)': r'localizar y hacer clic en el botón "\1"',
+            r'seleccionar (.+)': r'localizar y seleccionar la opción "\1"',
+            r'ir a (.+)': r'navegar hacia la sección "\1"',
+            r'verificar (.+)': r'comprobar que "\1" esté visible en la página',
+            r'revisar (.+)': r'verificar que "\1" se muestre correctamente',
+            r'filtrar por (.+)': r'localizar los filtros y seleccionar "\1"',
+            r'expandir (.+)': r'hacer clic para expandir la sección "\1"'
+        }
+        for pattern, replacement in improvements.items():
+            instruction = re.sub(pattern, replacement, instruction, flags=re.IGNORECASE)
+        if any(word in instruction.lower() for word in ['localizar', 'buscar', 'encontrar']):
+            instruction += ', esperando a que el elemento esté visible'
+        return instruction
+
+
+STEPS = [
+    'Realiza login con Usuario: qa@empresa.cl y Contraseña: 123456\nHaz clic en el ícono lateral Reportes\nPresiona cerrar sesión',
+    '1. Ir a www.tienda.cl/ofertas\n2. Buscar notebook\n3. Filtrar por precio\n4. Verificar resultados',
+    'Localizar el campo RUT y escribir 12345678-9; hacer clic en Consultar y verificar el estado',
+    'Seleccionar la categoría Hogar, expandir Detalles y revisar el stock disponible',
+    'abrir',
+]
+
+
+def build_workbook(path: str, rows: int = 10000, seed: int = 1):
+    """Planilla sintética con estructura URL + Paso a Paso"""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Proyecto QA - Documento de casos'])
+    sheet.append([])
+    sheet.append(['Nº CP', 'URL', 'Nombre CP', 'Objetivo', 'Paso a Paso', 'Datos de prueba', 'Resultado esperado'])
+    for i in range(rows):
+        sheet.append([
+            f'CP-{i}' if rng.random() < 0.8 else None,
+            f'https://app{i % 7}.empresa.cl/modulo' if rng.random() < 0.5 else None,
+            f'Caso {i}',
+            rng.choice(['Validar login', 'Validar búsqueda de productos', 'Validar navegación', None]),
+            rng.choice(STEPS) + f' {i % 50}',
+            rng.choice([None, 'usuario: qa', 'ver https://datos.empresa.cl/x', 'monto 1000']),
+            rng.choice(['OK', 'Se muestra el listado', None]),
+        ])
+        if rng.random() < 0.01:
+            sheet.append(['Analista: Juan Pérez', 'Fecha: 2024-01-01'])
+    workbook.save(path)
+
+
+def read_rows(path: str):
+    """Filas de datos, nombres de columna y mapeo de la primera hoja (fuera de las mediciones)"""
+    analyzer = ExcelTestAnalyzer()
+    sheets = _iter_sheet_rows(path)  # el libro se cierra al terminar el generador
+    _, rows = next(sheets)
+    rows = list(rows)
+    sheets.close()
+    header_row, _ = analyzer.detect_headers(pd.DataFrame(rows[:HEADER_SCAN_ROWS]))
+    columns = _column_names(rows[header_row])
+    return columns, rows[header_row + 1:], analyzer._map_columns(columns)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _time_on_copies(fn, cases: List[TestCase], repeat: int) -> float:
+    """Como _time, pero cada repetición recibe su propia copia de los casos (la validación los modifica)"""
+    best = float('inf')
+    for _ in range(repeat):
+        copies = copy.deepcopy(cases)
+        start = time.perf_counter()
+        fn(copies)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(stage: str, legacy: float, current: float):
+    print(f'  {stage:<22} anterior {legacy * 1000:9.1f} ms   actual {current * 1000:9.1f} ms   x{legacy / current:5.1f}')
+
+
+def run_case(name: str, path: str, repeat: int = 3):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        legacy, current = LegacyExcelTestAnalyzer(), ExcelTestAnalyzer()
+        columns, rows, mapping = read_rows(path)
+
+        def convert(analyzer):
+            return [tc for start in range(0, len(rows), 2000)
+                    for tc in analyzer._rows_to_test_cases(columns, rows[start:start + 2000], mapping, start + 1)]
+
+        expected, actual = convert(legacy), convert(current)
+        assert [asdict(tc) for tc in actual] == [asdict(tc) for tc in expected], f'{name}: filas -> TestCase difiere'
+        legacy._enhanced_basic_validation(expected)
+        current._enhanced_basic_validation(actual)
+        assert [asdict(tc) for tc in actual] == [asdict(tc) for tc in expected], f'{name}: validación básica difiere'
+        cases = convert(current)
+
+        timings = [
+            ('filas -> TestCase', _time(lambda: convert(legacy), repeat), _time(lambda: convert(current), repeat)),
+            ('validación básica',
+             _time_on_copies(legacy._enhanced_basic_validation, cases, repeat),
+             _time_on_copies(current._enhanced_basic_validation, cases, repeat)),
+            ('archivo completo',
+             _time(lambda: legacy._enhanced_basic_validation(legacy.extract_test_cases(path)), 1),
+             _time(lambda: current._enhanced_basic_validation(current.extract_test_cases(path)), 1)),
+        ]
+
+    print(f'{name} ({len(rows)} filas, {len(cases)} casos)')
+    for stage, legacy_time, current_time in timings:
+        _report(stage, legacy_time, current_time)
+
+
+def main(argv: List[str]):
+    rows = 10000
+    if '--rows' in argv:
+        index = argv.index('--rows')
+        rows = int(argv[index + 1])
+        argv = argv[:index] + argv[index + 2:]
+    if argv:
+        for path in argv:
+            run_case(path, path)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sintetico.xlsx')
+        build_workbook(path, rows)
+        run_case(f'sintético ({rows} filas)', path)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-import base64
 import io
 import logging
 import os
 import platform
-from typing import TYPE_CHECKING, Optional
+import shutil
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 from browser_use.agent.views import (
 	AgentHistoryList,
@@ -16,6 +20,11 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+VIDEO_CODECS = {
+	'.mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-tune', 'stillimage'],
+	'.webm': ['-c:v', 'libvpx-vp9', '-pix_fmt', 'yuv420p', '-b:v', '0', '-crf', '40'],
+}
+
 
 def create_history_gif(
 	task: str,
@@ -31,48 +40,36 @@ def create_history_gif(
 	goal_font_size: int = 44,
 	margin: int = 40,
 	line_spacing: float = 1.5,
+	workers: int | None = None,
 ) -> None:
-	"""Create a GIF from the agent's history with overlaid task and goal text."""
+	"""
+	Create a GIF from the agent's history with overlaid task and goal text.
+
+	Frames are decoded, overlaid and encoded one at a time (a few in flight across `workers` threads),
+	so memory does not grow with the number of steps. GIF frames share one palette and only the region
+	that changed since the previous frame is written; identical frames extend the previous one.
+	An output_path ending in .mp4 or .webm is encoded with a local ffmpeg instead.
+	"""
 	if not history.history:
 		logger.warning('No history to create GIF from')
 		return
 
-	from PIL import Image, ImageFont
-
-	images = []
+	from PIL import Image
 
 	# if history is empty or first screenshot is None, we can't create a gif
-	if not history.history or not history.history[0].state.screenshot:
+	first_screenshot = history.history[0].state.get_screenshot_bytes() if history.history else None
+	if not first_screenshot:
 		logger.warning('No history or first screenshot to create GIF from')
 		return
 
-	# Try to load nicer fonts
-	try:
-		# Try different font options in order of preference
-		font_options = ['Helvetica', 'Arial', 'DejaVuSans', 'Verdana']
-		font_loaded = False
-
-		for font_name in font_options:
-			try:
-				if platform.system() == 'Windows':
-					# Need to specify the abs font path on Windows
-					font_name = os.path.join(os.getenv('WIN_FONT_DIR', 'C:\\Windows\\Fonts'), font_name + '.ttf')
-				regular_font = ImageFont.truetype(font_name, font_size)
-				title_font = ImageFont.truetype(font_name, title_font_size)
-				goal_font = ImageFont.truetype(font_name, goal_font_size)
-				font_loaded = True
-				break
-			except OSError:
-				continue
-
-		if not font_loaded:
-			raise OSError('No preferred fonts found')
+	# FreeType faces are not safe to share between threads: each worker loads its own fonts
+	thread_fonts = threading.local()
 
-	except OSError:
-		regular_font = ImageFont.load_default()
-		title_font = ImageFont.load_default()
-
-		goal_font = regular_font
+	def get_fonts() -> tuple['ImageFont.FreeTypeFont', 'ImageFont.FreeTypeFont']:
+		if not hasattr(thread_fonts, 'fonts'):
+			thread_fonts.fonts = _load_fonts(font_size, title_font_size, goal_font_size)
+		regular_font, title_font, _ = thread_fonts.fonts
+		return regular_font, title_font
 
 	# Load logo if requested
 	logo = None
@@ -87,58 +84,281 @@ def create_history_gif(
 		except Exception as e:
 			logger.warning(f'Could not load logo: {e}')
 
-	# Create task frame if requested
-	if show_task and task:
-		task_frame = _create_task_frame(
+	canvas_size = Image.open(io.BytesIO(first_screenshot)).size
+
+	def render_task_frame() -> 'Image.Image':
+		regular_font, title_font = get_fonts()
+		return _create_task_frame(
 			task,
-			history.history[0].state.screenshot,
+			first_screenshot,
 			title_font,  # type: ignore
 			regular_font,  # type: ignore
 			logo,
 			line_spacing,
 		)
-		images.append(task_frame)
 
-	# Process each history item
-	for i, item in enumerate(history.history, 1):
-		if not item.state.screenshot:
-			continue
+	def render_step_frame(step_number: int, item) -> Optional['Image.Image']:
+		# Screenshots written to a ScreenshotStore are read from disk one at a time
+		img_data = item.state.get_screenshot_bytes()
+		if not img_data:
+			return None
 
-		# Convert base64 screenshot to PIL Image
-		img_data = base64.b64decode(item.state.screenshot)
 		image = Image.open(io.BytesIO(img_data))
 
 		if show_goals and item.model_output:
+			regular_font, title_font = get_fonts()
 			image = _add_overlay_to_image(
 				image=image,
-				step_number=i,
+				step_number=step_number,
 				goal_text=item.model_output.current_state.next_goal,
 				regular_font=regular_font,  # type: ignore
 				title_font=title_font,  # type: ignore
 				margin=margin,
 				logo=logo,
 			)
+		return image
 
-		images.append(image)
-
-	if images:
-		# Save the GIF
-		images[0].save(
-			output_path,
-			save_all=True,
-			append_images=images[1:],
-			duration=duration,
-			loop=0,
-			optimize=False,
-		)
-		logger.info(f'Created GIF at {output_path}')
+	jobs: list[Callable[[], Optional['Image.Image']]] = []
+	if show_task and task:
+		jobs.append(render_task_frame)
+	for i, item in enumerate(history.history, 1):
+		jobs.append(lambda i=i, item=item: render_step_frame(i, item))
+
+	extension = os.path.splitext(output_path)[1].lower()
+	if extension in VIDEO_CODECS and not shutil.which('ffmpeg'):
+		output_path = os.path.splitext(output_path)[0] + '.gif'
+		logger.warning(f'ffmpeg not found, writing GIF to {output_path} instead of {extension}')
+		extension = '.gif'
+
+	if extension in VIDEO_CODECS:
+		writer = _VideoStreamWriter(output_path, canvas_size, duration, VIDEO_CODECS[extension])
+	else:
+		writer = _GifStreamWriter(output_path, canvas_size, _build_shared_palette(history, canvas_size))
+
+	frames = 0
+	try:
+		for prepared in _render_in_order(jobs, writer.prepare, workers or min(4, os.cpu_count() or 1)):
+			if prepared is not None:
+				writer.write(prepared, duration)
+				frames += 1
+	finally:
+		writer.close()
+
+	if frames:
+		logger.info(f'Created {"video" if extension in VIDEO_CODECS else "GIF"} at {output_path}')
 	else:
+		if os.path.exists(output_path):
+			os.remove(output_path)
 		logger.warning('No images found in history to create GIF')
 
 
+def _load_fonts(font_size: int, title_font_size: int, goal_font_size: int) -> tuple[Any, Any, Any]:
+	"""Regular, title and goal fonts, falling back to PIL's default font"""
+	from PIL import ImageFont
+
+	# Try to load nicer fonts
+	try:
+		# Try different font options in order of preference
+		font_options = ['Helvetica', 'Arial', 'DejaVuSans', 'Verdana']
+
+		for font_name in font_options:
+			try:
+				if platform.system() == 'Windows':
+					# Need to specify the abs font path on Windows
+					font_name = os.path.join(os.getenv('WIN_FONT_DIR', 'C:\\Windows\\Fonts'), font_name + '.ttf')
+				regular_font = ImageFont.truetype(font_name, font_size)
+				title_font = ImageFont.truetype(font_name, title_font_size)
+				goal_font = ImageFont.truetype(font_name, goal_font_size)
+				return regular_font, title_font, goal_font
+			except OSError:
+				continue
+
+		raise OSError('No preferred fonts found')
+
+	except OSError:
+		regular_font = ImageFont.load_default()
+		title_font = ImageFont.load_default()
+
+		return regular_font, title_font, regular_font
+
+
+def _render_in_order(jobs: list[Callable], prepare: Callable, workers: int):
+	"""
+	Runs render jobs (followed by `prepare`) on a thread pool and yields the results in job order,
+	keeping at most 2 * workers frames in flight
+	"""
+
+	def run(job):
+		image = job()
+		return prepare(image) if image is not None else None
+
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gif-frame') as executor:
+		pending = deque()
+		for job in jobs:
+			pending.append(executor.submit(run, job))
+			if len(pending) >= 2 * workers:
+				yield pending.popleft().result()
+		while pending:
+			yield pending.popleft().result()
+
+
+def _fit_to_canvas(image: 'Image.Image', canvas_size: tuple[int, int]) -> 'Image.Image':
+	from PIL import Image
+
+	image = image.convert('RGB')
+	if image.size != canvas_size:
+		image = image.resize(canvas_size, Image.Resampling.LANCZOS)
+	return image
+
+
+def _build_shared_palette(history: AgentHistoryList, canvas_size: tuple[int, int], samples: int = 16) -> 'Image.Image':
+	"""
+	256 color palette for the whole GIF, quantized from thumbnails of up to `samples` screenshots spread
+	over the history, plus black and white for the overlays and the task frame
+	"""
+	from PIL import Image
+
+	items = [item for item in history.history if item.state.screenshot or item.state.screenshot_path]
+	step = max(1, len(items) // samples)
+	thumb_size = (max(1, canvas_size[0] // 4), max(1, canvas_size[1] // 4))
+	sampled = items[::step][:samples]
+
+	mosaic = Image.new('RGB', (thumb_size[0] * len(sampled) + 2, thumb_size[1]), (0, 0, 0))
+	mosaic.paste((255, 255, 255), (thumb_size[0] * len(sampled) + 1, 0, mosaic.width, mosaic.height))
+	for i, item in enumerate(sampled):
+		img_data = item.state.get_screenshot_bytes()
+		if not img_data:
+			continue
+		thumbnail = Image.open(io.BytesIO(img_data))
+		thumbnail.draft('RGB', thumb_size)  # let JPEG decode at reduced size
+		mosaic.paste(thumbnail.convert('RGB').resize(thumb_size, Image.Resampling.BILINEAR), (i * thumb_size[0], 0))
+	return mosaic.quantize(colors=256)
+
+
+class _GifStreamWriter:
+	"""
+	Writes GIF frames to disk as they arrive.
+
+	All frames are mapped to one global palette. Each frame is compared with the previous one: only
+	the bounding box of the change is written (disposal 'do not dispose'), and an unchanged frame
+	just extends the previous frame's duration, which is why one frame is held back.
+	"""
+
+	def __init__(self, output_path: str, canvas_size: tuple[int, int], palette: 'Image.Image', loop: int = 0):
+		self.output_path = output_path
+		self.canvas_size = canvas_size
+		self.palette = palette
+		self.loop = loop
+		self._file = None
+		self._previous: Optional['Image.Image'] = None  # last full frame, palette indices
+		self._pending: Optional[tuple['Image.Image', tuple[int, int], int]] = None  # (image, offset, duration)
+
+	def prepare(self, image: 'Image.Image') -> 'Image.Image':
+		"""Thread-safe: fits the frame to the canvas and maps it to the shared palette"""
+		from PIL import Image
+
+		# No dithering: flat UI colors compress better and unchanged regions stay identical between frames
+		return _fit_to_canvas(image, self.canvas_size).quantize(palette=self.palette, dither=Image.Dither.NONE)
+
+	def write(self, frame: 'Image.Image', duration: int) -> None:
+		from PIL import GifImagePlugin, Image, ImageChops
+
+		if self._file is None:
+			self._file = open(self.output_path, 'wb')
+			header, _ = GifImagePlugin.getheader(frame.copy(), info={'loop': self.loop, 'optimize': False})
+			for chunk in header:
+				self._file.write(chunk)
+			self._previous = frame
+			self._pending = (frame, (0, 0), duration)
+			return
+
+		# Compare palette indices, not colors: frames share the palette
+		bbox = ImageChops.difference(
+			Image.frombytes('L', frame.size, self._previous.tobytes()),
+			Image.frombytes('L', frame.size, frame.tobytes()),
+		).getbbox()
+		if bbox is None:
+			image, offset, pending_duration = self._pending
+			self._pending = (image, offset, pending_duration + duration)
+			return
+
+		self._flush()
+		self._previous = frame
+		self._pending = (frame.crop(bbox), bbox[:2], duration)
+
+	def _flush(self) -> None:
+		from PIL import GifImagePlugin
+
+		if self._pending is None:
+			return
+		image, offset, duration = self._pending
+		for chunk in GifImagePlugin.getdata(image, offset=offset, duration=duration, disposal=1):
+			self._file.write(chunk)
+		self._pending = None
+
+	def close(self) -> None:
+		if self._file is None:
+			open(self.output_path, 'wb').close()
+			return
+		self._flush()
+		self._file.write(b';')  # trailer
+		self._file.close()
+		self._file = None
+
+
+class _VideoStreamWriter:
+	"""Pipes raw RGB frames to a local ffmpeg process (one frame per `duration`)"""
+
+	def __init__(self, output_path: str, canvas_size: tuple[int, int], duration: int, codec_args: list[str]):
+		self.output_path = output_path
+		self.canvas_size = canvas_size
+		self.duration = duration
+		width, height = canvas_size
+		self._process = subprocess.Popen(
+			[
+				'ffmpeg',
+				'-y',
+				'-loglevel',
+				'error',
+				'-f',
+				'rawvideo',
+				'-pix_fmt',
+				'rgb24',
+				'-s',
+				f'{width}x{height}',
+				'-framerate',
+				f'1000/{duration}',
+				'-i',
+				'-',
+				# yuv420p needs even dimensions
+				'-vf',
+				'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+				*codec_args,
+				output_path,
+			],
+			stdin=subprocess.PIPE,
+			stderr=subprocess.PIPE,
+		)
+
+	def prepare(self, image: 'Image.Image') -> bytes:
+		"""Thread-safe: fits the frame to the canvas and returns its raw RGB bytes"""
+		return _fit_to_canvas(image, self.canvas_size).tobytes()
+
+	def write(self, frame: bytes, duration: int) -> None:
+		# Longer frames are repeated so every frame keeps its own duration at the fixed frame rate
+		for _ in range(max(1, round(duration / self.duration))):
+			self._process.stdin.write(frame)
+
+	def close(self) -> None:
+		self._process.stdin.close()
+		error = self._process.stderr.read().decode(errors='replace').strip()
+		if self._process.wait() != 0:
+			logger.error(f'ffmpeg failed to encode {self.output_path}: {error}')
+
+
 def _create_task_frame(
 	task: str,
-	first_screenshot: str,
+	first_screenshot: bytes,
 	title_font: 'ImageFont.FreeTypeFont',
 	regular_font: 'ImageFont.FreeTypeFont',
 	logo: Optional[Image.Image] = None,
@@ -147,8 +367,7 @@ def _create_task_frame(
 	"""Create initial frame showing the task."""
 	from PIL import Image, ImageDraw, ImageFont
 
-	img_data = base64.b64decode(first_screenshot)
-	template = Image.open(io.BytesIO(img_data))
+	template = Image.open(io.BytesIO(first_screenshot))
 	image = Image.new('RGB', template.size, (0, 0, 0))
 	draw = ImageDraw.Draw(image)
 
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
@@ -14,10 +18,43 @@ from pydantic import BaseModel
 
 from browser_use.agent.message_manager.service import MessageManager
 from browser_use.agent.message_manager.views import ManagedMessage, MessageMetadata
-from browser_use.utils import time_execution_sync
+from browser_use.utils import time_execution_async, time_execution_sync
 
 logger = logging.getLogger(__name__)
 
+# Mem0 instances (with their embedder, a local HuggingFace model by default, and vector store) are built
+# once per process and configuration, and shared by the agents that use the same configuration
+MAX_SHARED_MEM0_INSTANCES = 8
+_shared_mem0: OrderedDict[str, Mem0Memory] = OrderedDict()
+# Guards the instance cache and every mem0 call: consolidations run in executor threads and the shared
+# vector stores (FAISS) are not thread safe
+_shared_store_lock = threading.Lock()
+
+
+def _config_value_key(value: Any) -> Any:
+	"""JSON stand-in for config values that are objects (e.g. the langchain chat model)"""
+	name = f'{type(value).__module__}.{type(value).__qualname__}'
+	if isinstance(value, BaseModel):
+		try:
+			return {'__type__': name, **value.model_dump(mode='json')}
+		except Exception:
+			pass
+	return f'{name}@{id(value)}'
+
+
+def _get_mem0(config: dict) -> Mem0Memory:
+	"""Mem0Memory for the configuration, reusing the instance already built for an equal configuration"""
+	key = json.dumps(config, sort_keys=True, default=_config_value_key)
+	with _shared_store_lock:
+		instance = _shared_mem0.get(key)
+		if instance is None:
+			instance = _shared_mem0[key] = Mem0Memory.from_config(config_dict=config)
+			while len(_shared_mem0) > MAX_SHARED_MEM0_INSTANCES:
+				_shared_mem0.popitem(last=False)
+		else:
+			_shared_mem0.move_to_end(key)
+		return instance
+
 
 class MemorySettings(BaseModel):
 	"""Settings for procedural memory."""
@@ -51,7 +88,7 @@ class Memory:
 		self.llm = llm
 		self.settings = settings
 		self._memory_config = self.settings.config or self._get_default_config(llm)
-		self.mem0 = Mem0Memory.from_config(config_dict=self._memory_config)
+		self.mem0 = _get_mem0(self._memory_config)
 
 	@staticmethod
 	def _get_default_config(llm: BaseChatModel) -> dict:
@@ -70,60 +107,85 @@ class Memory:
 		Args:
 		    current_step: The current step number of the agent
 		"""
-		logger.info(f'Creating procedural memory at step {current_step}')
+		messages_to_process = self._get_messages_to_process(current_step)
+		if not messages_to_process:
+			return
+		memory_content = self._create([m.message for m in messages_to_process], current_step)
+		self._replace_with_memory(messages_to_process, memory_content)
 
-		# Get all messages
-		all_messages = self.message_manager.state.history.messages
+	@time_execution_async('--create_procedural_memory_async')
+	async def create_procedural_memory_async(self, current_step: int) -> None:
+		"""
+		Same as create_procedural_memory, but the Mem0 call (LLM + embedding) runs in an executor thread.
 
-		# Separate messages into those to keep as-is and those to process for memory
-		new_messages = []
-		messages_to_process = []
+		The messages to consolidate are taken now; messages added while the memory is being created are
+		kept, and the result is merged into the message history when it is ready.
+		"""
+		messages_to_process = self._get_messages_to_process(current_step)
+		if not messages_to_process:
+			return
+		loop = asyncio.get_running_loop()
+		memory_content = await loop.run_in_executor(None, self._create, [m.message for m in messages_to_process], current_step)
+		self._replace_with_memory(messages_to_process, memory_content)
+
+	def _get_messages_to_process(self, current_step: int) -> list[ManagedMessage]:
+		"""Messages that would be consolidated (all but system and memory messages)"""
+		logger.info(f'Creating procedural memory at step {current_step}')
 
-		for msg in all_messages:
+		messages_to_process = []
+		for msg in self.message_manager.state.history.messages:
 			if isinstance(msg, ManagedMessage) and msg.metadata.message_type in {'init', 'memory'}:
 				# Keep system and memory messages as they are
-				new_messages.append(msg)
-			else:
-				if len(msg.message.content) > 0:
-					messages_to_process.append(msg)
+				continue
+			if len(msg.message.content) > 0:
+				messages_to_process.append(msg)
 
 		# Need at least 2 messages to create a meaningful summary
 		if len(messages_to_process) <= 1:
 			logger.info('Not enough non-memory messages to summarize')
-			return
-		# Create a procedural memory
-		memory_content = self._create([m.message for m in messages_to_process], current_step)
+			return []
+		return messages_to_process
 
+	def _replace_with_memory(self, messages_to_process: list[ManagedMessage], memory_content: Optional[str]) -> None:
+		"""Replaces the processed messages with the consolidated memory, where the first of them was"""
 		if not memory_content:
 			logger.warning('Failed to create procedural memory')
 			return
 
-		# Replace the processed messages with the consolidated memory
 		memory_message = HumanMessage(content=memory_content)
 		memory_tokens = self.message_manager._count_tokens(memory_message)
 		memory_metadata = MessageMetadata(tokens=memory_tokens, message_type='memory')
 
-		# Calculate the total tokens being removed
-		removed_tokens = sum(m.metadata.tokens for m in messages_to_process)
-
-		# Add the memory message
-		new_messages.append(ManagedMessage(message=memory_message, metadata=memory_metadata))
+		history = self.message_manager.state.history
+		processed = {id(m) for m in messages_to_process}
+		new_messages = []
+		removed_tokens = 0
+		inserted = False
+		for msg in history.messages:
+			if id(msg) not in processed:
+				new_messages.append(msg)
+				continue
+			if not inserted:
+				new_messages.append(ManagedMessage(message=memory_message, metadata=memory_metadata))
+				inserted = True
+			removed_tokens += msg.metadata.tokens
 
 		# Update the history
-		self.message_manager.state.history.messages = new_messages
-		self.message_manager.state.history.current_tokens -= removed_tokens
-		self.message_manager.state.history.current_tokens += memory_tokens
+		history.messages = new_messages
+		history.current_tokens -= removed_tokens
+		history.current_tokens += memory_tokens
 		logger.info(f'Messages consolidated: {len(messages_to_process)} messages converted to procedural memory')
 
 	def _create(self, messages: List[BaseMessage], current_step: int) -> Optional[str]:
 		parsed_messages = convert_to_openai_messages(messages)
 		try:
-			results = self.mem0.add(
-				messages=parsed_messages,
-				agent_id=self.settings.agent_id,
-				memory_type='procedural_memory',
-				metadata={'step': current_step},
-			)
+			with _shared_store_lock:
+				results = self.mem0.add(
+					messages=parsed_messages,
+					agent_id=self.settings.agent_id,
+					memory_type='procedural_memory',
+					metadata={'step': current_step},
+				)
 			if len(results.get('results', [])):
 				return results.get('results', [])[0].get('memory')
 			return None
@@ -12,6 +12,7 @@ from langchain_core.messages import (
 )
 from pydantic import BaseModel
 
+from browser_use.agent.message_manager.token_counter import TokenCounter, get_token_counter
 from browser_use.agent.message_manager.views import MessageMetadata
 from browser_use.agent.prompts import AgentMessagePrompt
 from browser_use.agent.views import ActionResult, AgentOutput, AgentStepInfo, MessageManagerState
@@ -25,6 +26,9 @@ class MessageManagerSettings(BaseModel):
 	max_input_tokens: int = 128000
 	estimated_characters_per_token: int = 3
 	image_tokens: int = 800
+	# Select the tokenizer used for token counting (character estimate when unknown)
+	model_name: Optional[str] = None
+	chat_model_library: Optional[str] = None
 	include_attributes: list[str] = []
 	message_context: Optional[str] = None
 	sensitive_data: Optional[Dict[str, str]] = None
@@ -38,11 +42,15 @@ class MessageManager:
 		system_message: SystemMessage,
 		settings: MessageManagerSettings = MessageManagerSettings(),
 		state: MessageManagerState = MessageManagerState(),
+		token_counter: TokenCounter | None = None,
 	):
 		self.task = task
 		self.settings = settings
 		self.state = state
 		self.system_prompt = system_message
+		self.token_counter = token_counter or get_token_counter(
+			settings.model_name, settings.chat_model_library, settings.estimated_characters_per_token
+		)
 
 		# Only initialize messages if state is empty
 		if len(self.state.history.messages) == 0:
@@ -237,8 +245,7 @@ class MessageManager:
 
 	def _count_text_tokens(self, text: str) -> int:
 		"""Count tokens in a text string"""
-		tokens = len(text) // self.settings.estimated_characters_per_token  # Rough estimate if no tokenizer available
-		return tokens
+		return self.token_counter.count(text)
 
 	def cut_messages(self):
 		"""Get current message list, potentially trimmed to max tokens"""
@@ -268,21 +275,16 @@ class MessageManager:
 		if diff <= 0:
 			return None
 
-		# if still over, remove text from state message proportionally to the number of tokens needed with buffer
-		# Calculate the proportion of content to remove
+		# if still over, cut the end of the state message to exactly the tokens that still fit
 		proportion_to_remove = diff / msg.metadata.tokens
 		if proportion_to_remove > 0.99:
 			raise ValueError(
 				f'Max token limit reached - history is too long - reduce the system prompt or task. '
 				f'proportion_to_remove: {proportion_to_remove}'
 			)
-		logger.debug(
-			f'Removing {proportion_to_remove * 100:.2f}% of the last message  {proportion_to_remove * msg.metadata.tokens:.2f} / {msg.metadata.tokens:.2f} tokens)'
-		)
+		logger.debug(f'Removing {proportion_to_remove * 100:.2f}% of the last message  {diff} / {msg.metadata.tokens} tokens)')
 
-		content = msg.message.content
-		characters_to_remove = int(len(content) * proportion_to_remove)
-		content = content[:-characters_to_remove]
+		content = self.token_counter.truncate(msg.message.content, msg.metadata.tokens - diff)
 
 		# remove tokens and old long message
 		self.state.history.remove_last_state_message()
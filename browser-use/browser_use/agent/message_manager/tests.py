@@ -4,6 +4,7 @@ from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
 from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.message_manager.token_counter import TiktokenCounter, TokenCounter
 from browser_use.agent.views import ActionResult
 from browser_use.browser.views import BrowserState, TabInfo
 from browser_use.dom.views import DOMElementNode, DOMTextNode
@@ -234,4 +235,37 @@ def test_token_overflow_handling_with_real_flow(message_manager: MessageManager,
 		assert message_manager.state.history.current_tokens == total_tokens
 
 
+def test_token_counter_truncate_and_cache():
+	"""Truncation keeps a prefix within the token budget; repeated long texts are counted from the cache"""
+	counter = TokenCounter(characters_per_token=3, cache_size=2)
+	text = 'word ' * 1000
+
+	truncated = counter.truncate(text, 100)
+	assert text.startswith(truncated)
+	assert counter.count(truncated) <= 100
+
+	counter.count(text)
+	counter.count(text)
+	assert (counter.misses, counter.hits) == (2, 1)
+
+
+@pytest.mark.parametrize('scale', [1.0, 1.2])
+def test_tiktoken_counter_truncate(scale):
+	"""Truncation with a real tokenizer keeps a prefix whose scaled count fits in max_tokens"""
+	tiktoken = pytest.importorskip('tiktoken')
+	try:
+		encoding = tiktoken.get_encoding('cl100k_base')
+	except Exception as e:
+		pytest.skip(f'cl100k_base encoding not available: {e}')
+	counter = TiktokenCounter(encoding, scale=scale)
+	text = 'Página de búsqueda 🔍 con resultados — ' * 200
+
+	for max_tokens in (1, 7, 50, 333):
+		truncated = counter.truncate(text, max_tokens)
+		assert text.startswith(truncated.rstrip('\ufffd'))
+		assert counter.count(truncated) <= max_tokens
+
+	assert counter.truncate(text, counter.count(text)) == text
+
+
 # pytest -s browser_use/agent/message_manager/tests.py
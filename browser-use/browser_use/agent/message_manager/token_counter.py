@@ -0,0 +1,123 @@
+"""
+Token counting for the message manager.
+
+MessageManager keeps a running token total to decide when to trim the state message. Counting with a
+local BPE tokenizer (tiktoken) instead of a characters-per-token estimate lets max_input_tokens sit
+close to the real context limit. Providers without a public tokenizer are counted with a tiktoken
+encoding scaled by a safety margin, so counts err high.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Texts shorter than this are counted directly; caching them costs more than it saves
+MIN_CACHED_LENGTH = 256
+
+# Chat model class -> (tiktoken encoding, scale) for providers that do not publish their tokenizer
+APPROXIMATE_ENCODINGS = {
+	'ChatAnthropic': ('cl100k_base', 1.2),
+	'ChatGoogleGenerativeAI': ('cl100k_base', 1.1),
+	'ChatDeepSeek': ('cl100k_base', 1.1),
+	'ChatOllama': ('cl100k_base', 1.2),
+}
+OPENAI_LIBRARIES = {'ChatOpenAI', 'AzureChatOpenAI'}
+
+
+class TokenCounter:
+	"""
+	Counts and truncates text in tokens, caching counts of recent texts.
+
+	The base class estimates tokens from the number of characters; subclasses override
+	_count and truncate with a real tokenizer.
+	"""
+
+	def __init__(self, characters_per_token: int = 3, cache_size: int = 256):
+		self.characters_per_token = characters_per_token
+		self.cache_size = cache_size
+		self._cache: OrderedDict[str, int] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def count(self, text: str) -> int:
+		if len(text) < MIN_CACHED_LENGTH:
+			return self._count(text)
+		tokens = self._cache.get(text)
+		if tokens is not None:
+			self._cache.move_to_end(text)
+			self.hits += 1
+			return tokens
+		self.misses += 1
+		tokens = self._cache[text] = self._count(text)
+		if len(self._cache) > self.cache_size:
+			self._cache.popitem(last=False)
+		return tokens
+
+	def _count(self, text: str) -> int:
+		return len(text) // self.characters_per_token
+
+	def truncate(self, text: str, max_tokens: int) -> str:
+		"""Longest prefix of `text` with at most `max_tokens` tokens"""
+		return text[: max(max_tokens, 0) * self.characters_per_token]
+
+
+class TiktokenCounter(TokenCounter):
+	"""Counts with a tiktoken encoding; `scale` > 1 adds a margin for providers with a different tokenizer"""
+
+	def __init__(self, encoding, scale: float = 1.0, cache_size: int = 256):
+		super().__init__(cache_size=cache_size)
+		self.encoding = encoding
+		self.scale = scale
+
+	def _encode(self, text: str) -> list[int]:
+		# Special token markers in page text are counted as plain text
+		return self.encoding.encode(text, disallowed_special=())
+
+	def _count(self, text: str) -> int:
+		return math.ceil(len(self._encode(text)) * self.scale)
+
+	def truncate(self, text: str, max_tokens: int) -> str:
+		limit = max(int(max_tokens / self.scale), 0)
+		tokens = self._encode(text)
+		if len(tokens) <= limit:
+			return text
+		# Decoding a cut can re-encode to more tokens (e.g. a split multi-byte character): shrink until it fits
+		truncated = self.encoding.decode(tokens[:limit])
+		while limit > 0 and self._count(truncated) > max_tokens:
+			limit -= 1
+			truncated = self.encoding.decode(tokens[:limit])
+		return truncated
+
+
+def get_token_counter(
+	model_name: str | None = None,
+	chat_model_library: str | None = None,
+	characters_per_token: int = 3,
+) -> TokenCounter:
+	"""
+	Token counter for a chat model: the model's own tiktoken encoding for OpenAI models, a scaled
+	tiktoken encoding for other known providers, and the character estimate otherwise (or without tiktoken)
+	"""
+	if not model_name or not chat_model_library:
+		return TokenCounter(characters_per_token)
+
+	try:
+		import tiktoken
+
+		if chat_model_library in OPENAI_LIBRARIES:
+			try:
+				encoding = tiktoken.encoding_for_model(model_name)
+			except KeyError:
+				encoding = tiktoken.get_encoding('o200k_base')
+			return TiktokenCounter(encoding)
+
+		encoding_name, scale = APPROXIMATE_ENCODINGS.get(chat_model_library, ('cl100k_base', 1.2))
+		return TiktokenCounter(tiktoken.get_encoding(encoding_name), scale=scale)
+	except Exception as e:
+		# tiktoken not installed, or its encoding files could not be downloaded
+		logger.debug(f'Tokenizer not available for {chat_model_library} ({e}), estimating tokens from characters')
+		return TokenCounter(characters_per_token)
@@ -4,6 +4,8 @@ from typing import TYPE_CHECKING, List, Optional, Union
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from browser_use.browser.views import screenshot_media_type
+
 if TYPE_CHECKING:
 	from browser_use.agent.views import ActionResult, AgentStepInfo
 	from browser_use.browser.views import BrowserState
@@ -129,7 +131,9 @@ Interactive elements from top layer of the current page inside the viewport:
 					{'type': 'text', 'text': state_description},
 					{
 						'type': 'image_url',
-						'image_url': {'url': f'data:image/png;base64,{self.state.screenshot}'},  # , 'detail': 'low'
+						'image_url': {
+							'url': f'data:{screenshot_media_type(self.state.screenshot)};base64,{self.state.screenshot}'
+						},  # , 'detail': 'low'
 					},
 				]
 			)
@@ -0,0 +1,52 @@
+"""
+Content-addressed storage for agent history screenshots.
+
+History items keep the path of the image file instead of the base64 string, so a long run does
+not hold every screenshot in memory and the history JSON stays small. Files are named by the
+sha256 of their bytes: identical screenshots (an unchanged page across steps) are written once.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from browser_use.browser.views import screenshot_media_type
+
+logger = logging.getLogger(__name__)
+
+FILE_EXTENSIONS = {
+	'image/png': '.png',
+	'image/jpeg': '.jpg',
+	'image/webp': '.webp',
+}
+
+
+class ScreenshotStore:
+	"""Writes base64 screenshots to `directory` as <sha256>.<ext>, once per distinct image"""
+
+	def __init__(self, directory: str | Path):
+		self.directory = Path(directory)
+		self.directory.mkdir(parents=True, exist_ok=True)
+		self._written: dict[str, str] = {}  # sha256 -> path
+
+	def put(self, screenshot_b64: str) -> str:
+		"""Stores the screenshot and returns its file path"""
+		data = base64.b64decode(screenshot_b64)
+		digest = hashlib.sha256(data).hexdigest()
+		path = self._written.get(digest)
+		if path is not None:
+			return path
+
+		path = str(self.directory / f'{digest}{FILE_EXTENSIONS[screenshot_media_type(screenshot_b64)]}')
+		if not os.path.exists(path):
+			tmp_path = f'{path}.{os.getpid()}.tmp'
+			with open(tmp_path, 'wb') as f:
+				f.write(data)
+			os.replace(tmp_path, path)
+		self._written[digest] = path
+		return path
+
+	def __len__(self) -> int:
+		return len(self._written)
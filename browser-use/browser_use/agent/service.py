@@ -27,6 +27,7 @@ from browser_use.agent.memory.service import Memory, MemorySettings
 from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
 from browser_use.agent.message_manager.utils import convert_input_messages, extract_json_from_model_output, save_conversation
 from browser_use.agent.prompts import AgentMessagePrompt, PlannerPrompt, SystemPrompt
+from browser_use.agent.screenshot_store import ScreenshotStore
 from browser_use.agent.views import (
 	REQUIRED_LLM_API_ENV_VARS,
 	ActionResult,
@@ -47,6 +48,7 @@ from browser_use.controller.registry.views import ActionModel
 from browser_use.controller.service import Controller
 from browser_use.dom.history_tree_processor.service import (
 	DOMHistoryElement,
+	HashIndex,
 	HistoryTreeProcessor,
 )
 from browser_use.exceptions import LLMException
@@ -151,6 +153,7 @@ class Agent(Generic[Context]):
 		enable_memory: bool = True,
 		memory_interval: int = 10,
 		memory_config: Optional[dict] = None,
+		screenshot_store_dir: Optional[str] = None,
 	):
 		if page_extraction_llm is None:
 			page_extraction_llm = llm
@@ -185,7 +188,9 @@ class Agent(Generic[Context]):
 			enable_memory=enable_memory,
 			memory_interval=memory_interval,
 			memory_config=memory_config,
+			screenshot_store_dir=screenshot_store_dir,
 		)
+		self.screenshot_store = ScreenshotStore(screenshot_store_dir) if screenshot_store_dir else None
 
 		# Initialize state
 		self.state = injected_agent_state or AgentState()
@@ -234,6 +239,8 @@ class Agent(Generic[Context]):
 				message_context=self.settings.message_context,
 				sensitive_data=sensitive_data,
 				available_file_paths=self.settings.available_file_paths,
+				model_name=self.model_name,
+				chat_model_library=self.chat_model_library,
 			),
 			state=self.state.message_manager_state,
 		)
@@ -253,6 +260,8 @@ class Agent(Generic[Context]):
 			)
 		else:
 			self.memory = None
+		# Background procedural memory consolidation, merged into the message history when done
+		self._memory_task: asyncio.Task | None = None
 
 		# Browser setup
 		self.injected_browser = browser is not None
@@ -388,13 +397,16 @@ class Agent(Generic[Context]):
 		tokens = 0
 
 		try:
+			# generate procedural memory if needed, in the background while the browser state is captured
+			if self.settings.enable_memory and self.memory and self.state.n_steps % self.settings.memory_interval == 0:
+				if self._memory_task is None or self._memory_task.done():
+					self._memory_task = asyncio.create_task(self.memory.create_procedural_memory_async(self.state.n_steps))
+				else:
+					logger.debug('Previous procedural memory still being created, skipping')
+
 			state = await self.browser_context.get_state()
 			active_page = await self.browser_context.get_current_page()
 
-			# generate procedural memory if needed
-			if self.settings.enable_memory and self.memory and self.state.n_steps % self.settings.memory_interval == 0:
-				self.memory.create_procedural_memory(self.state.n_steps)
-
 			await self._raise_if_stopped_or_paused()
 
 			# Update action models with page-specific actions
@@ -592,12 +604,17 @@ class Agent(Generic[Context]):
 		else:
 			interacted_elements = [None]
 
+		screenshot, screenshot_path = state.screenshot, None
+		if screenshot and self.screenshot_store is not None:
+			screenshot, screenshot_path = None, self.screenshot_store.put(screenshot)
+
 		state_history = BrowserStateHistory(
 			url=state.url,
 			title=state.title,
 			tabs=state.tabs,
 			interacted_element=interacted_elements,
-			screenshot=state.screenshot,
+			screenshot=screenshot,
+			screenshot_path=screenshot_path,
 		)
 
 		history_item = AgentHistory(model_output=model_output, result=result, state=state_history, metadata=metadata)
@@ -1044,12 +1061,15 @@ class Agent(Generic[Context]):
 		state = await self.browser_context.get_state()
 		if not state or not history_item.model_output:
 			raise ValueError('Invalid state or model output')
+		# Built once per state: every action of the step is looked up in the same tree
+		hash_index = HistoryTreeProcessor.build_hash_index(state.element_tree) if state.element_tree else None
 		updated_actions = []
 		for i, action in enumerate(history_item.model_output.action):
 			updated_action = await self._update_action_indices(
 				history_item.state.interacted_element[i],
 				action,
 				state,
+				hash_index,
 			)
 			updated_actions.append(updated_action)
 
@@ -1066,6 +1086,7 @@ class Agent(Generic[Context]):
 		historical_element: Optional[DOMHistoryElement],
 		action: ActionModel,  # Type this properly based on your action model
 		current_state: BrowserState,
+		hash_index: Optional[HashIndex] = None,
 	) -> Optional[ActionModel]:
 		"""
 		Update action indices based on current page state.
@@ -1074,7 +1095,9 @@ class Agent(Generic[Context]):
 		if not historical_element or not current_state.element_tree:
 			return action
 
-		current_element = HistoryTreeProcessor.find_history_element_in_tree(historical_element, current_state.element_tree)
+		current_element = HistoryTreeProcessor.find_history_element_in_tree(
+			historical_element, current_state.element_tree, hash_index
+		)
 
 		if not current_element or current_element.highlight_index is None:
 			return None
@@ -1266,6 +1289,10 @@ class Agent(Generic[Context]):
 	async def close(self):
 		"""Close all resources"""
 		try:
+			# A consolidation still running is no longer needed
+			if self._memory_task is not None and not self._memory_task.done():
+				self._memory_task.cancel()
+
 			# First close browser resources
 			if self.browser_context and not self.injected_browser_context:
 				await self.browser_context.close()
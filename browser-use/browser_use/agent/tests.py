@@ -1,5 +1,8 @@
+import base64
+
 import pytest
 
+from browser_use.agent.screenshot_store import ScreenshotStore
 from browser_use.agent.views import (
 	ActionResult,
 	AgentBrain,
@@ -186,6 +189,39 @@ def test_empty_history():
 	assert len(empty_history.urls()) == 0
 
 
+def test_screenshot_store_history(tmp_path):
+	store = ScreenshotStore(tmp_path / 'screenshots')
+	screenshot = base64.b64encode(b'\x89PNG\r\n\x1a\nstep').decode('utf-8')
+	paths = [store.put(screenshot), store.put(screenshot)]
+	assert paths[0] == paths[1]
+	assert len(list((tmp_path / 'screenshots').iterdir())) == 1
+
+	history = AgentHistoryList(
+		history=[
+			AgentHistory(
+				model_output=None,
+				result=[ActionResult()],
+				state=BrowserStateHistory(
+					url='https://example.com',
+					title='Example Page',
+					tabs=[],
+					interacted_element=[None],
+					screenshot_path=path,
+				),
+			)
+			for path in paths
+		]
+	)
+	assert history.screenshot_paths() == paths
+	assert history.screenshots() == [screenshot, screenshot]
+
+	history_file = tmp_path / 'history.json'
+	history.save_to_file(history_file)
+	loaded = AgentHistoryList.load_from_file(history_file, AgentOutput)
+	assert loaded.screenshots() == [screenshot, screenshot]
+	assert screenshot not in history_file.read_text()
+
+
 # Add a test to verify action creation
 def test_action_creation(action_registry):
 	click_action = action_registry(click_element={'index': 1})
@@ -69,6 +69,9 @@ class AgentSettings(BaseModel):
 	planner_interval: int = 1  # Run planner every N steps
 	is_planner_reasoning: bool = False  # type: ignore
 
+	# Directory of a ScreenshotStore: history items keep file paths instead of base64 screenshots
+	screenshot_store_dir: Optional[str] = None
+
 	# Procedural memory settings
 	enable_memory: bool = True
 	memory_interval: int = 10
@@ -324,8 +327,12 @@ class AgentHistoryList(BaseModel):
 		return [h.state.url if h.state.url is not None else None for h in self.history]
 
 	def screenshots(self) -> list[str | None]:
-		"""Get all screenshots from history"""
-		return [h.state.screenshot if h.state.screenshot is not None else None for h in self.history]
+		"""Get all screenshots from history (stored screenshots are read from disk)"""
+		return [h.state.get_screenshot() for h in self.history]
+
+	def screenshot_paths(self) -> list[str | None]:
+		"""Get the file of each screenshot written to a ScreenshotStore, without loading it"""
+		return [h.state.screenshot_path for h in self.history]
 
 	def action_names(self) -> list[str]:
 		"""Get all action names from history"""
@@ -5,14 +5,17 @@ Playwright browser on steroids.
 import asyncio
 import base64
 import gc
+import hashlib
 import json
 import logging
 import os
 import re
 import time
 import uuid
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal, Optional
+from urllib.parse import urlparse
 
 from playwright._impl._errors import TimeoutError
 from playwright.async_api import Browser as PlaywrightBrowser
@@ -41,6 +44,87 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Requests that count towards page load in _wait_for_stable_network
+RELEVANT_RESOURCE_TYPES = frozenset(
+	{
+		'document',
+		'stylesheet',
+		'image',
+		'font',
+		'script',
+		'iframe',
+	}
+)
+
+RELEVANT_CONTENT_TYPES = (
+	'text/html',
+	'text/css',
+	'application/javascript',
+	'image/',
+	'font/',
+	'application/json',
+)
+
+IGNORED_URL_PATTERNS = (
+	# Analytics and tracking
+	'analytics',
+	'tracking',
+	'telemetry',
+	'beacon',
+	'metrics',
+	# Ad-related
+	'doubleclick',
+	'adsystem',
+	'adserver',
+	'advertising',
+	# Social media widgets
+	'facebook.com/plugins',
+	'platform.twitter',
+	'linkedin.com/embed',
+	# Live chat and support
+	'livechat',
+	'zendesk',
+	'intercom',
+	'crisp.chat',
+	'hotjar',
+	# Push notifications
+	'push-notifications',
+	'onesignal',
+	'pushwoosh',
+	# Background sync/heartbeat
+	'heartbeat',
+	'ping',
+	'alive',
+	# WebRTC and streaming
+	'webrtc',
+	'rtmp://',
+	'wss://',
+	# Common CDNs for dynamic content
+	'cloudfront.net',
+	'fastly.net',
+)
+
+IGNORED_CONTENT_TYPES = (
+	'streaming',
+	'video',
+	'audio',
+	'webm',
+	'mp4',
+	'event-stream',
+	'websocket',
+	'protobuf',
+)
+
+
+def _compile_substring_filter(patterns) -> re.Pattern:
+	"""Single alternation regex matching any of the substrings (one scan per URL instead of one per pattern)"""
+	return re.compile('|'.join(re.escape(pattern) for pattern in sorted(patterns, key=len, reverse=True)))
+
+
+IGNORED_URL_REGEX = _compile_substring_filter(IGNORED_URL_PATTERNS)
+IGNORED_CONTENT_TYPE_REGEX = _compile_substring_filter(IGNORED_CONTENT_TYPES)
+RELEVANT_CONTENT_TYPE_REGEX = _compile_substring_filter(RELEVANT_CONTENT_TYPES)
+
 
 class BrowserContextWindowSize(BaseModel):
 	"""Window size configuration for browser context"""
@@ -83,6 +167,11 @@ class BrowserContextConfig(BaseModel):
 	    maximum_wait_page_load_time: 5.0
 	        Maximum time to wait for page load before proceeding anyway
 
+	    adaptive_page_load_wait: False
+	        Learn per domain how long after the last network activity new requests still start, and shorten
+	        wait_for_network_idle_page_load_time and minimum_wait_page_load_time to that (never longer than
+	        configured). Static pages then stop paying the fixed waits on every step.
+
 	    wait_between_actions: 1.0
 	        Time to wait between multiple per step actions
 
@@ -113,6 +202,26 @@ class BrowserContextConfig(BaseModel):
 	    viewport_expansion: 0
 	        Viewport expansion in pixels. This amount will increase the number of elements which are included in the state what the LLM will see. If set to -1, all elements will be included (this leads to high token usage). If set to 0, only the elements which are visible in the viewport will be included.
 
+	    incremental_dom_snapshots: False
+	        Reuse the previous DOM state when a MutationObserver injected in the page reports no changes
+	        (no DOM mutation, scroll, resize, input, focus, hover, click or hash change) since the last step,
+	        instead of rebuilding the whole tree.
+
+	    dom_snapshot_max_age: 30.0
+	        Seconds after which a reused DOM state is rebuilt anyway (incremental_dom_snapshots only)
+
+	    screenshot_format: 'png'
+	        Encoding of the state screenshot sent to the LLM: 'png', 'jpeg' or 'webp'. jpeg/webp with
+	        screenshot_max_size are captured through CDP on Chromium; other browsers fall back to jpeg.
+	        take_screenshot() (evidence) always returns a full resolution PNG.
+
+	    screenshot_quality: 80
+	        Quality (0-100) of jpeg/webp state screenshots
+
+	    screenshot_max_size: None
+	        Maximum width/height in pixels of the state screenshot; larger viewports are downscaled by the
+	        browser while capturing. Fewer pixels means less capture time and fewer image tokens.
+
 	    allowed_domains: None
 	        List of allowed domains that can be accessed. If None, all domains are allowed.
 	        Example: ['example.com', 'api.example.com']
@@ -153,6 +262,7 @@ class BrowserContextConfig(BaseModel):
 	minimum_wait_page_load_time: float = 0.25
 	wait_for_network_idle_page_load_time: float = 0.5
 	maximum_wait_page_load_time: float = 5
+	adaptive_page_load_wait: bool = False
 	wait_between_actions: float = 0.5
 
 	disable_security: bool = False  # disable_security=True is dangerous as any malicious URL visited could embed an iframe for the user's bank, and use their cookies to steal money
@@ -173,6 +283,11 @@ class BrowserContextConfig(BaseModel):
 
 	highlight_elements: bool = True
 	viewport_expansion: int = 0
+	incremental_dom_snapshots: bool = False
+	dom_snapshot_max_age: float = 30.0
+	screenshot_format: Literal['png', 'jpeg', 'webp'] = 'png'
+	screenshot_quality: int = Field(default=80, ge=0, le=100)
+	screenshot_max_size: int | None = None
 	allowed_domains: list[str] | None = None
 	include_dynamic_attributes: bool = True
 	http_credentials: dict[str, str] | None = None
@@ -237,6 +352,54 @@ class BrowserSession:
 		self.context.on('page', lambda page: page.add_init_script(init_script))
 
 
+@dataclass
+class DomainLoadStats:
+	"""Recent network idle observations for one domain"""
+
+	# Longest pause between network activity and a new relevant request, per wait
+	gaps: deque = field(default_factory=lambda: deque(maxlen=DomainWaitTracker.HISTORY))
+	waits: int = 0
+
+
+class DomainWaitTracker:
+	"""
+	Learns, per domain, how long the network can stay quiet before a late request starts.
+
+	The idle window only has to be longer than the longest pause seen recently on that domain
+	(with a safety margin). Every PROBE_EVERY waits the full configured window is used again,
+	so pauses longer than the learned window are still discovered.
+	"""
+
+	HISTORY = 10
+	MIN_SAMPLES = 3
+	PROBE_EVERY = 10
+	MARGIN = 2.0
+	FLOOR = 0.25
+
+	def __init__(self):
+		self._domains: dict[str, DomainLoadStats] = {}
+
+	def idle_time(self, domain: str, configured: float) -> float:
+		"""Network idle window to use for the next wait on `domain`"""
+		stats = self._domains.get(domain)
+		if stats is None or len(stats.gaps) < self.MIN_SAMPLES or stats.waits % self.PROBE_EVERY == 0:
+			return configured
+		return min(configured, max(self.FLOOR, max(stats.gaps) * self.MARGIN))
+
+	def record(self, domain: str, gap: float):
+		stats = self._domains.setdefault(domain, DomainLoadStats())
+		stats.gaps.append(gap)
+		stats.waits += 1
+
+
+@dataclass
+class StateScreenshot:
+	"""Last state screenshot of a page"""
+
+	digest: bytes
+	screenshot: str
+
+
 @dataclass
 class BrowserContextState:
 	"""
@@ -264,6 +427,17 @@ class BrowserContext:
 		self.session: BrowserSession | None = None
 		self.active_tab: Page | None = None
 
+		# Last DOM state per page, reused by DomService in incremental mode
+		self._dom_snapshots: dict = {}
+
+		# Learned network idle windows per domain (adaptive_page_load_wait)
+		self._domain_waits = DomainWaitTracker()
+
+		# Per page: last state screenshot and the CDP session used to capture it
+		self._state_screenshots: dict[int, StateScreenshot] = {}
+		self._cdp_sessions: dict = {}
+		self._front_page_key: int | None = None
+
 	async def __aenter__(self):
 		"""Async context manager entry"""
 		await self._initialize_session()
@@ -509,89 +683,43 @@ class BrowserContext:
 
 		return context
 
-	async def _wait_for_stable_network(self):
-		page = await self.get_current_page()
+	async def _wait_for_stable_network(self) -> float:
+		"""
+		Waits until no relevant request has been pending for the idle window, or the maximum wait.
 
-		pending_requests = set()
-		last_activity = asyncio.get_event_loop().time()
-
-		# Define relevant resource types and content types
-		RELEVANT_RESOURCE_TYPES = {
-			'document',
-			'stylesheet',
-			'image',
-			'font',
-			'script',
-			'iframe',
-		}
+		Request events arm and cancel a timer on the event loop instead of polling.
 
-		RELEVANT_CONTENT_TYPES = {
-			'text/html',
-			'text/css',
-			'application/javascript',
-			'image/',
-			'font/',
-			'application/json',
-		}
+		Returns:
+			the idle window that was used
+		"""
+		page = await self.get_current_page()
+		loop = asyncio.get_running_loop()
 
-		# Additional patterns to filter out
-		IGNORED_URL_PATTERNS = {
-			# Analytics and tracking
-			'analytics',
-			'tracking',
-			'telemetry',
-			'beacon',
-			'metrics',
-			# Ad-related
-			'doubleclick',
-			'adsystem',
-			'adserver',
-			'advertising',
-			# Social media widgets
-			'facebook.com/plugins',
-			'platform.twitter',
-			'linkedin.com/embed',
-			# Live chat and support
-			'livechat',
-			'zendesk',
-			'intercom',
-			'crisp.chat',
-			'hotjar',
-			# Push notifications
-			'push-notifications',
-			'onesignal',
-			'pushwoosh',
-			# Background sync/heartbeat
-			'heartbeat',
-			'ping',
-			'alive',
-			# WebRTC and streaming
-			'webrtc',
-			'rtmp://',
-			'wss://',
-			# Common CDNs for dynamic content
-			'cloudfront.net',
-			'fastly.net',
-		}
+		domain = urlparse(page.url).hostname or ''
+		idle_time = self.config.wait_for_network_idle_page_load_time
+		if self.config.adaptive_page_load_wait:
+			idle_time = self._domain_waits.idle_time(domain, idle_time)
 
-		async def on_request(request):
-			# Filter by resource type
+		pending_requests = set()
+		last_activity = loop.time()
+		max_gap = 0.0
+		idle = asyncio.Event()
+		idle_timer: asyncio.TimerHandle | None = None
+
+		def arm_idle_timer():
+			nonlocal idle_timer
+			if idle_timer is not None:
+				idle_timer.cancel()
+			idle_timer = loop.call_later(max(last_activity + idle_time - loop.time(), 0), idle.set)
+
+		def on_request(request):
+			# Filter by resource type (this also drops websocket, media, eventsource, manifest and other)
 			if request.resource_type not in RELEVANT_RESOURCE_TYPES:
 				return
 
-			# Filter out streaming, websocket, and other real-time requests
-			if request.resource_type in {
-				'websocket',
-				'media',
-				'eventsource',
-				'manifest',
-				'other',
-			}:
-				return
-
 			# Filter out by URL patterns
 			url = request.url.lower()
-			if any(pattern in url for pattern in IGNORED_URL_PATTERNS):
+			if IGNORED_URL_REGEX.search(url):
 				return
 
 			# Filter out data URLs and blob URLs
@@ -606,77 +734,80 @@ class BrowserContext:
 			]:
 				return
 
-			nonlocal last_activity
+			nonlocal last_activity, max_gap, idle_timer
+			now = loop.time()
+			if not pending_requests:
+				max_gap = max(max_gap, now - last_activity)
+				if idle_timer is not None:
+					idle_timer.cancel()
+					idle_timer = None
 			pending_requests.add(request)
-			last_activity = asyncio.get_event_loop().time()
+			last_activity = now
 			# logger.debug(f'Request started: {request.url} ({request.resource_type})')
 
-		async def on_response(response):
+		def finish_request(request, activity: bool):
+			nonlocal last_activity
+			pending_requests.discard(request)
+			if activity:
+				last_activity = loop.time()
+			if not pending_requests:
+				arm_idle_timer()
+
+		def on_response(response):
 			request = response.request
 			if request not in pending_requests:
 				return
 
-			# Filter by content type if available
 			content_type = response.headers.get('content-type', '').lower()
 
-			# Skip if content type indicates streaming or real-time data
-			if any(
-				t in content_type
-				for t in [
-					'streaming',
-					'video',
-					'audio',
-					'webm',
-					'mp4',
-					'event-stream',
-					'websocket',
-					'protobuf',
-				]
-			):
-				pending_requests.remove(request)
-				return
-
-			# Only process relevant content types
-			if not any(ct in content_type for ct in RELEVANT_CONTENT_TYPES):
-				pending_requests.remove(request)
+			# Skip if content type indicates streaming or real-time data, or is not relevant for the page
+			if IGNORED_CONTENT_TYPE_REGEX.search(content_type) or not RELEVANT_CONTENT_TYPE_REGEX.search(content_type):
+				finish_request(request, activity=False)
 				return
 
 			# Skip if response is too large (likely not essential for page load)
 			content_length = response.headers.get('content-length')
 			if content_length and int(content_length) > 5 * 1024 * 1024:  # 5MB
-				pending_requests.remove(request)
+				finish_request(request, activity=False)
 				return
 
-			nonlocal last_activity
-			pending_requests.remove(request)
-			last_activity = asyncio.get_event_loop().time()
+			finish_request(request, activity=True)
 			# logger.debug(f'Request resolved: {request.url} ({content_type})')
 
+		def on_request_failed(request):
+			if request in pending_requests:
+				finish_request(request, activity=True)
+
 		# Attach event listeners
 		page.on('request', on_request)
 		page.on('response', on_response)
+		page.on('requestfailed', on_request_failed)
 
+		arm_idle_timer()
+		timed_out = False
 		try:
-			# Wait for idle time
-			start_time = asyncio.get_event_loop().time()
-			while True:
-				await asyncio.sleep(0.1)
-				now = asyncio.get_event_loop().time()
-				if len(pending_requests) == 0 and (now - last_activity) >= self.config.wait_for_network_idle_page_load_time:
-					break
-				if now - start_time > self.config.maximum_wait_page_load_time:
-					logger.debug(
-						f'Network timeout after {self.config.maximum_wait_page_load_time}s with {len(pending_requests)} '
-						f'pending requests: {[r.url for r in pending_requests]}'
-					)
-					break
-
+			await asyncio.wait_for(idle.wait(), timeout=self.config.maximum_wait_page_load_time)
+		except asyncio.TimeoutError:
+			timed_out = True
+			logger.debug(
+				f'Network timeout after {self.config.maximum_wait_page_load_time}s with {len(pending_requests)} '
+				f'pending requests: {[r.url for r in pending_requests]}'
+			)
 		finally:
 			# Clean up event listeners
+			if idle_timer is not None:
+				idle_timer.cancel()
 			page.remove_listener('request', on_request)
 			page.remove_listener('response', on_response)
+			page.remove_listener('requestfailed', on_request_failed)
 
-		logger.debug(f'⚖️  Network stabilized for {self.config.wait_for_network_idle_page_load_time} seconds')
+		if self.config.adaptive_page_load_wait:
+			# A page that never went quiet tells nothing about its pauses: keep the configured window
+			self._domain_waits.record(domain, self.config.wait_for_network_idle_page_load_time if timed_out else max_gap)
+
+		if not timed_out:
+			logger.debug(f'⚖️  Network stabilized for {idle_time:.2f} seconds')
+		return idle_time
 
 	async def _wait_for_page_and_frames_load(self, timeout_overwrite: float | None = None):
 		"""
@@ -686,10 +817,14 @@ class BrowserContext:
 		"""
 		# Start timing
 		start_time = time.time()
+		minimum_wait = self.config.minimum_wait_page_load_time
 
 		# Wait for page load
 		try:
-			await self._wait_for_stable_network()
+			idle_time = await self._wait_for_stable_network()
+			if self.config.adaptive_page_load_wait:
+				# No late requests were seen on this domain beyond the learned window either
+				minimum_wait = min(minimum_wait, idle_time)
 
 			# Check if the loaded URL is allowed
 			page = await self.get_current_page()
@@ -702,7 +837,7 @@ class BrowserContext:
 
 		# Calculate remaining time to meet minimum WAIT_TIME
 		elapsed = time.time() - start_time
-		remaining = max((timeout_overwrite or self.config.minimum_wait_page_load_time) - elapsed, 0)
+		remaining = max((timeout_overwrite or minimum_wait) - elapsed, 0)
 
 		logger.debug(f'--Page loaded in {elapsed:.2f} seconds, waiting for additional {remaining:.2f} seconds')
 
@@ -912,7 +1047,17 @@ class BrowserContext:
 
 		try:
 			await self.remove_highlights()
-			dom_service = DomService(page)
+			# Drop per page caches of closed pages
+			open_pages = {id(p) for p in session.context.pages}
+			for cache in (self._dom_snapshots, self._state_screenshots, self._cdp_sessions):
+				for page_key in [key for key in cache if key not in open_pages]:
+					del cache[page_key]
+			if self.config.incremental_dom_snapshots:
+				dom_service = DomService(
+					page, snapshot_cache=self._dom_snapshots, snapshot_max_age=self.config.dom_snapshot_max_age
+				)
+			else:
+				dom_service = DomService(page)
 			content = await dom_service.get_clickable_elements(
 				focus_element=focus_element,
 				viewport_expansion=self.config.viewport_expansion,
@@ -941,7 +1086,7 @@ class BrowserContext:
 			# 		)
 			# 	)
 
-			screenshot_b64 = await self.take_screenshot()
+			screenshot_b64 = await self._take_state_screenshot(page)
 			pixels_above, pixels_below = await self.get_scroll_info(page)
 
 			self.current_state = BrowserState(
@@ -964,10 +1109,74 @@ class BrowserContext:
 			raise
 
 	# region - Browser Actions
+	@time_execution_async('--take_state_screenshot')
+	async def _take_state_screenshot(self, page: Page) -> str:
+		"""
+		Base64 screenshot for the browser state (LLM vision input), encoded as configured by screenshot_*.
+
+		The page was already waited for by get_state, and is only brought to front when it changed.
+		Always captured: an unchanged DOM does not mean unchanged pixels (typed values, focus, canvas).
+		"""
+		page_key = id(page)
+		previous = self._state_screenshots.get(page_key)
+
+		if self._front_page_key != page_key:
+			await page.bring_to_front()
+			self._front_page_key = page_key
+
+		screenshot_b64 = await self._capture_viewport(page)
+		digest = hashlib.sha1(screenshot_b64.encode('ascii')).digest()
+		if previous is not None and previous.digest == digest:
+			# Share the previous string so identical steps do not hold another copy in the history
+			screenshot_b64 = previous.screenshot
+		self._state_screenshots[page_key] = StateScreenshot(digest=digest, screenshot=screenshot_b64)
+		return screenshot_b64
+
+	async def _capture_viewport(self, page: Page) -> str:
+		"""Captures the viewport as base64 in screenshot_format, downscaled to screenshot_max_size"""
+		image_format = self.config.screenshot_format
+		max_size = self.config.screenshot_max_size
+		if image_format == 'png' and not max_size:
+			screenshot = await page.screenshot(animations='disabled')
+			return base64.b64encode(screenshot).decode('utf-8')
+
+		try:
+			cdp_session = self._cdp_sessions.get(id(page))
+			if cdp_session is None:
+				cdp_session = self._cdp_sessions[id(page)] = await page.context.new_cdp_session(page)
+		except Exception as e:
+			# Not Chromium: Playwright can encode jpeg but not webp, and cannot downscale
+			logger.debug(f'CDP not available for screenshots ({e}), using Playwright')
+			screenshot = await page.screenshot(
+				animations='disabled',
+				type='png' if image_format == 'png' else 'jpeg',
+				quality=None if image_format == 'png' else self.config.screenshot_quality,
+			)
+			return base64.b64encode(screenshot).decode('utf-8')
+
+		metrics = await cdp_session.send('Page.getLayoutMetrics')
+		viewport = metrics.get('cssVisualViewport') or metrics['visualViewport']
+		width, height = viewport['clientWidth'], viewport['clientHeight']
+		# visualViewport is in device pixels, cssVisualViewport in CSS pixels
+		device_scale = metrics['visualViewport']['clientWidth'] / width if 'cssVisualViewport' in metrics and width else 1
+		scale = 1.0
+		if max_size and max(width, height) * device_scale > max_size:
+			scale = max_size / (max(width, height) * device_scale)
+
+		params = {
+			'format': image_format,
+			'clip': {'x': viewport['pageX'], 'y': viewport['pageY'], 'width': width, 'height': height, 'scale': scale},
+			'captureBeyondViewport': False,
+		}
+		if image_format != 'png':
+			params['quality'] = self.config.screenshot_quality
+		result = await cdp_session.send('Page.captureScreenshot', params)
+		return result['data']
+
 	@time_execution_async('--take_screenshot')
 	async def take_screenshot(self, full_page: bool = False) -> str:
 		"""
-		Returns a base64 encoded screenshot of the current page.
+		Returns a base64 encoded full resolution PNG screenshot of the current page (for evidence).
 		"""
 		page = await self.get_current_page()
 
@@ -1447,6 +1656,7 @@ class BrowserContext:
 
 		self.active_tab = page
 		await page.bring_to_front()
+		self._front_page_key = id(page)
 		await page.wait_for_load_state()
 
 	@time_execution_async('--create_new_tab')
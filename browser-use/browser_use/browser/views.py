@@ -1,3 +1,4 @@
+import base64
 from dataclasses import dataclass, field
 from typing import Any, Optional
 
@@ -27,6 +28,15 @@ class UngroupTabsAction(BaseModel):
 	tab_ids: list[int]
 
 
+def screenshot_media_type(screenshot_b64: str) -> str:
+	"""Media type of a base64 screenshot, from its magic bytes (state screenshots may be png, jpeg or webp)"""
+	if screenshot_b64.startswith('/9j/'):
+		return 'image/jpeg'
+	if screenshot_b64.startswith('UklGR'):
+		return 'image/webp'
+	return 'image/png'
+
+
 @dataclass
 class BrowserState(DOMState):
 	url: str
@@ -45,11 +55,33 @@ class BrowserStateHistory:
 	tabs: list[TabInfo]
 	interacted_element: list[DOMHistoryElement | None] | list[None]
 	screenshot: Optional[str] = None
+	# Set instead of screenshot when the image was written to a ScreenshotStore
+	screenshot_path: Optional[str] = None
+
+	def get_screenshot_bytes(self) -> Optional[bytes]:
+		"""Image bytes, read from screenshot_path on demand"""
+		if self.screenshot is not None:
+			return base64.b64decode(self.screenshot)
+		if self.screenshot_path is not None:
+			try:
+				with open(self.screenshot_path, 'rb') as f:
+					return f.read()
+			except OSError:
+				return None
+		return None
+
+	def get_screenshot(self) -> Optional[str]:
+		"""Base64 screenshot, read from screenshot_path on demand"""
+		if self.screenshot is not None:
+			return self.screenshot
+		data = self.get_screenshot_bytes()
+		return base64.b64encode(data).decode('utf-8') if data is not None else None
 
 	def to_dict(self) -> dict[str, Any]:
 		data = {}
 		data['tabs'] = [tab.model_dump() for tab in self.tabs]
 		data['screenshot'] = self.screenshot
+		data['screenshot_path'] = self.screenshot_path
 		data['interacted_element'] = [el.to_dict() if el else None for el in self.interacted_element]
 		data['url'] = self.url
 		data['title'] = self.title
@@ -4,9 +4,13 @@
     focusHighlightIndex: -1,
     viewportExpansion: 0,
     debugMode: false,
+    incremental: false,
+    previousToken: null,
   }
 ) => {
   const { doHighlightElements, focusHighlightIndex, viewportExpansion, debugMode } = args;
+  const incremental = !!args.incremental;
+  const previousToken = args.previousToken || null;
   let highlightIndex = 0; // Reset highlight index
 
   // Add timing stack to handle recursion
@@ -187,6 +191,82 @@
 
   const HIGHLIGHT_CONTAINER_ID = "playwright-highlight-container";
 
+  // Events that change what is visible without a DOM mutation: layout (scroll, resize, transitions),
+  // form properties (typed values, :checked), and CSS-only state (:hover, :focus-within, :target)
+  const TRACKED_EVENTS = [
+    "scroll", "resize", "transitionend", "animationend",
+    "input", "change", "focusin", "focusout",
+    "pointerover", "pointerout", "click", "hashchange",
+  ];
+
+  /**
+   * Change tracker kept on the window between calls (incremental mode).
+   *
+   * A MutationObserver (plus TRACKED_EVENTS listeners, since those change visibility
+   * or element state without touching the DOM) bumps `generation` whenever the page changes.
+   * If nothing changed since the previous snapshot, the caller can reuse it as-is.
+   * Mutations made by our own highlight overlays are ignored.
+   */
+  function isOwnMutation(record) {
+    if (record.type === "attributes" && record.attributeName === "browser-user-highlight-id") return true;
+    const isOverlayNode = (n) => n && (n.id === HIGHLIGHT_CONTAINER_ID || !!(n.closest && n.closest(`#${HIGHLIGHT_CONTAINER_ID}`)));
+    const target = record.target.nodeType === Node.ELEMENT_NODE ? record.target : record.target.parentElement;
+    if (isOverlayNode(target)) return true;
+    if (record.type === "childList") {
+      const nodes = [...record.addedNodes, ...record.removedNodes];
+      return nodes.length > 0 && nodes.every((n) => n.id === HIGHLIGHT_CONTAINER_ID);
+    }
+    return false;
+  }
+
+  function getSnapshotTracker() {
+    let tracker = window.__browserUseDomTracker;
+    if (tracker) {
+      // Deliver pending records before comparing generations
+      tracker.onMutations(tracker.observer.takeRecords());
+      return tracker;
+    }
+    tracker = {
+      token: Math.random().toString(36).slice(2),
+      generation: 0,
+      highlighted: [],
+      observedRoots: new WeakSet(),
+    };
+    tracker.bump = () => { tracker.generation++; };
+    tracker.onMutations = (records) => {
+      if (records.some((r) => !isOwnMutation(r))) tracker.bump();
+    };
+    tracker.observer = new MutationObserver(tracker.onMutations);
+    for (const eventName of TRACKED_EVENTS) {
+      window.addEventListener(eventName, tracker.bump, { capture: true, passive: true });
+    }
+    window.__browserUseDomTracker = tracker;
+    return tracker;
+  }
+
+  const SNAPSHOT_TRACKER = incremental ? getSnapshotTracker() : null;
+
+  /**
+   * Observes a document, shadow root or iframe document (observers do not cross those boundaries).
+   */
+  function observeRoot(root) {
+    if (!SNAPSHOT_TRACKER || !root || SNAPSHOT_TRACKER.observedRoots.has(root)) return;
+    try {
+      SNAPSHOT_TRACKER.observer.observe(root, { subtree: true, childList: true, attributes: true, characterData: true });
+      SNAPSHOT_TRACKER.observedRoots.add(root);
+      const view = root.defaultView;
+      if (view && view !== window) {
+        for (const eventName of TRACKED_EVENTS) {
+          view.addEventListener(eventName, SNAPSHOT_TRACKER.bump, { capture: true, passive: true });
+        }
+      }
+    } catch (e) {
+      // Cross-origin roots cannot be observed; they are not traversed either
+    }
+  }
+
+  const HIGHLIGHTED_ELEMENTS = [];
+
   /**
    * Highlights an element in the DOM and returns the index of the next element.
    */
@@ -984,6 +1064,7 @@
           if (nodeData.isInteractive) {
             nodeData.isInViewport = true;
             nodeData.highlightIndex = highlightIndex++;
+            if (SNAPSHOT_TRACKER) HIGHLIGHTED_ELEMENTS.push([node, nodeData.highlightIndex, parentIframe]);
 
             if (doHighlightElements) {
               if (focusHighlightIndex >= 0) {
@@ -1008,6 +1089,7 @@
         try {
           const iframeDoc = node.contentDocument || node.contentWindow?.document;
           if (iframeDoc) {
+            observeRoot(iframeDoc);
             for (const child of iframeDoc.childNodes) {
               const domElement = buildDomTree(child, node);
               if (domElement) nodeData.children.push(domElement);
@@ -1035,6 +1117,7 @@
         // Handle shadow DOM
         if (node.shadowRoot) {
           nodeData.shadowRoot = true;
+          observeRoot(node.shadowRoot);
           for (const child of node.shadowRoot.childNodes) {
             const domElement = buildDomTree(child, parentIframe);
             if (domElement) nodeData.children.push(domElement);
@@ -1070,6 +1153,22 @@
   isTextNodeVisible = measureTime(isTextNodeVisible);
   getEffectiveScroll = measureTime(getEffectiveScroll);
 
+  if (SNAPSHOT_TRACKER) {
+    const token = `${SNAPSHOT_TRACKER.token}:${SNAPSHOT_TRACKER.generation}`;
+    if (previousToken === token) {
+      // Nothing changed: only redraw the highlights removed since the previous step
+      if (doHighlightElements && !document.getElementById(HIGHLIGHT_CONTAINER_ID)) {
+        for (const [element, index, parentIframe] of SNAPSHOT_TRACKER.highlighted) {
+          if (focusHighlightIndex < 0 || focusHighlightIndex === index) {
+            highlightElement(element, index, parentIframe);
+          }
+        }
+      }
+      return { unchanged: true, token };
+    }
+    observeRoot(document);
+  }
+
   const rootId = buildDomTree(document.body);
 
   // Clear the cache before starting
@@ -1125,7 +1224,13 @@
     }
   }
 
+  let token = null;
+  if (SNAPSHOT_TRACKER) {
+    SNAPSHOT_TRACKER.highlighted = HIGHLIGHTED_ELEMENTS;
+    token = `${SNAPSHOT_TRACKER.token}:${SNAPSHOT_TRACKER.generation}`;
+  }
+
   return debugMode ?
-    { rootId, map: DOM_HASH_MAP, perfMetrics: PERF_METRICS } :
-    { rootId, map: DOM_HASH_MAP };
+    { rootId, map: DOM_HASH_MAP, token, perfMetrics: PERF_METRICS } :
+    { rootId, map: DOM_HASH_MAP, token };
 };
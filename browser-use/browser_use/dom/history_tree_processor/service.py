@@ -4,6 +4,8 @@ from typing import Optional
 from browser_use.dom.history_tree_processor.view import DOMHistoryElement, HashedDomElement
 from browser_use.dom.views import DOMElementNode
 
+HashIndex = dict[tuple[str, str, str], DOMElementNode]
+
 
 class HistoryTreeProcessor:
 	""" "
@@ -32,22 +34,45 @@ class HistoryTreeProcessor:
 		)
 
 	@staticmethod
-	def find_history_element_in_tree(dom_history_element: DOMHistoryElement, tree: DOMElementNode) -> Optional[DOMElementNode]:
-		hashed_dom_history_element = HistoryTreeProcessor._hash_dom_history_element(dom_history_element)
+	def find_history_element_in_tree(
+		dom_history_element: DOMHistoryElement, tree: DOMElementNode, hash_index: Optional[HashIndex] = None
+	) -> Optional[DOMElementNode]:
+		"""Pass the `build_hash_index(tree)` result to reuse it across lookups in the same state"""
+		hashed = HistoryTreeProcessor._hash_dom_history_element(dom_history_element)
+		if hash_index is None:
+			hash_index = HistoryTreeProcessor.build_hash_index(tree)
+		return hash_index.get((hashed.branch_path_hash, hashed.attributes_hash, hashed.xpath_hash))
 
-		def process_node(node: DOMElementNode):
+	@staticmethod
+	def build_hash_index(tree: DOMElementNode) -> HashIndex:
+		"""
+		Maps the hashes of every highlighted element to the element (first in document order wins,
+		as in a tree walk). Parent branch paths are hashed top-down by extending a copy of the parent's
+		running sha256, instead of walking to the root for every element.
+		"""
+		hash_index: HashIndex = {}
+		# (node, running hash of its branch path); the root itself is not part of any branch path
+		stack: list[tuple[DOMElementNode, Optional['hashlib._Hash']]] = [(tree, None)]
+		while stack:
+			node, path_hasher = stack.pop()
 			if node.highlight_index is not None:
-				hashed_node = HistoryTreeProcessor._hash_dom_element(node)
-				if hashed_node == hashed_dom_history_element:
-					return node
-			for child in node.children:
+				branch_path_hash = (path_hasher or hashlib.sha256()).hexdigest()
+				hashed = HashedDomElement(
+					branch_path_hash,
+					HistoryTreeProcessor._attributes_hash(node.attributes),
+					HistoryTreeProcessor._xpath_hash(node.xpath),
+				)
+				node._hash = hashed
+				hash_index.setdefault((hashed.branch_path_hash, hashed.attributes_hash, hashed.xpath_hash), node)
+			for child in reversed(node.children):
 				if isinstance(child, DOMElementNode):
-					result = process_node(child)
-					if result is not None:
-						return result
-			return None
-
-		return process_node(tree)
+					if path_hasher is None:
+						child_hasher = hashlib.sha256(child.tag_name.encode())
+					else:
+						child_hasher = path_hasher.copy()
+						child_hasher.update(f'/{child.tag_name}'.encode())
+					stack.append((child, child_hasher))
+		return hash_index
 
 	@staticmethod
 	def compare_history_element_and_dom_element(dom_history_element: DOMHistoryElement, dom_element: DOMElementNode) -> bool:
@@ -1,6 +1,7 @@
 import gc
 import json
 import logging
+import time
 from dataclasses import dataclass
 from importlib import resources
 from typing import TYPE_CHECKING, Optional
@@ -27,10 +28,28 @@ class ViewportInfo:
 	height: int
 
 
+@dataclass
+class DOMSnapshot:
+	"""Last DOM state built for a page, reusable while the page reports no changes"""
+
+	token: str
+	args_key: tuple
+	created_at: float
+	state: DOMState
+
+
 class DomService:
-	def __init__(self, page: 'Page'):
+	def __init__(self, page: 'Page', snapshot_cache: dict[int, DOMSnapshot] | None = None, snapshot_max_age: float = 30.0):
+		"""
+		snapshot_cache: per-context dict (keyed by page) enabling incremental mode. When given, the injected
+			script tracks DOM changes with a MutationObserver and the previous state is reused if the page
+			has not changed since, skipping the tree transfer and reconstruction.
+		snapshot_max_age: seconds after which a snapshot is rebuilt even if no change was observed
+		"""
 		self.page = page
 		self.xpath_cache = {}
+		self.snapshot_cache = snapshot_cache
+		self.snapshot_max_age = snapshot_max_age
 
 		self.js_code = resources.files('browser_use.dom').joinpath('buildDomTree.js').read_text()
 
@@ -42,9 +61,48 @@ class DomService:
 		focus_element: int = -1,
 		viewport_expansion: int = 0,
 	) -> DOMState:
+		if self.snapshot_cache is not None:
+			return await self._get_incremental_state(highlight_elements, focus_element, viewport_expansion)
 		element_tree, selector_map = await self._build_dom_tree(highlight_elements, focus_element, viewport_expansion)
 		return DOMState(element_tree=element_tree, selector_map=selector_map)
 
+	async def _get_incremental_state(
+		self,
+		highlight_elements: bool,
+		focus_element: int,
+		viewport_expansion: int,
+	) -> DOMState:
+		page_key = id(self.page)
+		args_key = (highlight_elements, focus_element, viewport_expansion)
+		snapshot = self.snapshot_cache.get(page_key)
+		if snapshot is not None and (
+			snapshot.args_key != args_key or time.monotonic() - snapshot.created_at > self.snapshot_max_age
+		):
+			snapshot = None
+
+		eval_page = await self._evaluate_dom_script(
+			highlight_elements,
+			focus_element,
+			viewport_expansion,
+			incremental=True,
+			previous_token=snapshot.token if snapshot else None,
+		)
+		if eval_page is None:
+			self.snapshot_cache.pop(page_key, None)
+			return DOMState(element_tree=self._empty_body(), selector_map={})
+
+		if snapshot is not None and eval_page.get('unchanged'):
+			logger.debug('DOM unchanged since last step, reusing snapshot for %s', self.page.url)
+			return snapshot.state
+
+		element_tree, selector_map = await self._construct_dom_tree(eval_page)
+		state = DOMState(element_tree=element_tree, selector_map=selector_map)
+		if eval_page.get('token'):
+			self.snapshot_cache[page_key] = DOMSnapshot(
+				token=eval_page['token'], args_key=args_key, created_at=time.monotonic(), state=state
+			)
+		return state
+
 	@time_execution_async('--get_cross_origin_iframes')
 	async def get_cross_origin_iframes(self) -> list[str]:
 		# invisible cross-origin iframes are used for ads and tracking, dont open those
@@ -63,6 +121,17 @@ class DomService:
 			and not is_ad_url(frame.url)  # exclude most common ad network tracker frame URLs
 		]
 
+	@staticmethod
+	def _empty_body() -> DOMElementNode:
+		return DOMElementNode(
+			tag_name='body',
+			xpath='',
+			attributes={},
+			children=[],
+			is_visible=False,
+			parent=None,
+		)
+
 	@time_execution_async('--build_dom_tree')
 	async def _build_dom_tree(
 		self,
@@ -70,22 +139,26 @@ class DomService:
 		focus_element: int,
 		viewport_expansion: int,
 	) -> tuple[DOMElementNode, SelectorMap]:
+		eval_page = await self._evaluate_dom_script(highlight_elements, focus_element, viewport_expansion)
+		if eval_page is None:
+			return self._empty_body(), {}
+		return await self._construct_dom_tree(eval_page)
+
+	async def _evaluate_dom_script(
+		self,
+		highlight_elements: bool,
+		focus_element: int,
+		viewport_expansion: int,
+		incremental: bool = False,
+		previous_token: str | None = None,
+	) -> Optional[dict]:
+		"""Runs buildDomTree.js on the page; returns None for about:blank"""
 		if await self.page.evaluate('1+1') != 2:
 			raise ValueError('The page cannot evaluate javascript code properly')
 
 		if self.page.url == 'about:blank':
 			# short-circuit if the page is a new empty tab for speed, no need to inject buildDomTree.js
-			return (
-				DOMElementNode(
-					tag_name='body',
-					xpath='',
-					attributes={},
-					children=[],
-					is_visible=False,
-					parent=None,
-				),
-				{},
-			)
+			return None
 
 		# NOTE: We execute JS code in the browser to extract important DOM information.
 		#       The returned hash map contains information about the DOM tree and the
@@ -96,6 +169,8 @@ class DomService:
 			'focusHighlightIndex': focus_element,
 			'viewportExpansion': viewport_expansion,
 			'debugMode': debug_mode,
+			'incremental': incremental,
+			'previousToken': previous_token,
 		}
 
 		try:
@@ -112,7 +187,7 @@ class DomService:
 				json.dumps(eval_page['perfMetrics'], indent=2),
 			)
 
-		return await self._construct_dom_tree(eval_page)
+		return eval_page
 
 	@time_execution_async('--construct_dom_tree')
 	async def _construct_dom_tree(
@@ -125,6 +200,24 @@ class DomService:
 		selector_map = {}
 		node_map = {}
 
+		# The nodes form parent/child cycles, so each allocation batch would trigger cyclic GC passes that
+		# find nothing to free; pause automatic collection while building (no forced collection afterwards)
+		gc_was_enabled = gc.isenabled()
+		gc.disable()
+		try:
+			self._link_nodes(js_node_map, node_map, selector_map)
+		finally:
+			if gc_was_enabled:
+				gc.enable()
+
+		html_to_dict = node_map.get(str(js_root_id))
+
+		if html_to_dict is None or not isinstance(html_to_dict, DOMElementNode):
+			raise ValueError('Failed to parse HTML to dictionary')
+
+		return html_to_dict, selector_map
+
+	def _link_nodes(self, js_node_map: dict, node_map: dict, selector_map: SelectorMap) -> None:
 		for id, node_data in js_node_map.items():
 			node, children_ids = self._parse_node(node_data)
 			if node is None:
@@ -147,19 +240,6 @@ class DomService:
 					child_node.parent = node
 					node.children.append(child_node)
 
-		html_to_dict = node_map[str(js_root_id)]
-
-		del node_map
-		del js_node_map
-		del js_root_id
-
-		gc.collect()
-
-		if html_to_dict is None or not isinstance(html_to_dict, DOMElementNode):
-			raise ValueError('Failed to parse HTML to dictionary')
-
-		return html_to_dict, selector_map
-
 	def _parse_node(
 		self,
 		node_data: dict,
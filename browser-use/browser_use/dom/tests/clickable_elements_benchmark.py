@@ -0,0 +1,67 @@
+"""
+Benchmark of DOMElementNode.clickable_elements_to_string against the previous recursive implementation.
+
+Usage (from the browser-use directory):
+	python -m browser_use.dom.tests.clickable_elements_benchmark [dom.json ...]
+
+The optional arguments are DOM captures as written by process_dom_test.py (the raw buildDomTree.js
+result, {"rootId": ..., "map": {...}}). Without arguments, synthetic wide and deep trees are used.
+The previous implementation and the synthetic trees live in tests/test_clickable_elements.py, which
+checks in CI that both implementations produce identical output; every case here checks it again before
+timing them.
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+from browser_use.dom.views import DOMElementNode
+from tests.test_clickable_elements import (
+	INCLUDE_ATTRIBUTES,
+	build_deep_tree,
+	build_wide_tree,
+	legacy_clickable_elements_to_string,
+)
+
+
+def load_fixture(path: str) -> DOMElementNode:
+	from browser_use.dom.service import DomService
+
+	with open(path, 'r') as f:
+		eval_page = json.load(f)
+	element_tree, _ = asyncio.run(DomService(page=None)._construct_dom_tree(eval_page))  # type: ignore[arg-type]
+	return element_tree
+
+
+def _time(fn, repeat: int) -> float:
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def run_case(name: str, root: DOMElementNode, repeat: int = 5) -> None:
+	expected = legacy_clickable_elements_to_string(root, INCLUDE_ATTRIBUTES)
+	actual = root.clickable_elements_to_string(INCLUDE_ATTRIBUTES)
+	assert actual == expected, f'{name}: output differs from the previous implementation'
+
+	legacy = _time(lambda: legacy_clickable_elements_to_string(root, INCLUDE_ATTRIBUTES), repeat)
+	current = _time(lambda: root.clickable_elements_to_string(INCLUDE_ATTRIBUTES), repeat)
+	print(f'{name:<30} legacy {legacy * 1000:9.1f} ms   single-pass {current * 1000:9.1f} ms   x{legacy / current:5.1f}')
+
+
+def main(paths: list[str]) -> None:
+	sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+	if paths:
+		for path in paths:
+			run_case(path, load_fixture(path))
+	else:
+		run_case('synthetic wide (10k nodes)', build_wide_tree())
+		run_case('synthetic deep (depth 300)', build_deep_tree())
+
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
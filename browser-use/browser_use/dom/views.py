@@ -1,5 +1,4 @@
-from dataclasses import dataclass
-from functools import cached_property
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Dict, List, Optional
 
 from browser_use.dom.history_tree_processor.view import CoordinateSet, HashedDomElement, ViewportInfo
@@ -10,14 +9,16 @@ if TYPE_CHECKING:
 	from .views import DOMElementNode
 
 
-@dataclass(frozen=False)
+# DOM nodes use __slots__ (no per-instance __dict__) and identity equality: a page can produce tens of
+# thousands of nodes per step, and field-by-field equality would recurse through parent/children.
+@dataclass(frozen=False, slots=True, eq=False)
 class DOMBaseNode:
 	is_visible: bool
 	# Use None as default and set parent later to avoid circular reference issues
 	parent: Optional['DOMElementNode']
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True, eq=False)
 class DOMTextNode(DOMBaseNode):
 	text: str
 	type: str = 'TEXT_NODE'
@@ -43,7 +44,7 @@ class DOMTextNode(DOMBaseNode):
 		return self.parent.is_top_element
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True, eq=False)
 class DOMElementNode(DOMBaseNode):
 	"""
 	xpath: the xpath of the element from the last root node (shadow root or iframe OR document if no shadow root or iframe).
@@ -62,6 +63,7 @@ class DOMElementNode(DOMBaseNode):
 	viewport_coordinates: Optional[CoordinateSet] = None
 	page_coordinates: Optional[CoordinateSet] = None
 	viewport_info: Optional[ViewportInfo] = None
+	_hash: Optional[HashedDomElement] = field(default=None, init=False, repr=False)
 
 	def __repr__(self) -> str:
 		tag_str = f'<{self.tag_name}'
@@ -89,13 +91,15 @@ class DOMElementNode(DOMBaseNode):
 
 		return tag_str
 
-	@cached_property
+	@property
 	def hash(self) -> HashedDomElement:
-		from browser_use.dom.history_tree_processor.service import (
-			HistoryTreeProcessor,
-		)
+		if self._hash is None:
+			from browser_use.dom.history_tree_processor.service import (
+				HistoryTreeProcessor,
+			)
 
-		return HistoryTreeProcessor._hash_dom_element(self)
+			self._hash = HistoryTreeProcessor._hash_dom_element(self)
+		return self._hash
 
 	def get_all_text_till_next_clickable_element(self, max_depth: int = -1) -> str:
 		text_parts = []
@@ -119,49 +123,66 @@ class DOMElementNode(DOMBaseNode):
 
 	@time_execution_sync('--clickable_elements_to_string')
 	def clickable_elements_to_string(self, include_attributes: list[str] | None = None) -> str:
-		"""Convert the processed DOM content to HTML."""
-		formatted_text = []
-
-		def process_node(node: DOMBaseNode, depth: int) -> None:
-			if isinstance(node, DOMElementNode):
-				# Add element with highlight_index
-				if node.highlight_index is not None:
-					attributes_str = ''
-					text = node.get_all_text_till_next_clickable_element()
-					if include_attributes:
-						attributes = list(
-							set(
-								[
-									str(value)
-									for key, value in node.attributes.items()
-									if key in include_attributes and value != node.tag_name
-								]
-							)
-						)
-						if text in attributes:
-							attributes.remove(text)
-						attributes_str = ';'.join(attributes)
-					line = f'[{node.highlight_index}]<{node.tag_name} '
-					if attributes_str:
-						line += f'{attributes_str}'
-					if text:
-						if attributes_str:
-							line += f'>{text}'
-						else:
-							line += f'{text}'
-					line += '/>'
-					formatted_text.append(line)
-
-				# Process children regardless
-				for child in node.children:
-					process_node(child, depth + 1)
-
-			elif isinstance(node, DOMTextNode):
-				# Add text only if it doesn't have a highlighted parent
-				if not node.has_parent_with_highlight_index() and node.is_visible:  # and node.is_parent_top_element()
-					formatted_text.append(f'{node.text}')
+		"""Convert the processed DOM content to HTML.
+
+		Single pre-order pass: each node carries the text buffer of its nearest highlighted ancestor, so
+		text is collected for every highlighted element and free text is filtered without re-walking
+		subtrees or ancestor chains (same output as calling get_all_text_till_next_clickable_element()
+		per element and has_parent_with_highlight_index() per text node).
+		"""
+		formatted_text: list[str] = []
+		# (line index in formatted_text, element, its collected text parts)
+		highlighted: list[tuple[int, DOMElementNode, list[str]]] = []
+
+		# Text outside highlighted elements is only emitted if no ancestor above self is highlighted either
+		ancestor = self.parent
+		while ancestor is not None and ancestor.highlight_index is None:
+			ancestor = ancestor.parent
+		outside_highlight = ancestor is None
+
+		def process_node(node: DOMElementNode, owner_text: list[str] | None) -> None:
+			if node.highlight_index is not None:
+				owner_text = []
+				highlighted.append((len(formatted_text), node, owner_text))
+				formatted_text.append('')  # filled in once its text is collected
+			for child in node.children:
+				if isinstance(child, DOMTextNode):
+					if owner_text is not None:
+						owner_text.append(child.text)
+					elif outside_highlight and child.is_visible:
+						formatted_text.append(f'{child.text}')
+				elif isinstance(child, DOMElementNode):
+					process_node(child, owner_text)
+
+		process_node(self, None)
+
+		for line_index, node, text_parts in highlighted:
+			text = '\n'.join(text_parts).strip()
+			attributes_str = ''
+			if include_attributes:
+				attributes = list(
+					set(
+						[
+							str(value)
+							for key, value in node.attributes.items()
+							if key in include_attributes and value != node.tag_name
+						]
+					)
+				)
+				if text in attributes:
+					attributes.remove(text)
+				attributes_str = ';'.join(attributes)
+			line = f'[{node.highlight_index}]<{node.tag_name} '
+			if attributes_str:
+				line += f'{attributes_str}'
+			if text:
+				if attributes_str:
+					line += f'>{text}'
+				else:
+					line += f'{text}'
+			line += '/>'
+			formatted_text[line_index] = line
 
-		process_node(self, 0)
 		return '\n'.join(formatted_text)
 
 	def get_file_upload_element(self, check_siblings: bool = True) -> Optional['DOMElementNode']:
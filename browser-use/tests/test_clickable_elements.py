@@ -0,0 +1,174 @@
+"""
+DOMElementNode.clickable_elements_to_string must produce the same output as the previous recursive
+implementation, which re-walked each highlighted subtree and each text node's ancestors.
+
+The tree builders are shared with browser_use/dom/tests/clickable_elements_benchmark.py.
+"""
+
+import random
+
+import pytest
+
+from browser_use.dom.views import DOMBaseNode, DOMElementNode, DOMTextNode
+
+INCLUDE_ATTRIBUTES = ['title', 'type', 'name', 'role', 'tabindex', 'aria-label', 'placeholder', 'value', 'alt']
+
+
+def legacy_clickable_elements_to_string(root: DOMElementNode, include_attributes: list[str] | None = None) -> str:
+	"""Previous implementation: re-walks each highlighted subtree and each text node's ancestors"""
+
+	def has_parent_with_highlight_index(node: DOMTextNode) -> bool:
+		current = node.parent
+		while current is not None:
+			if current.highlight_index is not None:
+				return True
+			current = current.parent
+		return False
+
+	def get_all_text_till_next_clickable_element(element: DOMElementNode) -> str:
+		text_parts = []
+
+		def collect_text(node: DOMBaseNode) -> None:
+			if isinstance(node, DOMElementNode) and node is not element and node.highlight_index is not None:
+				return
+			if isinstance(node, DOMTextNode):
+				text_parts.append(node.text)
+			elif isinstance(node, DOMElementNode):
+				for child in node.children:
+					collect_text(child)
+
+		collect_text(element)
+		return '\n'.join(text_parts).strip()
+
+	formatted_text = []
+
+	def process_node(node: DOMBaseNode) -> None:
+		if isinstance(node, DOMElementNode):
+			if node.highlight_index is not None:
+				attributes_str = ''
+				text = get_all_text_till_next_clickable_element(node)
+				if include_attributes:
+					attributes = list(
+						set(
+							[
+								str(value)
+								for key, value in node.attributes.items()
+								if key in include_attributes and value != node.tag_name
+							]
+						)
+					)
+					if text in attributes:
+						attributes.remove(text)
+					attributes_str = ';'.join(attributes)
+				line = f'[{node.highlight_index}]<{node.tag_name} '
+				if attributes_str:
+					line += f'{attributes_str}'
+				if text:
+					if attributes_str:
+						line += f'>{text}'
+					else:
+						line += f'{text}'
+				line += '/>'
+				formatted_text.append(line)
+			for child in node.children:
+				process_node(child)
+		elif isinstance(node, DOMTextNode):
+			if not has_parent_with_highlight_index(node) and node.is_visible:
+				formatted_text.append(f'{node.text}')
+
+	process_node(root)
+	return '\n'.join(formatted_text)
+
+
+def _element(tag: str, parent: DOMElementNode | None, highlight_index: int | None = None, **attributes) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name=tag,
+		xpath='',
+		attributes=attributes,
+		children=[],
+		is_visible=True,
+		parent=parent,
+		highlight_index=highlight_index,
+	)
+	if parent is not None:
+		parent.children.append(node)
+	return node
+
+
+def _text(text: str, parent: DOMElementNode, is_visible: bool = True) -> None:
+	parent.children.append(DOMTextNode(text=text, is_visible=is_visible, parent=parent))
+
+
+def build_wide_tree(sections: int = 400, items_per_section: int = 25, seed: int = 1) -> DOMElementNode:
+	"""Listing-like page: many sibling cards with links, buttons and free text"""
+	rng = random.Random(seed)
+	index = 0
+	root = _element('body', None)
+	for s in range(sections):
+		section = _element('div', root, role='region')
+		_text(f'Section {s}', _element('h2', section))
+		for i in range(items_per_section):
+			card = _element('div', section)
+			if rng.random() < 0.4:
+				link = _element('a', card, index, title=f'item {s}-{i}', href='#')
+				index += 1
+				_text(f'Item {s}-{i}', _element('span', link))
+				_text('details', link, is_visible=rng.random() < 0.8)
+			else:
+				_text(f'Description {s}-{i}', _element('p', card), is_visible=rng.random() < 0.9)
+	return root
+
+
+def build_deep_tree(depth: int = 300, branches: int = 30) -> DOMElementNode:
+	"""
+	Deeply nested wrappers (framework-generated markup) with free text at every level and a few
+	highlighted branches; free text deep in the tree is where ancestor walks become quadratic
+	"""
+	index = 0
+	root = _element('body', None)
+	for b in range(branches):
+		node = root
+		for level in range(depth):
+			node = _element('div', node)
+			if b % 5 == 0 and level % 50 == 49:
+				node.highlight_index = index
+				node.attributes = {'role': 'button', 'aria-label': f'wrapper {b}-{level}'}
+				index += 1
+			_text(f'label {b}-{level}', node)
+		button = _element('button', node, index, type='button')
+		index += 1
+		_text(f'Button {b}', button)
+	return root
+
+
+def build_edge_case_tree() -> DOMElementNode:
+	"""Nested highlighted elements, text equal to an attribute, attributes equal to the tag and empty elements"""
+	root = _element('body', None)
+	_text('  leading free text  ', root)
+	_text('hidden free text', root, is_visible=False)
+	form = _element('form', root, 0, role='form', name='login')
+	_text('Sign in', _element('legend', form))
+	field = _element('input', form, 1, type='text', placeholder='User', value='User')
+	_text('User', field)
+	button = _element('button', form, 2, type='button', role='button')
+	_text('Send', _element('span', button))
+	_element('a', button, 3, title='a')
+	_text('hidden inside a highlighted element', form, is_visible=False)
+	_element('img', root, 4, alt='')
+	_text('trailing free text', _element('footer', root))
+	return root
+
+
+@pytest.mark.parametrize(
+	'build_tree',
+	[
+		lambda: build_wide_tree(sections=40),
+		lambda: build_deep_tree(depth=120, branches=10),
+		build_edge_case_tree,
+	],
+	ids=['wide', 'deep', 'edge-cases'],
+)
+@pytest.mark.parametrize('include_attributes', [None, [], INCLUDE_ATTRIBUTES], ids=['none', 'empty', 'default'])
+def test_clickable_elements_to_string_matches_legacy(build_tree, include_attributes):
+	root = build_tree()
+	assert root.clickable_elements_to_string(include_attributes) == legacy_clickable_elements_to_string(root, include_attributes)
@@ -0,0 +1,69 @@
+"""
+HistoryTreeProcessor.build_hash_index hashes every highlighted element top-down in a single walk and
+must agree with _hash_dom_element, which hashes each element on its own by walking to the root.
+"""
+
+import random
+
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+TAGS = ['div', 'section', 'ul', 'li', 'a', 'button', 'span', 'form', 'input']
+
+
+def build_random_tree(nodes: int = 2000, seed: int = 1) -> DOMElementNode:
+	"""Random tree with repeated tags, repeated attributes and some identical sibling elements"""
+	rng = random.Random(seed)
+	root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=True, parent=None)
+	elements = [root]
+	highlight_index = 0
+	for i in range(nodes):
+		parent = rng.choice(elements)
+		tag = rng.choice(TAGS)
+		attributes = {'class': f'c{rng.randrange(5)}'} if rng.random() < 0.7 else {}
+		if rng.random() < 0.3:
+			attributes['aria-label'] = f'label {rng.randrange(10)}'
+		node = DOMElementNode(
+			tag_name=tag,
+			# Duplicate xpaths on purpose: the first element in document order must win
+			xpath=f'{parent.xpath}/{tag}[{rng.randrange(3)}]',
+			attributes=attributes,
+			children=[],
+			is_visible=True,
+			parent=parent,
+		)
+		if rng.random() < 0.5:
+			node.highlight_index = highlight_index
+			highlight_index += 1
+		parent.children.append(node)
+		elements.append(node)
+		if rng.random() < 0.2:
+			parent.children.append(DOMTextNode(text=f'text {i}', is_visible=True, parent=parent))
+	return root
+
+
+def _document_order(root: DOMElementNode) -> list[DOMElementNode]:
+	ordered = []
+	stack = [root]
+	while stack:
+		node = stack.pop()
+		ordered.append(node)
+		stack.extend(reversed([child for child in node.children if isinstance(child, DOMElementNode)]))
+	return ordered
+
+
+def test_build_hash_index_matches_hash_dom_element():
+	root = build_random_tree()
+	hash_index = HistoryTreeProcessor.build_hash_index(root)
+
+	expected = {}
+	highlighted = [node for node in _document_order(root) if node.highlight_index is not None]
+	assert highlighted
+	for node in highlighted:
+		hashed = HistoryTreeProcessor._hash_dom_element(node)
+		assert node._hash == hashed
+		expected.setdefault((hashed.branch_path_hash, hashed.attributes_hash, hashed.xpath_hash), node)
+
+	assert hash_index.keys() == expected.keys()
+	for key, node in expected.items():
+		assert hash_index[key] is node
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Pool persistente de navegadores para la ejecución de tests con browser-use.
+
+En lugar de lanzar un subproceso (y un Chromium en frío) por cada test, se
+mantiene un hilo con su propio event loop de asyncio y un conjunto de
+instancias `browser_use.Browser` ya iniciadas. Cada test recibe un
+`BrowserContext` aislado que se crea sobre uno de esos navegadores y se
+destruye al terminar, de modo que cookies, storage y pestañas no se
+comparten entre ejecuciones.
+
+Configuración mediante variables de entorno:
+    QA_PILOT_ISOLATION_MODE        'pool' (por defecto) o 'subprocess'
+    BROWSER_POOL_SIZE              navegadores calientes por modo (defecto 2)
+    BROWSER_POOL_MAX_USES          usos antes de reciclar un navegador (defecto 20)
+    BROWSER_POOL_HEALTH_INTERVAL   segundos entre chequeos de salud (defecto 30)
+    BROWSER_POOL_ACQUIRE_TIMEOUT   segundos máximos esperando un navegador libre (defecto 120)
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import subprocess
+import concurrent.futures
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ISOLATION_POOL = 'pool'
+ISOLATION_SUBPROCESS = 'subprocess'
+
+
+class BrowserPoolUnavailable(Exception):
+    """El pool no pudo iniciarse; el llamador debe usar el modo subproceso."""
+
+
+def get_isolation_mode() -> str:
+    """Devuelve el modo de aislamiento configurado ('pool' o 'subprocess')"""
+    mode = os.getenv('QA_PILOT_ISOLATION_MODE', ISOLATION_POOL).strip().lower()
+    if mode not in (ISOLATION_POOL, ISOLATION_SUBPROCESS):
+        logger.warning(f"⚠️ QA_PILOT_ISOLATION_MODE inválido '{mode}', usando '{ISOLATION_SUBPROCESS}'")
+        return ISOLATION_SUBPROCESS
+    return mode
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class BrowserPoolConfig:
+    """Parámetros del pool de navegadores"""
+    size: int = 2
+    max_uses: int = 20
+    health_check_interval: float = 30.0
+    acquire_timeout: float = 120.0
+    headless: bool = True
+
+    @classmethod
+    def from_env(cls, headless: bool = True) -> 'BrowserPoolConfig':
+        return cls(
+            size=_env_int('BROWSER_POOL_SIZE', 2),
+            max_uses=_env_int('BROWSER_POOL_MAX_USES', 20),
+            health_check_interval=float(_env_int('BROWSER_POOL_HEALTH_INTERVAL', 30)),
+            acquire_timeout=float(_env_int('BROWSER_POOL_ACQUIRE_TIMEOUT', 120)),
+            headless=headless,
+        )
+
+
+@dataclass
+class PooledBrowser:
+    """Navegador caliente administrado por el pool"""
+    browser: Any
+    slot: int
+    uses: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_used_at: float = field(default_factory=time.time)
+
+    def is_healthy(self) -> bool:
+        playwright_browser = getattr(self.browser, 'playwright_browser', None)
+        if playwright_browser is None:
+            return False
+        try:
+            return playwright_browser.is_connected()
+        except Exception:
+            return False
+
+
+class BrowserPool:
+    """
+    Pool de navegadores browser-use con un event loop dedicado.
+
+    Los navegadores sólo se tocan desde el hilo del loop. El resto de la
+    aplicación (hilos de Flask) envía corrutinas con `submit()` y recibe un
+    `concurrent.futures.Future`.
+    """
+
+    def __init__(self, config: BrowserPoolConfig):
+        self.config = config
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._start_error: Optional[BaseException] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._browsers: Dict[int, PooledBrowser] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.stats = {'leases': 0, 'recycled': 0, 'unhealthy': 0, 'launch_errors': 0}
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self, timeout: float = 60.0):
+        """Inicia el hilo del loop y precalienta los navegadores"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name=f"browser-pool-{'headless' if self.config.headless else 'visible'}",
+            daemon=True,
+        )
+        self._thread.start()
+
+        if not self._ready.wait(timeout):
+            raise BrowserPoolUnavailable('Tiempo agotado iniciando el pool de navegadores')
+        if self._start_error:
+            raise BrowserPoolUnavailable(f'No se pudo iniciar el pool: {self._start_error}')
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._warm_up())
+        except BaseException as e:
+            self._start_error = e
+            for pooled in list(self._browsers.values()):
+                self._loop.run_until_complete(self._close_browser(pooled.browser))
+            self._browsers.clear()
+            self._loop.close()
+            self._ready.set()
+            return
+
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _warm_up(self):
+        self._idle = asyncio.Queue()
+        for slot in range(self.config.size):
+            pooled = await self._launch(slot)
+            self._browsers[slot] = pooled
+            self._idle.put_nowait(pooled)
+        self._health_task = asyncio.ensure_future(self._health_loop())
+        logger.info(f"🔥 Pool de navegadores listo: {self.config.size} instancias "
+                    f"({'headless' if self.config.headless else 'visibles'})")
+
+    async def _launch(self, slot: int) -> PooledBrowser:
+        from browser_use import Browser, BrowserConfig
+
+        browser = Browser(
+            config=BrowserConfig(
+                headless=self.config.headless,
+                browser_class='chromium',
+                extra_browser_args=[],
+                keep_alive=False,
+            )
+        )
+        try:
+            await browser.get_playwright_browser()
+        except Exception:
+            self.stats['launch_errors'] += 1
+            await self._close_browser(browser)
+            raise
+        logger.debug(f"🌐 Navegador del pool iniciado (slot {slot})")
+        return PooledBrowser(browser=browser, slot=slot)
+
+    async def _close_browser(self, browser):
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.debug(f"Error cerrando navegador del pool: {e}")
+
+    async def _recycle(self, pooled: PooledBrowser, reason: str) -> PooledBrowser:
+        logger.info(f"♻️ Reciclando navegador del pool (slot {pooled.slot}, usos={pooled.uses}): {reason}")
+        self.stats['recycled'] += 1
+        await self._close_browser(pooled.browser)
+        fresh = await self._launch(pooled.slot)
+        self._browsers[pooled.slot] = fresh
+        return fresh
+
+    async def _health_loop(self):
+        """Revisa periódicamente los navegadores ociosos y reemplaza los caídos"""
+        while not self._closed:
+            await asyncio.sleep(self.config.health_check_interval)
+            idle_count = self._idle.qsize()
+            for _ in range(idle_count):
+                try:
+                    pooled = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if not pooled.is_healthy():
+                    self.stats['unhealthy'] += 1
+                    try:
+                        pooled = await self._recycle(pooled, 'chequeo de salud fallido')
+                    except Exception as e:
+                        logger.error(f"❌ No se pudo relanzar navegador del pool (slot {pooled.slot}): {e}")
+                self._idle.put_nowait(pooled)
+
+    def shutdown(self, timeout: float = 30.0):
+        """Cierra todos los navegadores y detiene el loop"""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._loop or self._loop.is_closed() or not self._loop.is_running():
+            return
+
+        async def _close_all():
+            if self._health_task:
+                self._health_task.cancel()
+            for pooled in list(self._browsers.values()):
+                await self._close_browser(pooled.browser)
+            self._browsers.clear()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close_all(), self._loop).result(timeout)
+        except Exception as e:
+            logger.debug(f"Error cerrando pool de navegadores: {e}")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ------------------------------------------------------------------
+    # Préstamo de contextos
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def lease(self, context_config=None):
+        """
+        Presta un BrowserContext aislado sobre un navegador caliente.
+
+        Debe usarse desde corrutinas que corren en el loop del pool
+        (es decir, enviadas con `submit()`).
+        """
+        try:
+            pooled = await asyncio.wait_for(self._idle.get(), timeout=self.config.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise BrowserPoolUnavailable('No hay navegadores libres en el pool')
+
+        context = None
+        try:
+            if not pooled.is_healthy():
+                self.stats['unhealthy'] += 1
+                pooled = await self._recycle(pooled, 'navegador desconectado')
+
+            pooled.uses += 1
+            pooled.last_used_at = time.time()
+            self.stats['leases'] += 1
+            context = await pooled.browser.new_context(config=context_config)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Error cerrando contexto del pool: {e}")
+
+            try:
+                if pooled.uses >= self.config.max_uses:
+                    pooled = await self._recycle(pooled, 'máximo de usos alcanzado')
+                elif not pooled.is_healthy():
+                    self.stats['unhealthy'] += 1
+                    pooled = await self._recycle(pooled, 'navegador desconectado tras el test')
+            except Exception as e:
+                logger.error(f"❌ Error reciclando navegador del pool (slot {pooled.slot}): {e}")
+            finally:
+                self._idle.put_nowait(pooled)
+
+    def submit(self, coro_factory: Callable[['BrowserPool'], Awaitable[Any]]):
+        """
+        Ejecuta `coro_factory(pool)` en el loop del pool.
+
+        Returns:
+            concurrent.futures.Future con el resultado de la corrutina
+        """
+        if not self._loop or self._closed:
+            raise BrowserPoolUnavailable('El pool de navegadores no está activo')
+        return asyncio.run_coroutine_threadsafe(coro_factory(self), self._loop)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'size': self.config.size,
+            'max_uses': self.config.max_uses,
+            'headless': self.config.headless,
+            'idle': self._idle.qsize() if self._idle else 0,
+            'browsers': [
+                {'slot': p.slot, 'uses': p.uses, 'healthy': p.is_healthy(),
+                 'age_seconds': round(time.time() - p.created_at, 1)}
+                for p in self._browsers.values()
+            ],
+        }
+
+
+# Instancias globales: un pool por modo (headless / visible)
+_pools: Dict[bool, BrowserPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """Obtiene (iniciando si es necesario) el pool para el modo indicado"""
+    with _pools_lock:
+        pool = _pools.get(headless)
+        if pool is None:
+            pool = BrowserPool(BrowserPoolConfig.from_env(headless=headless))
+            try:
+                pool.start()
+            except BrowserPoolUnavailable:
+                pool.shutdown()
+                raise
+            _pools[headless] = pool
+        return pool
+
+
+def shutdown_browser_pools():
+    """Cierra todos los pools activos"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
+
+
+def get_browser_pools_stats() -> Dict[str, Any]:
+    with _pools_lock:
+        return {('headless' if headless else 'visible'): pool.get_stats() for headless, pool in _pools.items()}
+
+
+class PooledRun:
+    """
+    Envoltorio de una ejecución en el pool con la interfaz mínima de `subprocess.Popen`
+    (poll/terminate/kill/wait), para que el tracking de procesos existente pueda
+    detener también los tests que corren dentro del pool.
+    """
+
+    def __init__(self, future, task_id: str):
+        self.future = future
+        self.pid = f'pool:{task_id}'
+
+    def poll(self):
+        if not self.future.done():
+            return None
+        return 0 if not self.future.cancelled() and self.future.exception() is None else 1
+
+    def terminate(self):
+        self.future.cancel()
+
+    def kill(self):
+        self.future.cancel()
+
+    def wait(self, timeout=None):
+        try:
+            self.future.exception(timeout=timeout)
+        except concurrent.futures.CancelledError:
+            pass
+        except concurrent.futures.TimeoutError:
+            raise subprocess.TimeoutExpired(self.pid, timeout)
+        return self.poll()
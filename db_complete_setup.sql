@@ -353,6 +353,7 @@ CREATE INDEX idx_executions_status ON testing.test_executions(status);
 CREATE INDEX idx_executions_start_time ON testing.test_executions(start_time);
 CREATE INDEX idx_executions_duration ON testing.test_executions(duration_seconds);
 CREATE INDEX idx_executions_type ON testing.test_executions(execution_type);
+CREATE INDEX idx_executions_created_id ON testing.test_executions(created_at DESC, id DESC);
 
 -- Índices para bulk_executions
 CREATE INDEX idx_bulk_executions_project ON testing.bulk_executions(project_id);
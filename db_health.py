@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Estado de salud de la conexión a PostgreSQL y configuración del pool de conexiones.
+
+`DatabaseIntegration.is_connected()` se consulta al inicio de casi todas las rutas;
+en lugar de abrir una sesión y ejecutar `SELECT 1` en cada llamada, se devuelve un
+estado en caché que un hilo de fondo refresca periódicamente. Los errores de
+conexión detectados en sesiones reales marcan el estado como caído al instante.
+
+Las conexiones muertas del pool se descartan con `pool_pre_ping`, de modo que el
+sondeo sólo decide si la base de datos está disponible, no si cada conexión lo está.
+
+Configuración mediante variables de entorno:
+    DB_POOL_SIZE                conexiones persistentes del pool (defecto 5)
+    DB_MAX_OVERFLOW             conexiones extra en picos (defecto 10)
+    DB_POOL_TIMEOUT             segundos de espera por una conexión libre (defecto 30)
+    DB_POOL_RECYCLE             segundos antes de reciclar una conexión (defecto 1800)
+    DB_HEALTH_TTL               segundos de validez del estado en caché (defecto 30)
+    DB_HEALTH_PROBE_INTERVAL    segundos entre sondeos de fondo, 0 = sin hilo (defecto 15)
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_pool_options() -> Dict[str, Any]:
+    """Argumentos de `create_engine` para el pool de conexiones"""
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10, minimum=0),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+
+
+class DatabaseHealth:
+    """
+    Estado de conectividad en caché con TTL.
+
+    Args:
+        check: función sin argumentos que devuelve True si la base de datos responde
+        ttl: segundos durante los que un resultado se considera vigente
+        probe_interval: segundos entre sondeos del hilo de fondo (0 = sin hilo)
+    """
+
+    def __init__(self, check: Callable[[], bool], ttl: int = 30, probe_interval: int = 15):
+        self.check = check
+        self.ttl = ttl
+        self.probe_interval = probe_interval
+        self._healthy: Optional[bool] = None
+        self._checked_at = 0.0
+        self._last_error: Optional[str] = None
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, check: Callable[[], bool]) -> 'DatabaseHealth':
+        return cls(
+            check,
+            ttl=_env_int('DB_HEALTH_TTL', 30),
+            probe_interval=_env_int('DB_HEALTH_PROBE_INTERVAL', 15, minimum=0),
+        )
+
+    def _is_fresh(self) -> bool:
+        return self._healthy is not None and time.monotonic() - self._checked_at < self.ttl
+
+    def refresh(self) -> bool:
+        """Ejecuta la comprobación ahora y actualiza el estado"""
+        try:
+            healthy = bool(self.check())
+            error = None if healthy else 'La comprobación de conexión falló'
+        except Exception as e:
+            healthy, error = False, str(e)
+        if healthy != self._healthy and self._healthy is not None:
+            if healthy:
+                logger.info("✅ Conexión a base de datos restablecida")
+            else:
+                logger.warning(f"⚠️ Base de datos no disponible: {error}")
+        self._healthy = healthy
+        self._last_error = error
+        self._checked_at = time.monotonic()
+        return healthy
+
+    def is_healthy(self) -> bool:
+        """Estado en caché; sólo comprueba de nuevo si expiró el TTL (una vez entre todos los hilos)"""
+        if self._is_fresh():
+            return self._healthy
+        with self._check_lock:
+            if self._is_fresh():
+                return self._healthy
+            return self.refresh()
+
+    def mark_unhealthy(self, error: Any):
+        """Registra un error de conexión visto en una sesión real"""
+        if self._healthy:
+            logger.warning(f"⚠️ Error de conexión a base de datos: {error}")
+        self._healthy = False
+        self._last_error = str(error)
+        self._checked_at = time.monotonic()
+
+    def start_prober(self):
+        """Inicia el hilo de fondo que mantiene el estado actualizado"""
+        if not self.probe_interval or self._thread is not None:
+            return
+
+        def _loop():
+            while not self._stop.wait(self.probe_interval):
+                with self._check_lock:
+                    self.refresh()
+
+        self._thread = threading.Thread(target=_loop, name='db-health-prober', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        age = time.monotonic() - self._checked_at if self._healthy is not None else None
+        return {
+            'healthy': self._healthy,
+            'checked_seconds_ago': round(age, 1) if age is not None else None,
+            'last_error': self._last_error,
+            'ttl': self.ttl,
+            'probe_interval': self.probe_interval,
+        }
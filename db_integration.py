@@ -20,6 +20,7 @@ from db_models import (
 
 # Importar clases existentes del sistema
 from excel_test_analyzer import TestCase as ExcelTestCase
+from db_health import DatabaseHealth
 
 class DatabaseIntegration:
     """Clase principal para integrar la base de datos con la aplicación Flask"""
@@ -29,6 +30,8 @@ class DatabaseIntegration:
         self.config = self._load_config(config_file)
         self.db_manager = DatabaseManager(**self.config)
         self._default_project = None
+        # Estado de conexión en caché para is_connected() (ver db_health.py)
+        self.health = DatabaseHealth.from_env(self.test_connection)
     
     def _load_config(self, config_file):
         """Cargar configuración desde archivo .env"""
@@ -54,8 +57,11 @@ class DatabaseIntegration:
         try:
             yield session
             session.commit()
-        except Exception:
+        except Exception as e:
             session.rollback()
+            from sqlalchemy.exc import DBAPIError, OperationalError
+            if isinstance(e, OperationalError) or (isinstance(e, DBAPIError) and e.connection_invalidated):
+                self.health.mark_unhealthy(e)
             raise
         finally:
             session.close()
@@ -924,8 +930,8 @@ class DatabaseIntegration:
             ]
     
     def is_connected(self) -> bool:
-        """Verificar si la conexión a la base de datos está activa"""
-        return self.test_connection()
+        """Verificar si la conexión a la base de datos está activa (estado en caché con TTL)"""
+        return self.health.is_healthy()
     
     def get_orphaned_test_cases(self) -> List[Dict[str, Any]]:
         """Obtener casos de prueba sin suite asociada que fueron guardados desde historial"""
@@ -1187,19 +1193,23 @@ def get_db_integration():
     global db_integration
     if db_integration is None:
         db_integration = DatabaseIntegration()
+        db_integration.health.start_prober()
     return db_integration
 
 def init_db_integration(app=None):
     """Inicializar integración de base de datos para Flask"""
     global db_integration
+    if db_integration is not None:
+        db_integration.health.stop()
     db_integration = DatabaseIntegration()
+    db_integration.health.start_prober()
     
     if app:
         # Agregar instancia a la configuración de Flask
         app.config['DB_INTEGRATION'] = db_integration
         
-        # Probar conexión al inicializar
-        if db_integration.test_connection():
+        # Probar conexión al inicializar (deja el estado en caché listo)
+        if db_integration.health.refresh():
             print("✅ Conexión a base de datos PostgreSQL establecida")
         else:
             print("❌ Error al conectar con base de datos PostgreSQL")
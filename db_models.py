@@ -19,6 +19,8 @@ from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy.sql import func
 from sqlalchemy import create_engine
 
+from db_health import get_pool_options
+
 Base = declarative_base()
 
 # ===============================================================
@@ -292,6 +294,7 @@ class TestExecution(Base):
     __table_args__ = (
         CheckConstraint("execution_type IN ('manual', 'automated', 'scheduled', 'bulk')", name='check_execution_type'),
         CheckConstraint("status IN ('pending', 'running', 'passed', 'failed', 'skipped', 'error', 'timeout')", name='check_execution_status'),
+        Index('idx_executions_created_id', 'created_at', 'id'),
         {'schema': 'testing'}
     )
 
@@ -516,7 +519,8 @@ class DatabaseManager:
         else:
             self.database_url = f"postgresql://{username}:{password}@{host}:{port}/{database}"
         
-        self.engine = create_engine(self.database_url)
+        # Pool dimensionado por entorno; pool_pre_ping descarta conexiones caídas antes de usarlas
+        self.engine = create_engine(self.database_url, **get_pool_options())
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
     
     def create_tables(self):
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Bus de eventos en memoria para el canal push (Server-Sent Events).
+
+Los productores (cambios en test_status_db, nuevas líneas de log, resultados
+de suites, de ejecuciones masivas y de análisis de Excel) publican en un tópico; cada cliente SSE
+se suscribe a uno y recibe los eventos por una cola acotada propia.
+
+Backpressure: publicar nunca bloquea. Si la cola de un suscriptor lento se
+llena, se descartan sus eventos más antiguos y se le entrega un evento
+`resync`, tras el cual el cliente debe pedir el estado completo.
+
+Configuración mediante variables de entorno:
+    EVENTS_QUEUE_SIZE         eventos pendientes por suscriptor (defecto 256)
+    EVENTS_MAX_SUBSCRIBERS    suscriptores simultáneos en total (defecto 200)
+    EVENTS_HEARTBEAT_SECONDS  segundos entre comentarios keep-alive (defecto 15)
+
+Se usa SSE (y no WebSocket) porque Flask lo soporta con una respuesta en streaming
+sin dependencias adicionales y el canal sólo necesita ir del servidor al navegador.
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from typing import Any, Dict, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def task_topic(task_id: str) -> str:
+    return f'test:{task_id}'
+
+
+def suite_topic(execution_id: str) -> str:
+    return f'suite:{execution_id}'
+
+
+def bulk_topic(execution_id: str) -> str:
+    return f'bulk:{execution_id}'
+
+
+def analysis_topic(job_id: str) -> str:
+    return f'analysis:{job_id}'
+
+
+class TooManySubscribers(Exception):
+    """Se alcanzó EVENTS_MAX_SUBSCRIBERS"""
+
+
+class Subscription:
+    """Cola acotada de eventos de un suscriptor"""
+
+    def __init__(self, bus: 'EventBus', topic: str, queue_size: int):
+        self.bus = bus
+        self.topic = topic
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def push(self, event: str, data: Dict[str, Any]):
+        try:
+            self._queue.put_nowait((event, data))
+        except queue.Full:
+            # Suscriptor lento: descartar lo más antiguo y pedirle que se resincronice
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self.dropped += 1
+            try:
+                self._queue.put_nowait(('resync', {'reason': 'overflow', 'dropped': self.dropped}))
+            except queue.Full:
+                pass
+
+    def get(self, timeout: float):
+        """Devuelve (evento, datos) o None si no llegó nada dentro de `timeout`"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Publicación/suscripción por tópico, segura entre hilos"""
+
+    def __init__(self, queue_size: int = 256, max_subscribers: int = 200):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'EventBus':
+        return cls(
+            queue_size=_env_int('EVENTS_QUEUE_SIZE', 256),
+            max_subscribers=_env_int('EVENTS_MAX_SUBSCRIBERS', 200),
+        )
+
+    def subscribe(self, topic: str) -> Subscription:
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers(f'Máximo de {self.max_subscribers} suscriptores alcanzado')
+            subscription = Subscription(self, topic, self.queue_size)
+            self._subscribers.setdefault(topic, set()).add(subscription)
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        # Lectura sin lock: un falso negativo sólo pierde un evento que nadie esperaba aún
+        return topic in self._subscribers
+
+    def publish(self, topic: str, event: str, data: Dict[str, Any]):
+        """Envía un evento a los suscriptores del tópico (nunca bloquea)"""
+        if topic not in self._subscribers:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription.push(event, data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'subscribers': self._count,
+                'topics': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'queue_size': self.queue_size,
+            }
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Serializa un evento en formato text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    payload = json.dumps(data, ensure_ascii=True, default=str)
+    lines.extend(f'data: {line}' for line in payload.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+def iter_sse(subscription: Subscription, heartbeat: float, initial_events=(), is_finished=None,
+             extra_events=None) -> Iterator[str]:
+    """
+    Genera el stream SSE de una suscripción con comentarios keep-alive.
+
+    Args:
+        initial_events: eventos (evento, datos) a enviar antes de los publicados (snapshot)
+        is_finished: callable `(evento, datos) -> bool`; si devuelve True el stream se cierra
+        extra_events: callable sin argumentos que devuelve eventos derivados a enviar tras
+            cada evento o keep-alive (p. ej. capturas nuevas detectadas por el propio stream)
+    """
+    try:
+        yield 'retry: 3000\n\n'
+        for event, data in initial_events:
+            yield format_sse(event, data)
+            if is_finished is not None and is_finished(event, data):
+                return
+        while True:
+            item = subscription.get(timeout=heartbeat)
+            if item is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_sse(*item)
+            if extra_events is not None:
+                for event, data in extra_events():
+                    yield format_sse(event, data)
+            if item is not None and is_finished is not None and is_finished(*item):
+                return
+    finally:
+        subscription.close()
+
+
+def get_heartbeat_seconds() -> float:
+    return float(_env_int('EVENTS_HEARTBEAT_SECONDS', 15))
+
+
+event_bus = EventBus.from_env()
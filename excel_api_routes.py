@@ -6,7 +6,6 @@ Maneja análisis de archivos Excel, validación con IA y ejecución de casos
 
 from flask import Blueprint, request, jsonify, current_app, send_file
 import os
-import sys
 import tempfile
 import json
 import time
@@ -17,10 +16,13 @@ import uuid
 from datetime import datetime, timezone
 import asyncio
 import threading
-import subprocess
-import platform
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import traceback
 
+from event_bus import event_bus, bulk_topic, analysis_topic, iter_sse, get_heartbeat_seconds, TooManySubscribers
+from analysis_jobs import AnalysisJobManager, public_view
+from analysis_cache import get_analysis_cache
+
 # Importar integración de base de datos
 try:
     from db_integration import get_db_integration
@@ -139,10 +141,100 @@ def validate_file_size(file):
     file.seek(0)
     return size <= MAX_FILE_SIZE
 
+def run_excel_analysis(file_path, params, progress_callback):
+    """
+    Extrae y analiza los casos de un archivo Excel (se ejecuta en un trabajo en segundo plano)
+    """
+    data_mode = params.get('data_mode', 'simulated')
+    print(f"📊 Analizando archivo Excel: {os.path.basename(file_path)} (modo de datos: {data_mode})")
+    
+    # Crear analizador (usa automáticamente la API key del sistema)
+    analyzer = ExcelTestAnalyzer()
+    progress_callback(5, "Leyendo archivo Excel...", os.path.basename(file_path))
+    test_cases = analyzer.extract_test_cases(file_path, all_sheets=params.get('all_sheets', False))
+    progress_callback(60, f"Se encontraron {len(test_cases)} casos de prueba", "Iniciando análisis híbrido")
+    
+    # Realizar análisis híbrido con progreso
+    analyzed_cases = analyzer.analyze_with_hybrid_approach(test_cases, progress_callback, data_mode)
+    
+    # Generar resumen
+    summary = analyzer.generate_summary_report(analyzed_cases)
+    
+    # Intentar guardar casos en base de datos si está disponible
+    saved_case_ids = []
+    if DB_INTEGRATION_AVAILABLE:
+        try:
+            db_integration = get_db_integration()
+            for case in analyzed_cases:
+                if case.es_valido:  # Solo guardar casos válidos
+                    case_id = db_integration.save_excel_test_case(case)
+                    saved_case_ids.append(case_id)
+            
+            print(f"💾 Guardados {len(saved_case_ids)} casos en base de datos")
+        except Exception as e:
+            print(f"⚠️ Error guardando en DB: {e}")
+    
+    # Convertir casos a diccionarios para JSON
+    cases_dict = []
+    for case in analyzed_cases:
+        case_dict = {
+            'id': case.id,
+            'nombre': case.nombre,
+            'historia_usuario': case.historia_usuario,
+            'objetivo': case.objetivo,
+            'precondicion': case.precondicion,
+            'pasos': case.pasos,
+            'datos_prueba': case.datos_prueba,
+            'resultado_esperado': case.resultado_esperado,
+            'url_extraida': case.url_extraida,
+            'es_valido': case.es_valido,
+            'problemas': case.problemas,
+            'sugerencias': case.sugerencias,
+            'instrucciones_qa_pilot': case.instrucciones_qa_pilot
+        }
+        cases_dict.append(case_dict)
+    
+    print(f"✅ Análisis completado: {len(analyzed_cases)} casos procesados")
+    
+    # Determinar tipo de análisis basado en si se usó IA
+    analysis_type = 'ia' if analyzer.client else 'basico'
+    
+    # Preparar resultado
+    response_data = {
+        'success': True,
+        'test_cases': cases_dict,
+        'summary': summary,
+        'analysis_type': analysis_type,
+        'message': f'Se analizaron {len(analyzed_cases)} casos de prueba exitosamente'
+    }
+    
+    # Agregar información de base de datos si se guardaron casos
+    if saved_case_ids:
+        response_data['database_save'] = {
+            'success': True,
+            'saved_cases': len(saved_case_ids),
+            'case_ids': saved_case_ids
+        }
+    
+    return response_data
+
+_analysis_job_manager = None
+_analysis_job_manager_lock = threading.Lock()
+
+def get_analysis_job_manager():
+    """Obtiene el gestor de trabajos de análisis de Excel (uno por proceso)"""
+    global _analysis_job_manager
+    with _analysis_job_manager_lock:
+        if _analysis_job_manager is None:
+            _analysis_job_manager = AnalysisJobManager.from_env(run_excel_analysis)
+        return _analysis_job_manager
+
 @excel_bp.route('/analyze_excel', methods=['POST'])
 def analyze_excel():
     """
-    Analiza un archivo Excel y extrae casos de prueba
+    Recibe un archivo Excel y crea un trabajo de análisis en segundo plano.
+    Responde 202 con el id del trabajo; el progreso y el resultado se obtienen en
+    /api/analysis_jobs/<job_id> o por SSE en /api/events/analysis/<job_id>
     """
     try:
         # Verificar que se envió un archivo
@@ -175,102 +267,28 @@ def analyze_excel():
                 'error': 'El archivo es demasiado grande. Tamaño máximo: 16MB'
             }), 400
         
-        # Guardar archivo temporalmente
-        filename = secure_filename(file.filename)
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, filename)
+        # Obtener modo de datos del formulario
+        data_mode = request.form.get('data_mode', 'simulated')  # Por defecto: datos simulados
+        current_app.logger.info(f"Modo de datos seleccionado: {data_mode}")
         
-        try:
-            file.save(temp_path)
-            
-            # Obtener modo de datos del formulario
-            data_mode = request.form.get('data_mode', 'simulated')  # Por defecto: datos simulados
-            current_app.logger.info(f"Modo de datos seleccionado: {data_mode}")
-            
-            # Analizar el archivo Excel
-            current_app.logger.info(f"Analizando archivo Excel: {filename}")
-            
-            # Crear analizador (usa automáticamente la API key del sistema)
-            analyzer = ExcelTestAnalyzer()
-            test_cases = analyzer.extract_test_cases(temp_path)
-            
-            # Realizar análisis híbrido con progreso
-            current_app.logger.info("Realizando análisis híbrido de casos de prueba...")
-            
-            # Función de callback para progreso (opcional, para futuras mejoras)
-            def progress_callback(progress, message, details=""):
-                current_app.logger.info(f"Progreso: {progress}% - {message} - {details}")
-            
-            analyzed_cases = analyzer.analyze_with_hybrid_approach(test_cases, progress_callback, data_mode)
-            
-            # Generar resumen
-            summary = analyzer.generate_summary_report(analyzed_cases)
-            
-            # Intentar guardar casos en base de datos si está disponible
-            saved_case_ids = []
-            if DB_INTEGRATION_AVAILABLE:
-                try:
-                    db_integration = get_db_integration()
-                    for case in analyzed_cases:
-                        if case.es_valido:  # Solo guardar casos válidos
-                            case_id = db_integration.save_excel_test_case(case)
-                            saved_case_ids.append(case_id)
-                    
-                    current_app.logger.info(f"Guardados {len(saved_case_ids)} casos en base de datos")
-                except Exception as e:
-                    current_app.logger.warning(f"Error guardando en DB: {e}")
-            
-            # Convertir casos a diccionarios para JSON
-            cases_dict = []
-            for case in analyzed_cases:
-                case_dict = {
-                    'id': case.id,
-                    'nombre': case.nombre,
-                    'historia_usuario': case.historia_usuario,
-                    'objetivo': case.objetivo,
-                    'precondicion': case.precondicion,
-                    'pasos': case.pasos,
-                    'datos_prueba': case.datos_prueba,
-                    'resultado_esperado': case.resultado_esperado,
-                    'url_extraida': case.url_extraida,
-                    'es_valido': case.es_valido,
-                    'problemas': case.problemas,
-                    'sugerencias': case.sugerencias,
-                    'instrucciones_qa_pilot': case.instrucciones_qa_pilot
-                }
-                cases_dict.append(case_dict)
-            
-            current_app.logger.info(f"Análisis completado: {len(analyzed_cases)} casos procesados")
-            
-            # Determinar tipo de análisis basado en si se usó IA
-            analysis_type = 'ia' if analyzer.client else 'basico'
-            
-            # Preparar respuesta
-            response_data = {
-                'success': True,
-                'test_cases': cases_dict,
-                'summary': summary,
-                'analysis_type': analysis_type,
-                'message': f'Se analizaron {len(analyzed_cases)} casos de prueba exitosamente'
-            }
-            
-            # Agregar información de base de datos si se guardaron casos
-            if saved_case_ids:
-                response_data['database_save'] = {
-                    'success': True,
-                    'saved_cases': len(saved_case_ids),
-                    'case_ids': saved_case_ids
-                }
-            
-            return jsonify(response_data)
-            
-        finally:
-            # Limpiar archivo temporal
-            try:
-                os.remove(temp_path)
-                os.rmdir(temp_dir)
-            except:
-                pass
+        # Guardar archivo junto al trabajo (persistente para poder reanudarlo tras un reinicio)
+        filename = secure_filename(file.filename) or 'casos.xlsx'
+        manager = get_analysis_job_manager()
+        all_sheets = request.form.get('all_sheets', 'false').lower() in ('1', 'true', 'on')  # Por defecto: sólo la primera hoja
+        job = manager.create(filename, {'data_mode': data_mode, 'all_sheets': all_sheets})
+        file.save(job['file_path'])
+        manager.submit(job['id'])
+        
+        current_app.logger.info(f"Trabajo de análisis {job['id']} creado para {filename}")
+        
+        return jsonify({
+            'success': True,
+            'job_id': job['id'],
+            'status': job['status'],
+            'status_url': f"/api/analysis_jobs/{job['id']}",
+            'events_url': f"/api/events/analysis/{job['id']}",
+            'message': 'Análisis en curso'
+        }), 202
     
     except Exception as e:
         current_app.logger.error(f"Error al analizar Excel: {str(e)}")
@@ -279,6 +297,41 @@ def analyze_excel():
             'error': f'Error interno al procesar el archivo: {str(e)}'
         }), 500
 
+@excel_bp.route('/analysis_jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """
+    Estado de un trabajo de análisis; incluye el resultado cuando termina
+    """
+    record = get_analysis_job_manager().store.read(job_id)
+    if record is None:
+        return jsonify({
+            'success': False,
+            'error': 'Trabajo de análisis no encontrado'
+        }), 404
+    return jsonify({'success': True, 'job': public_view(record)})
+
+@excel_bp.route('/events/analysis/<job_id>', methods=['GET'])
+def stream_analysis_job_events(job_id):
+    """
+    Canal SSE de un trabajo de análisis: 'snapshot', 'progress' y 'finished'
+    """
+    try:
+        subscription = event_bus.subscribe(analysis_topic(job_id))
+    except TooManySubscribers as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    
+    record = get_analysis_job_manager().store.read(job_id)
+    snapshot = public_view(record) if record else {'id': job_id, 'status': 'no_encontrado'}
+    
+    def finished(event, data):
+        return event == 'finished' or (event == 'snapshot' and data.get('status') in ('completado', 'fallido', 'no_encontrado'))
+    
+    return current_app.response_class(
+        iter_sse(subscription, get_heartbeat_seconds(), initial_events=[('snapshot', snapshot)], is_finished=finished),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @excel_bp.route('/reanalyze_case', methods=['POST'])
 def reanalyze_case():
     """
@@ -348,10 +401,21 @@ def reanalyze_case():
             'error': f'Error al re-analizar el caso: {str(e)}'
         }), 500
 
+@excel_bp.route('/analysis_cache/stats', methods=['GET'])
+def analysis_cache_stats():
+    """
+    Estado de la caché de análisis con IA (entradas, aciertos y fallos)
+    """
+    cache = get_analysis_cache()
+    if cache is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({'success': True, 'enabled': True, 'stats': cache.get_stats()})
+
 @excel_bp.route('/execute_bulk_cases', methods=['POST'])
 def execute_bulk_cases():
     """
-    Ejecuta múltiples casos de prueba secuencialmente (uno por uno)
+    Ejecuta múltiples casos de prueba de forma secuencial (uno por uno) o en paralelo
+    según `execution_mode` ('sequential' | 'parallel')
     """
     try:
         # Manejar tanto JSON como FormData
@@ -482,903 +546,202 @@ def execute_cases_background_wrapper(app, execution_id, test_cases, execution_pa
         except:
             pass
 
-def _extract_steps_from_instructions(instructions):
-    """Extrae pasos individuales de las instrucciones"""
+def _get_bulk_max_parallel(total_cases):
+    """Número de casos simultáneos en modo paralelo (BULK_MAX_PARALLEL, defecto 3)"""
     try:
-        # Dividir por puntos, saltos de línea o numeración
-        import re
-        
-        # Intentar varios patrones de separación (mejorados)
-        patterns = [
-            r'\d+\.\s+',  # "1. ", "2. ", etc. (requiere espacio después)
-            r'\d+\)\s+',  # "1) ", "2) ", etc. (requiere espacio después)
-            r'paso\s*\d+[\:\.]?\s+',  # "Paso 1:", "paso 2.", etc.
-            r'\.\s+(?=[A-Z])',  # Puntos seguidos de mayúscula (nueva oración)
-            r'\n\s*',  # Saltos de línea
-        ]
-        
-        # Intentar primera separación por numeración
-        for pattern in patterns[:3]:  # Solo patrones de numeración
-            parts = re.split(pattern, instructions, flags=re.IGNORECASE)
-            if len(parts) > 2:  # Al menos 2 pasos válidos
-                steps = [part.strip() for part in parts if part.strip()]
-                if len(steps) >= 2:
-                    return steps[:10]  # Máximo 10 pasos
-        
-        # Si no hay numeración clara, dividir por puntos o saltos de línea
-        for pattern in patterns[3:]:
-            parts = re.split(pattern, instructions)
-            if len(parts) > 2:
-                steps = [part.strip() for part in parts if part.strip() and len(part.strip()) > 10]
-                if len(steps) >= 2:
-                    return steps[:10]
-        
-        # Fallback: instrucción completa como un solo paso
-        return [instructions.strip()]
-        
-    except Exception as e:
-        print(f"[EXTRACT-STEPS] Error extrayendo pasos: {e}")
-        return [instructions.strip()]
+        max_parallel = max(1, int(os.getenv('BULK_MAX_PARALLEL', 3)))
+    except (TypeError, ValueError):
+        max_parallel = 3
+    return min(max_parallel, total_cases)
 
-def generate_browser_use_script(url, instrucciones, headless=True, max_tiempo=300, capturar_pasos=True, browser='chrome', fullscreen=False, task_id=None, instruction_source='unknown'):
-    """
-    CORRECCIÓN FINAL: Genera un script ultra-simplificado que realmente funciona
-    """
+def _get_bulk_case_timeout():
+    """Tiempo máximo por caso en segundos (BULK_CASE_TIMEOUT, defecto 600)"""
     try:
-        print(f"[SCRIPT-GEN] Generando script ultra-simplificado para URL: {url}")
-        print(f"[SCRIPT-GEN] Instrucciones: {instrucciones[:100]}...")
-        print(f"[SCRIPT-GEN] Configuración: headless={headless}, tiempo={max_tiempo}s")
-        
-        # Escapar las instrucciones para uso seguro en string
-        instrucciones_safe = instrucciones.replace('\\', '\\\\').replace('"""', '\'\'\'').replace('\r', '')
-        
-        # Crear script ULTRA-SIMPLIFICADO que realmente funciona
-        script_content = f'''#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-Script ultra-simplificado para ejecución masiva con browser-use
-Task ID: {task_id or "unknown"}
-URL: {url}
-Generado: {datetime.now().isoformat()}
-"""
+        return max(60, int(os.getenv('BULK_CASE_TIMEOUT', 600)))
+    except (TypeError, ValueError):
+        return 600
 
-import asyncio
-import os
-import sys
-import time
-from dotenv import load_dotenv
-from browser_use import ChatAnthropic
-
-# Cargar variables de entorno
-load_dotenv()
+def _read_show_browser(execution_path):
+    """Lee la opción show_browser del archivo de ejecución"""
+    try:
+        return safe_read_execution_file(execution_path).get('show_browser', False)
+    except Exception:
+        return False
 
-# Configurar variables de entorno
-os.environ['PYDANTIC_V2'] = '1'
-os.environ['BROWSER_USE_MODEL'] = 'claude-3-5-sonnet-20241022'
+def execute_excel_case(execution_id, case, i, total_cases, show_browser, max_tiempo, log_prefix='[EXCEL-SEQUENTIAL]'):
+    """
+    Ejecuta un caso importado desde Excel con run_test_background (la lógica del home)
+    y devuelve el resumen del resultado para la ejecución masiva.
 
-try:
-    from browser_use import Agent, Browser, BrowserConfig
-except ImportError as e:
-    print(f"ERROR: No se pudo importar browser-use: {{e}}")
-    sys.exit(1)
+    El caso se ejecuta en un hilo propio con un tiempo máximo de `max_tiempo` más un margen;
+    si se excede, se termina el proceso del test y el caso se marca como error por timeout.
+    """
+    from app import run_test_background, test_status_db, db_lock, active_subprocess_processes, subprocess_processes_lock
 
-async def main():
-    """Función principal ultra-simplificada"""
-    
-    print("Iniciando test simplificado...")
+    case_name = case.get('nombre', f'Caso {i+1}')
+    print(f"{log_prefix} Ejecutando caso {i+1}/{total_cases}: {case_name}")
     
-    # Configurar LLM
-    anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-    if not anthropic_key:
-        print("ERROR: ANTHROPIC_API_KEY no encontrada")
-        sys.exit(1)
+    # Generar task_id único para este caso individual
+    case_task_id = str(uuid.uuid4())
     
-    llm = ChatAnthropic(
-        model="claude-3-5-sonnet-20241022",
-        api_key=anthropic_key,
-        temperature=0.1
-    )
-    print("LLM configurado")
+    # Extraer datos del caso
+    url = case.get('url_extraida', case.get('datos_prueba', 'https://www.google.com'))
+    if not url or not url.startswith(('http://', 'https://')):
+        url = 'https://www.google.com'
     
-    # Configurar navegador ultra-simple
-    browser_config = BrowserConfig(headless={headless})
-    browser = Browser(config=browser_config)
-    print("Navegador configurado")
+    # Combinar objetivo y pasos para las instrucciones
+    objetivo = case.get('objetivo', '')
+    pasos = case.get('pasos', '')
+    instrucciones = f"{objetivo}\n\n{pasos}".strip()
     
-    try:
-        # Tarea ultra-simplificada
-        simple_task = "Navegar a {url} y verificar que la pagina carga correctamente. Completar en maximo 5 pasos."
-        
-        # Crear agente con límites estrictos
-        agent = Agent(
-            task=simple_task,
-            llm=llm,
-            browser=browser
-        )
-        print("Agente creado")
-        
-        print("Ejecutando tarea...")
-        start_time = time.time()
-        
-        # Ejecutar con límites MUY estrictos
-        result = await agent.run(max_steps=5)  # SOLO 5 pasos máximo
-        
-        end_time = time.time()
-        duration = end_time - start_time
-        
-        print(f"Test completado en {{duration:.2f}} segundos")
-        print(f"Resultado: {{result}}")
-        
-        # Forzar salida exitosa después de 5 pasos
-        sys.exit(0)
-        
-    except Exception as e:
-        print(f"ERROR: {{e}}")
-        sys.exit(1)
-        
-    finally:
-        try:
-            await browser.close()
-            print("Navegador cerrado")
-        except:
-            pass
-
-if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except Exception as e:
-        print(f"💥 Error fatal: {{e}}")
-        sys.exit(1)
-'''
-        
-        print(f"[SCRIPT-GEN] Script ultra-simplificado generado exitosamente ({len(script_content)} caracteres)")
-        return script_content
-        
-    except Exception as e:
-        print(f"[SCRIPT-GEN] Error generando script: {e}")
-        raise Exception(f"Error al generar script: {e}")
-
-def _optimize_instructions_for_browser_use(instructions, url, instruction_source):
-    """
-    CORRECCIÓN 2: Optimiza las instrucciones para una mejor ejecución con browser-use
-    """
-    try:
-        # CORRECCIÓN CRÍTICA: Limpiar caracteres problemáticos de encoding
-        print(f"[OPTIMIZE] Instrucciones originales length: {len(instructions)}")
-        
-        # Normalizar caracteres especiales para evitar problemas de encoding
-        clean_instructions = instructions.strip()
-        
-        # CORRECCIÓN MEJORADA: Mapeo específico de caracteres UTF-8 corruptos
-        utf8_corrections = {
-            'TÃ©rmino': 'Termino',
-            'tÃ©rmino': 'termino', 
-            'bÃºsqueda': 'busqueda',
-            'BÃºsqueda': 'Busqueda',
-            'pÃ¡gina': 'pagina',
-            'PÃ¡gina': 'Pagina',
-            'especÃ­fico': 'especifico',
-            'EspecÃ­fico': 'Especifico',
-            'bÃ¡sica': 'basica',
-            'BÃ¡sica': 'Basica',
-            'artÃ­culos': 'articulos',
-            'ArtÃ­culos': 'Articulos',
-            'interÃ©s': 'interes',
-            'InterÃ©s': 'Interes',
-            'prÃ¡ctica': 'practica',
-            'PrÃ¡ctica': 'Practica',
-            'nÃºmero': 'numero',
-            'NÃºmero': 'Numero',
-            'descripciÃ³n': 'descripcion',
-            'DescripciÃ³n': 'Descripcion',
-            'informaciÃ³n': 'informacion',
-            'InformaciÃ³n': 'Informacion',
-            'VisualizaciÃ³n': 'Visualizacion',
-            'visualizaciÃ³n': 'visualizacion',
-            'decisiÃ³n': 'decision',
-            'DecisiÃ³n': 'Decision',
-            'secciÃ³n': 'seccion',
-            'SecciÃ³n': 'Seccion',
-            'caracterÃ­sticas': 'caracteristicas',
-            'CaracterÃ­sticas': 'Caracteristicas',
-            'imÃ¡genes': 'imagenes',
-            'ImÃ¡genes': 'Imagenes',
-            'Ã­cono': 'icono',
-            'Ã\x81cono': 'icono',
-            'botÃ³n': 'boton',
-            'BotÃ³n': 'Boton',
-            'Ã¡': 'a',
-            'Ã©': 'e', 
-            'Ã­': 'i',
-            'Ã³': 'o',
-            'Ãº': 'u',
-            'Ã±': 'n',
-            'Ã\x81': 'A',
-            'Ã\x89': 'E',
-            'Ã\x8d': 'I', 
-            'Ã\x93': 'O',
-            'Ã\x9a': 'U',
-            'Ã\x91': 'N'
-        }
-        
-        # Aplicar todas las correcciones de caracteres UTF-8
-        for corrupted, correct in utf8_corrections.items():
-            clean_instructions = clean_instructions.replace(corrupted, correct)
-        
-        # Limpieza adicional de caracteres problemáticos restantes
-        clean_instructions = clean_instructions.replace('ú', 'u').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('á', 'a').replace('ñ', 'n')
-        clean_instructions = clean_instructions.replace('?', 'u')  # Corregir caracteres corruptos genéricos
-        
-        # Verificar que no tengamos caracteres problemáticos restantes
-        try:
-            clean_instructions.encode('ascii', 'ignore')
-        except:
-            # Si aún hay problemas, usar solo caracteres ASCII seguros
-            clean_instructions = ''.join(char if ord(char) < 128 else 'u' for char in clean_instructions)
-        
-        print(f"[OPTIMIZE] Instrucciones limpiadas length: {len(clean_instructions)}")
-        
-        # Si las instrucciones ya incluyen la URL, no duplicar
-        if url and url.lower() not in clean_instructions.lower():
-            # Agregar navegación inicial explícita
-            if 'mercadolibre.cl' in url.lower():
-                clean_instructions = f"Navegar a {url} (MercadoLibre Chile). Una vez cargada la pagina: {clean_instructions}"
-            else:
-                clean_instructions = f"Navegar a {url}. Una vez cargada la pagina: {clean_instructions}"
-        
-        # Optimizaciones específicas por fuente
-        if instruction_source == 'qa_pilot':
-            # Las instrucciones QA-Pilot ya están mejor estructuradas
-            optimized = _format_qa_pilot_instructions(clean_instructions)
-        elif instruction_source == 'original':
-            # Los pasos originales necesitan más estructura
-            optimized = _format_original_instructions(clean_instructions)
-        else:
-            # Instrucciones por defecto
-            optimized = clean_instructions
-        
-        # Agregar contexto específico para browser-use
-        optimized = _add_browser_use_context(optimized)
-        
-        print(f"[OPTIMIZE] Instrucciones optimizadas length: {len(optimized)}")
-        return optimized
-        
-    except Exception as e:
-        print(f"[OPTIMIZE] Error optimizando instrucciones: {e}")
-        return instructions  # Fallback a instrucciones originales
-
-def _format_qa_pilot_instructions(instructions):
-    """Formatea instrucciones QA-Pilot para browser-use"""
-    # Convertir formato QA-Pilot a formato más directo para browser-use
-    lines = instructions.split('\n')
-    formatted_lines = []
+    if not instrucciones:
+        instrucciones = f"Navegar a {url} y realizar pruebas básicas"
     
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Saltar líneas de objetivo/verificar (ya están incluidas implícitamente)
-        if line.lower().startswith(('objetivo:', 'verificar:')):
-            continue
-        
-        # Limpiar numeración inconsistente
-        if line.lower().startswith('pasos:'):
-            continue
-        
-        # Convertir pasos numerados a instrucciones directas
-        import re
-        # Remover numeración al inicio: "1.", "2)", "Paso 1:", etc.
-        line = re.sub(r'^(\d+[\.\)]\s*|paso\s*\d+[\.\:]\s*)', '', line, flags=re.IGNORECASE)
-        
-        if line:
-            formatted_lines.append(line)
+    print(f"{log_prefix} Caso {i+1} - URL: {url}")
+    print(f"{log_prefix} Caso {i+1} - Instrucciones: {instrucciones[:100]}...")
     
-    return '. '.join(formatted_lines) + '.'
-
-def _format_original_instructions(instructions):
-    """Formatea pasos originales para browser-use"""
-    # Los pasos originales suelen ser más simples, agregar más estructura
-    lines = instructions.split('\n')
-    formatted_lines = []
+    # Configuración exactamente igual al home exitoso
+    headless = not show_browser  # Si show_browser=True, entonces headless=False
+    screenshots = True  # Siempre capturar screenshots
+    fullscreen = True  # Mismo que el home exitoso
+    browser = 'chrome'  # Mismo que el home exitoso
+    model_name = 'claude-3-5-sonnet-20241022'  # Modelo actualizado
     
-    for line in lines:
-        line = line.strip()
-        if line:
-            # Remover numeración y limpiar
-            import re
-            line = re.sub(r'^(\d+[\.\)]\s*)', '', line)
-            if line:
-                formatted_lines.append(line)
+    print(f"{log_prefix} Configuración igual al home - headless: {headless}, max_tiempo: {max_tiempo}, fullscreen: {fullscreen}")
     
-    if formatted_lines:
-        return '. '.join(formatted_lines) + '.'
-    return instructions
-
-def _add_browser_use_context(instructions):
-    """Agrega contexto específico para browser-use"""
-    # Agregar instrucciones para manejo de errores y completitud
-    context_suffix = " Asegurar que cada acción se complete correctamente antes de continuar con la siguiente. Si un elemento no está visible, esperar o desplazarse para encontrarlo."
+    # Inicializar estado en test_status_db (exactamente igual que run_test)
+    with db_lock:
+        test_status_db[case_task_id] = {
+            'status': 'queued', 
+            'message': 'En cola...', 
+            'original_instructions': instrucciones,
+            'current_action': 'Esperando para despegar...',
+            'icon': 'fa-hourglass-start',
+            'url': url,
+            'created_at': datetime.now().isoformat(),
+            'case_name': case_name,
+            'case_index': i+1,
+            'execution_id': execution_id
+        }
     
-    return instructions + context_suffix
-
-def _validate_execution_completion(return_code, stdout_text, stderr_text, instruction_source, case_name):
-    """
-    CORRECCIÓN 4: Validación mejorada de completitud de ejecución
-    """
-    try:
-        # Indicadores de éxito en la salida
-        success_indicators = [
-            'test completado exitosamente',
-            'ejecución completada con éxito',
-            'step.*completado exitosamente',
-            'task.*completado',
-            'navegación.*exitosa',
-            'todos los pasos.*completados'
-        ]
-        
-        # Indicadores de fallo en la salida
-        error_indicators = [
-            'error', 'exception', 'failed', 'timeout', 'crash',
-            'no se pudo', 'fallo', 'falló', 'excepción'
-        ]
-        
-        # Indicadores específicos de browser-use
-        browseruse_success = [
-            'agent.*run.*completed',
-            'browser.*session.*successful',
-            'task.*finished.*successfully'
-        ]
-        
-        # Indicadores de progreso paso a paso
-        step_indicators = [
-            r'step \d+.*completado',
-            r'paso \d+.*exitoso',
-            r'\[step \d+\].*completado exitosamente'
-        ]
-        
-        import re
-        
-        stdout_lower = stdout_text.lower()
-        stderr_lower = stderr_text.lower()
-        combined_output = stdout_lower + " " + stderr_lower
-        
-        print(f"[VALIDATION] Analizando salida para caso: {case_name}")
-        print(f"[VALIDATION] Código de retorno: {return_code}")
-        print(f"[VALIDATION] Fuente de instrucciones: {instruction_source}")
-        
-        # Análisis básico por código de retorno
-        if return_code != 0:
-            print(f"[VALIDATION] Fallo por código de retorno: {return_code}")
-            return False, 'fallido', f'Error de ejecución (código {return_code})'
-        
-        # Buscar errores explícitos incluso con código 0
-        error_found = False
-        for error_pattern in error_indicators:
-            if re.search(error_pattern, combined_output, re.IGNORECASE):
-                error_found = True
-                print(f"[VALIDATION] Error detectado: {error_pattern}")
-                break
-        
-        if error_found:
-            return False, 'fallido', 'Error detectado en la salida del proceso'
-        
-        # Buscar indicadores de éxito específicos
-        success_found = False
-        success_type = ""
-        
-        # Verificar indicadores de browser-use
-        for success_pattern in browseruse_success:
-            if re.search(success_pattern, combined_output, re.IGNORECASE):
-                success_found = True
-                success_type = "browser-use completion"
-                print(f"[VALIDATION] Éxito browser-use detectado: {success_pattern}")
-                break
-        
-        # Verificar indicadores generales de éxito
-        if not success_found:
-            for success_pattern in success_indicators:
-                if re.search(success_pattern, combined_output, re.IGNORECASE):
-                    success_found = True
-                    success_type = "general completion"
-                    print(f"[VALIDATION] Éxito general detectado: {success_pattern}")
-                    break
-        
-        # Verificar ejecución paso a paso
-        if not success_found and instruction_source == 'qa_pilot':
-            step_count = 0
-            for step_pattern in step_indicators:
-                matches = re.findall(step_pattern, combined_output, re.IGNORECASE)
-                step_count += len(matches)
-            
-            if step_count >= 1:  # Al menos un paso completado
-                success_found = True
-                success_type = f"step-by-step ({step_count} pasos)"
-                print(f"[VALIDATION] Ejecución paso a paso detectada: {step_count} pasos")
-        
-        # Validación de longitud de salida (al menos actividad)
-        if len(stdout_text) < 100 and len(stderr_text) < 50:
-            print(f"[VALIDATION] Salida muy corta, posible ejecución incompleta")
-            return False, 'fallido', 'Ejecución demasiado breve, posiblemente incompleta'
-        
-        # Resultado final
-        if success_found:
-            message = f'Caso ejecutado correctamente ({success_type})'
-            print(f"[VALIDATION] ÉXITO: {message}")
-            return True, 'exitoso', message
-        else:
-            # Si no hay errores pero tampoco éxitos claros, asumir éxito parcial
-            message = 'Ejecución completada (sin confirmación explícita de éxito)'
-            print(f"[VALIDATION] ÉXITO PARCIAL: {message}")
-            return True, 'exitoso_parcial', message
-            
-    except Exception as e:
-        print(f"[VALIDATION] Error durante validación: {e}")
-        # Fallback a validación básica
-        if return_code == 0:
-            return True, 'exitoso', 'Ejecución completada (validación básica)'
-        else:
-            return False, 'fallido', f'Error de ejecución (código {return_code})'
-
-def execute_single_case_with_browser_use(case, case_index, total_cases, execution_path):
-    """
-    Ejecuta un caso individual usando browser-use (similar a run_test_background)
-    """
-    try:
-        print(f"❌ [FUNCION-ANTIGUA] ¡SE ESTÁ EJECUTANDO LA FUNCIÓN ANTIGUA!")
-        print(f"❌ [FUNCION-ANTIGUA] case_index: {case_index}, total_cases: {total_cases}")
-        print(f"❌ [FUNCION-ANTIGUA] execution_path: {execution_path}")
-        
-        print(f"[BROWSER-USE] Iniciando ejecución del caso {case_index+1}/{total_cases}")
-        
-        # Obtener datos del caso
-        case_id = case.get('id', f'case_{case_index}')
-        case_name = case.get('nombre', f'Caso {case_index + 1}')
-        url = case.get('url_extraida')
-        
-        # CORRECCIÓN 1: Priorizar instrucciones QA-Pilot mejoradas sobre pasos originales
-        pasos_originales = case.get('pasos', '').strip()
-        instrucciones_qa = case.get('instrucciones_qa_pilot', '').strip()
-        
-        # Prioridad: 1º QA-Pilot, 2º pasos originales (solo si QA-Pilot no existe o es muy corto)
-        if instrucciones_qa and len(instrucciones_qa) > 50:  # QA-Pilot debe tener contenido sustancial
-            instructions = instrucciones_qa
-            instruction_source = 'qa_pilot'
-            print(f"[BROWSER-USE] Usando instrucciones QA Pilot optimizadas ({len(instrucciones_qa)} chars)")
-        elif pasos_originales:
-            instructions = pasos_originales
-            instruction_source = 'original'
-            print(f"[BROWSER-USE] Usando pasos originales como fallback ({len(pasos_originales)} chars)")
-        else:
-            instructions = "Navegar por la página y explorar su contenido"
-            instruction_source = 'default'
-            print(f"[BROWSER-USE] Usando instrucciones por defecto (sin pasos definidos)")
-        
-        # Usar URL por defecto si no hay URL específica
-        if not url:
-            url = 'https://www.mercadolibre.cl/'
-            print(f"[BROWSER-USE] Sin URL específica, usando URL por defecto: {url}")
-        
-        print(f"[BROWSER-USE] Caso {case_index+1}/{total_cases}: {case_name}")
-        print(f"[BROWSER-USE] URL: {url}")
-        print(f"[BROWSER-USE] Instrucciones: {instructions[:100]}...")
-        print(f"[BROWSER-USE] Fuente: {instruction_source}")
-        
-        # CORRECCIÓN 2: Optimizar formato de instrucciones para browser-use
-        optimized_instructions = _optimize_instructions_for_browser_use(instructions, url, instruction_source)
-        print(f"[BROWSER-USE] Instrucciones optimizadas: {len(optimized_instructions)} chars")
-        
-        # Validar que al menos tenga instrucciones
-        if not optimized_instructions:
-            print(f"[BROWSER-USE] Caso inválido - Sin instrucciones de ejecución")
-            return {
-                'case_id': case_id,
-                'case_name': case_name,
-                'status': 'fallido',
-                'success': False,
-                'message': 'Caso inválido: sin instrucciones de ejecución',
-                'url_tested': url,
-                'execution_time': 0,
-                'timestamp': datetime.now().isoformat(),
-                'case_valid': False
-            }
-        
-        # Actualizar estado actual
-        print(f"[BROWSER-USE] Actualizando estado del caso {case_index}")
-        update_current_case_status(execution_path, case_index, 'ejecutando', case_name)
-        
-        # Obtener configuraciones directas (valores hardcoded más seguros para hilos)
-        print(f"[BROWSER-USE] Configurando directorios y ejecutables")
-        try:
-            # Usar rutas absolutas directas para evitar problemas de contexto
-            BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))  # Directorio del proyecto
-            SCRIPTS_DIR = os.path.join(BASE_DIR, 'test_scripts')
-            python_exe = sys.executable  # Ejecutable Python actual
-            
-            # Crear directorio de scripts si no existe
-            os.makedirs(SCRIPTS_DIR, exist_ok=True)
-            print(f"[BROWSER-USE] Configuraciones: BASE_DIR={BASE_DIR}")
-            print(f"[BROWSER-USE] SCRIPTS_DIR={SCRIPTS_DIR}")
-            print(f"[BROWSER-USE] python_exe={python_exe}")
-        except Exception as e:
-            print(f"[BROWSER-USE] Error configurando directorios: {e}")
-            raise Exception(f"No se pudieron configurar directorios: {e}")
-        
-        # Generar ID único para este caso
-        task_id = str(uuid.uuid4())
-        print(f"[BROWSER-USE] Task ID generado: {task_id}")
-        
-        # Configuración de ejecución
-        # Leer configuración desde el archivo de ejecución
-        try:
-            with open(execution_path, 'r', encoding='utf-8') as f:
-                execution_data = json.load(f)
-            show_browser = execution_data.get('show_browser', False)
-        except:
-            show_browser = False
-        
-        headless = not show_browser  # Si show_browser es True, headless es False
-        max_tiempo = 120  # CORRECCIÓN FINAL: 2 minutos máximo para tareas simples
-        screenshots = True  # Habilitar capturas para evidencia
-        browser = 'chrome'
-        fullscreen = True  # CORRECCIÓN: Usar fullscreen como en ejecución manual
-        
-        print(f"[BROWSER-USE] Configuración: headless={headless}, max_tiempo={max_tiempo}, browser={browser}, show_browser={show_browser}")
-        
-        # Generar script de test
-        print(f"[BROWSER-USE] Generando script de test")
-        script_path = os.path.join(SCRIPTS_DIR, f"bulk_test_{task_id}.py")
-        print(f"[BROWSER-USE] Ruta del script: {script_path}")
-        
+    def run_case():
         try:
-            script_content = generate_browser_use_script(
-                url=url,
-                instrucciones=optimized_instructions,  # CORRECCIÓN 2: Usar instrucciones optimizadas
-                headless=headless,
-                max_tiempo=max_tiempo,
-                capturar_pasos=screenshots,
-                browser=browser,
-                fullscreen=fullscreen,
-                task_id=task_id,
-                instruction_source=instruction_source  # Pasar fuente para logging
-            )
-            print(f"[BROWSER-USE] Script generado exitosamente ({len(script_content)} caracteres)")
-        except Exception as e:
-            print(f"[BROWSER-USE] Error generando script: {e}")
-            raise
-        
-        # Escribir el script
-        print(f"[BROWSER-USE] Escribiendo script a archivo")
-        try:
-            with open(script_path, 'w', encoding='utf-8-sig', errors='replace') as f:
-                f.write(script_content)
-            print(f"[BROWSER-USE] Script escrito exitosamente")
-        except Exception as e:
-            print(f"[BROWSER-USE] Error escribiendo script: {e}")
-            raise
-        
-        # Configurar entorno
-        print(f"[BROWSER-USE] Configurando entorno de ejecución")
-        env = os.environ.copy()
-        env['PYTHONIOENCODING'] = 'utf-8'
-        env['PYTHONUTF8'] = '1'
-        env['PYTHONLEGACYWINDOWSSTDIO'] = '0'
-        env['PYDANTIC_V2'] = '1'
-        env['PYDANTIC_STRICT_MODE'] = 'false'
-        env['PYDANTIC_COLORS'] = 'false'
-        env['BROWSER_USE_MODEL'] = 'claude-3-5-sonnet-20241022'  # CORRECCIÓN: Usar modelo exitoso
-        
-        start_time = time.time()
-        print(f"[BROWSER-USE] Iniciando ejecución del script")
-        
-        # Ejecutar el script
-        try:
-            # CORRECCIÓN CRÍTICA: Permitir que las ventanas del navegador sean visibles
-            creation_flags = 0  # No ocultar ventanas
-            if not show_browser:
-                # Solo ocultar la ventana de la consola del script, no del navegador
-                creation_flags = subprocess.CREATE_NO_WINDOW if platform.system() == 'Windows' else 0
-            
-            proceso = subprocess.Popen(
-                [python_exe, script_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env=env,
-                cwd=BASE_DIR,
-                bufsize=1,
-                creationflags=creation_flags
-            )
-            print(f"[BROWSER-USE] Proceso iniciado con PID: {proceso.pid}")
-            
-            # CORRECCIÓN: Reducir actualizaciones de progreso que pueden interferir
-            progress_count = 0
-            while proceso.poll() is None and progress_count < 3:
-                progress_step = (progress_count + 1) * 30  # Pasos más grandes
-                print(f"[BROWSER-USE] Progreso: {progress_step}%")
-                update_case_execution_progress(execution_path, case_index, progress_step, f"Ejecutando test - fase {progress_count + 1}/3")
-                time.sleep(max_tiempo * 0.05)  # Esperar más tiempo entre actualizaciones
-                progress_count += 1
-            
-            # Esperar a que termine
-            print(f"[BROWSER-USE] Esperando finalización del proceso")
-            return_code = proceso.wait(timeout=max_tiempo)
-            execution_time = time.time() - start_time
-            
-            print(f"[BROWSER-USE] Proceso terminado con código: {return_code}, tiempo: {execution_time:.2f}s")
-            
-            # Leer salida
-            stdout, stderr = proceso.communicate()
-            stdout_text = stdout.decode('utf-8', errors='replace') if stdout else ''
-            stderr_text = stderr.decode('utf-8', errors='replace') if stderr else ''
-            
-            print(f"[BROWSER-USE] STDOUT length: {len(stdout_text)}")
-            print(f"[BROWSER-USE] STDERR length: {len(stderr_text)}")
-            
-            # Si hay error, mostrar salida completa para debug
-            if return_code != 0:
-                print(f"[BROWSER-USE] ===== STDOUT COMPLETO (Error Code {return_code}) =====")
-                print(stdout_text)
-                print(f"[BROWSER-USE] ===== STDERR COMPLETO =====")
-                print(stderr_text)
-                print(f"[BROWSER-USE] ===== FIN DE SALIDA =====")
-            else:
-                if stdout_text:
-                    print(f"[BROWSER-USE] STDOUT preview: {stdout_text[:200]}...")
-                if stderr_text:
-                    print(f"[BROWSER-USE] STDERR preview: {stderr_text[:200]}...")
-            
-            # CORRECCIÓN 4: Mejorar la validación de que los pasos se completaron
-            success, status, message = _validate_execution_completion(
-                return_code, stdout_text, stderr_text, instruction_source, case_name
+            run_test_background(
+                case_task_id, url, instrucciones, headless, max_tiempo, 
+                screenshots, None, model_name, browser, fullscreen
             )
-            print(f"[BROWSER-USE] Resultado validado: {status} - {message}")
-            
-        except subprocess.TimeoutExpired:
-            print(f"[BROWSER-USE] Timeout después de {max_tiempo} segundos")
-            proceso.kill()
-            execution_time = max_tiempo
-            success = False
-            status = 'fallido'
-            message = f'Timeout después de {max_tiempo} segundos'
+        except Exception as run_error:
+            print(f"[ERROR] Error en run_test_background: {str(run_error)}")
+            traceback.print_exc()
             
-        except Exception as e:
-            print(f"[BROWSER-USE] Error durante ejecución: {e}")
-            execution_time = time.time() - start_time
-            success = False
-            status = 'error'
-            message = f'Error inesperado: {str(e)}'
-        
-        finally:
-            # Limpiar archivo de script
+            # Marcar el caso como error en test_status_db
+            with db_lock:
+                test_status_db[case_task_id] = {
+                    'status': 'error',
+                    'message': f'Error en ejecución: {str(run_error)}',
+                    'created_at': datetime.now().isoformat(),
+                    'case_name': case_name,
+                    'error_details': str(run_error)
+                }
+    
+    start_time = time.time()
+    case_thread = threading.Thread(target=run_case, name=f'excel-case-{i+1}', daemon=True)
+    case_thread.start()
+    
+    # El plazo corre desde que el caso obtiene navegador ('started_at'): con el pool lleno puede
+    # esperar en cola. Margen para generación del script y registro final además del tiempo
+    # del test; la espera en cola tampoco puede superar ese plazo.
+    case_timeout = max_tiempo + 60
+    while case_thread.is_alive():
+        with db_lock:
+            started_at = test_status_db.get(case_task_id, {}).get('started_at')
+        now = time.time()
+        deadline = (started_at or now) + case_timeout
+        if started_at is None and now - start_time > case_timeout:
+            deadline = now
+        if deadline <= now:
+            break
+        case_thread.join(timeout=min(deadline - now, 5))
+    if case_thread.is_alive():
+        print(f"{log_prefix} Caso {i+1} excedió el tiempo máximo ({max_tiempo}s), terminando proceso")
+        with subprocess_processes_lock:
+            proceso = active_subprocess_processes.get(case_task_id)
+        if proceso is not None:
             try:
-                if os.path.exists(script_path):
-                    os.remove(script_path)
-                    print(f"[BROWSER-USE] Script temporal eliminado")
-            except Exception as e:
-                print(f"[BROWSER-USE] No se pudo eliminar script temporal: {e}")
-        
-        # Crear resultado
-        result = {
-            'case_id': case_id,
-            'case_name': case_name,
-            'status': status,
-            'success': success,
-            'message': message,
-            'url_tested': url,
-            'execution_time': round(execution_time, 2),
-            'timestamp': datetime.now().isoformat(),
-            'case_valid': case.get('es_valido', False)
-        }
-        
-        print(f"[BROWSER-USE] Caso {case_index+1}/{total_cases} completado: {status} ({execution_time:.1f}s)")
-        return result
-        
-    except Exception as e:
-        print(f"[BROWSER-USE] Error ejecutando caso {case.get('id', f'case_{case_index}')}: {str(e)}")
-        print(f"[BROWSER-USE] Traceback: {traceback.format_exc()}")
-        return {
-            'case_id': case.get('id', f'case_{case_index}'),
-            'case_name': case.get('nombre', f'Caso {case_index+1}'),
-            'status': 'error',
-            'success': False,
-            'message': f'Error inesperado: {str(e)}',
-            'timestamp': datetime.now().isoformat(),
-            'execution_time': 0
-        }
+                proceso.kill()
+            except Exception as kill_error:
+                print(f"Error terminando proceso del caso {i+1}: {kill_error}")
+        case_thread.join(timeout=10)
+        with db_lock:
+            if case_task_id in test_status_db:
+                test_status_db[case_task_id]['status'] = 'error'
+                if started_at is None:
+                    test_status_db[case_task_id]['message'] = f'Timeout: el caso no obtuvo navegador en {case_timeout} segundos'
+                else:
+                    test_status_db[case_task_id]['message'] = f'Timeout: el caso excedió {max_tiempo} segundos'
+    
+    execution_time = time.time() - start_time
+    print(f"{log_prefix} Caso {i+1} completado en {execution_time:.1f}s")
+    
+    # Obtener resultado del caso
+    with db_lock:
+        case_result = dict(test_status_db.get(case_task_id, {}))
+    
+    # Crear resumen del resultado para la ejecución masiva
+    result_summary = {
+        'case_index': i,
+        'case_name': case_name,
+        'task_id': case_task_id,
+        'status': case_result.get('status', 'unknown'),
+        'message': case_result.get('message', 'Sin mensaje'),
+        'url': url,
+        'execution_time': execution_time,
+        'completed_at': datetime.now().isoformat(),
+        'screenshots_count': len(case_result.get('screenshots', [])),
+        'success': case_result.get('status') in ['completed', 'success', 'completado']  # ✅ CORRECCIÓN: reconocer múltiples estados como exitosos
+    }
+    print(f"{log_prefix} Resultado caso {i+1}: {result_summary['status']}")
+    return result_summary
+
+def _excel_case_error_result(case, i, error):
+    """Resultado de un caso que falló antes o fuera de run_test_background"""
+    return {
+        'case_index': i,
+        'case_name': case.get('nombre', f'Caso {i+1}'),
+        'task_id': None,
+        'status': 'error',
+        'message': f'Error: {str(error)}',
+        'url': case.get('url_extraida', 'N/A'),
+        'execution_time': 0.0,
+        'completed_at': datetime.now().isoformat(),
+        'screenshots_count': 0,
+        'success': False
+    }
 
 def execute_cases_sequential(execution_id, test_cases, execution_path):
     """
     Ejecuta casos de prueba uno por uno usando la misma lógica exitosa del home
     """
     try:
-        print(f"🚀 [NUEVA-FUNCION] ¡EJECUTANDO NUEVA FUNCIÓN ACTUALIZADA!")
-        print(f"🚀 [NUEVA-FUNCION] execution_id: {execution_id}")
-        print(f"🚀 [NUEVA-FUNCION] total_cases: {len(test_cases)}")
-        print(f"🚀 [NUEVA-FUNCION] execution_path: {execution_path}")
-        
         print(f"[EXCEL-SEQUENTIAL] Iniciando ejecución secuencial para {len(test_cases)} casos")
         
-        # Importar funciones del home que funcionan perfectamente
-        from app import run_test_background, test_status_db, db_lock, save_test_status_to_file
-        
+        show_browser = _read_show_browser(execution_path)
+        max_tiempo = _get_bulk_case_timeout()
         results = []
         
         for i, case in enumerate(test_cases):
             try:
-                case_name = case.get('nombre', f'Caso {i+1}')
-                print(f"[EXCEL-SEQUENTIAL] Ejecutando caso {i+1}/{len(test_cases)}: {case_name}")
-                
                 # Actualizar estado de ejecución masiva
-                update_current_case_status(execution_path, i, 'ejecutando', case_name)
-                
-                # Generar task_id único para este caso individual
-                case_task_id = str(uuid.uuid4())
-                
-                # Extraer datos del caso
-                url = case.get('url_extraida', case.get('datos_prueba', 'https://www.google.com'))
-                if not url or not url.startswith(('http://', 'https://')):
-                    url = 'https://www.google.com'
-                
-                # Combinar objetivo y pasos para las instrucciones
-                objetivo = case.get('objetivo', '')
-                pasos = case.get('pasos', '')
-                instrucciones = f"{objetivo}\n\n{pasos}".strip()
-                
-                if not instrucciones:
-                    instrucciones = f"Navegar a {url} y realizar pruebas básicas"
-                
-                print(f"[EXCEL-SEQUENTIAL] Caso {i+1} - URL: {url}")
-                print(f"[EXCEL-SEQUENTIAL] Caso {i+1} - Instrucciones: {instrucciones[:100]}...")
-                
-                # Leer show_browser desde el archivo de ejecución
-                show_browser = False
-                try:
-                    with open(execution_path, 'r', encoding='utf-8') as f:
-                        execution_record = json.load(f)
-                        show_browser = execution_record.get('show_browser', False)
-                except:
-                    pass
-                
-                # Configuración exactamente igual al home exitoso
-                headless = not show_browser  # Si show_browser=True, entonces headless=False
-                max_tiempo = 600  # Mismo timeout que el home exitoso
-                screenshots = True  # Siempre capturar screenshots
-                fullscreen = True  # Mismo que el home exitoso
-                browser = 'chrome'  # Mismo que el home exitoso
-                model_name = 'claude-3-5-sonnet-20241022'  # Modelo actualizado
-                
-                print(f"[EXCEL-SEQUENTIAL] Configuración igual al home - headless: {headless}, max_tiempo: {max_tiempo}, fullscreen: {fullscreen}")
-                
-                # Inicializar estado en test_status_db (exactamente igual que run_test)
-                with db_lock:
-                    test_status_db[case_task_id] = {
-                        'status': 'queued', 
-                        'message': 'En cola...', 
-                        'original_instructions': instrucciones,
-                        'current_action': 'Esperando para despegar...',
-                        'icon': 'fa-hourglass-start',
-                        'url': url,
-                        'created_at': datetime.now().isoformat(),
-                        'case_name': case_name,
-                        'case_index': i+1,
-                        'execution_id': execution_id
-                    }
-                
-                save_test_status_to_file()
-                
-                print(f"[EXCEL-SEQUENTIAL] Ejecutando run_test_background (función exitosa del home) para caso {i+1}")
-                
-                start_time = time.time()
-                
-                try:
-                    # Ejecutar usando exactamente la misma función exitosa del home
-                    print(f"[DEBUG] Llamando run_test_background con parámetros:")
-                    print(f"  - task_id: {case_task_id}")
-                    print(f"  - url: {url}")
-                    print(f"  - instrucciones (primeros 100 chars): {instrucciones[:100]}...")
-                    print(f"  - headless: {headless}")
-                    print(f"  - max_tiempo: {max_tiempo}")
-                    print(f"  - screenshots: {screenshots}")
-                    print(f"  - browser: {browser}")
-                    print(f"  - fullscreen: {fullscreen}")
-                    
-                    run_test_background(
-                        case_task_id, url, instrucciones, headless, max_tiempo, 
-                        screenshots, None, model_name, browser, fullscreen
-                    )
-                    
-                    print(f"[DEBUG] run_test_background completado sin excepción")
-                    
-                except Exception as run_error:
-                    print(f"[ERROR] Error en run_test_background: {str(run_error)}")
-                    print(f"[ERROR] Tipo de error: {type(run_error).__name__}")
-                    import traceback
-                    print(f"[ERROR] Traceback completo:")
-                    traceback.print_exc()
-                    
-                    # Marcar el caso como error en test_status_db
-                    with db_lock:
-                        test_status_db[case_task_id] = {
-                            'status': 'error',
-                            'message': f'Error en ejecución: {str(run_error)}',
-                            'created_at': datetime.now().isoformat(),
-                            'case_name': case_name,
-                            'error_details': str(run_error)
-                        }
-                
-                execution_time = time.time() - start_time
-                
-                print(f"[EXCEL-SEQUENTIAL] Caso {i+1} completado en {execution_time:.1f}s")
-                
-                # Esperar un momento para que la tarea se procese completamente
-                time.sleep(2)
-                
-                # Obtener resultado del caso
-                with db_lock:
-                    case_result = test_status_db.get(case_task_id, {})
-                
-                print(f"[DEBUG] Estado final del caso {i+1}:")
-                print(f"  - Status: {case_result.get('status', 'NO_ENCONTRADO')}")
-                print(f"  - Message: {case_result.get('message', 'NO_MESSAGE')}")
-                print(f"  - Screenshots: {len(case_result.get('screenshots', []))}")
-                
-                # Si no hay resultado o está en estado incompleto, esperar más tiempo
-                if not case_result or case_result.get('status') in ['queued', 'running', 'generating']:
-                    print(f"[DEBUG] Caso {i+1} aún procesándose, esperando 5 segundos adicionales...")
-                    time.sleep(5)
-                    
-                    with db_lock:
-                        case_result = test_status_db.get(case_task_id, {})
-                    
-                    print(f"[DEBUG] Estado final tras espera adicional:")
-                    print(f"  - Status: {case_result.get('status', 'NO_ENCONTRADO')}")
-                    print(f"  - Message: {case_result.get('message', 'NO_MESSAGE')}")
-                
-                # Crear resumen del resultado para la ejecución masiva
-                result_summary = {
-                    'case_index': i,
-                    'case_name': case_name,
-                    'task_id': case_task_id,
-                    'status': case_result.get('status', 'unknown'),
-                    'message': case_result.get('message', 'Sin mensaje'),
-                    'url': url,
-                    'execution_time': execution_time,
-                    'completed_at': datetime.now().isoformat(),
-                    'screenshots_count': len(case_result.get('screenshots', [])),
-                    'success': case_result.get('status') in ['completed', 'success', 'completado']  # ✅ CORRECCIÓN: reconocer múltiples estados como exitosos
-                }
-                
-                results.append(result_summary)
-                print(f"[EXCEL-SEQUENTIAL] Resultado caso {i+1}: {result_summary['status']}")
-                print(f"[DEBUG] Caso {i+1} marcado como {'ÉXITO' if result_summary['success'] else 'FALLO'}")
-                
-                # Actualizar progreso general
-                overall_progress = ((i + 1) / len(test_cases)) * 100
-                update_execution_progress(execution_path, results, len(test_cases), overall_progress)
-                
+                update_current_case_status(execution_path, i, 'ejecutando', case.get('nombre', f'Caso {i+1}'))
+                results.append(execute_excel_case(execution_id, case, i, len(test_cases), show_browser, max_tiempo))
             except Exception as e:
                 print(f"[EXCEL-SEQUENTIAL] Error ejecutando caso {i+1}: {str(e)}")
-                import traceback
                 traceback.print_exc()
-                
-                # Agregar resultado de error
-                error_result = {
-                    'case_index': i,
-                    'case_name': case.get('nombre', f'Caso {i+1}'),
-                    'task_id': None,
-                    'status': 'error',
-                    'message': f'Error: {str(e)}',
-                    'url': case.get('url_extraida', 'N/A'),
-                    'execution_time': 0.0,
-                    'completed_at': datetime.now().isoformat(),
-                    'screenshots_count': 0,
-                    'success': False
-                }
-                results.append(error_result)
-                
-                # Actualizar progreso incluso con error
-                overall_progress = ((i + 1) / len(test_cases)) * 100
-                update_execution_progress(execution_path, results, len(test_cases), overall_progress)
+                results.append(_excel_case_error_result(case, i, e))
+            
+            # Actualizar progreso general (incluso con error)
+            overall_progress = ((i + 1) / len(test_cases)) * 100
+            update_execution_progress(execution_path, results, len(test_cases), overall_progress)
         
         # Finalizar ejecución
         finalize_execution(execution_path, results)
@@ -1393,52 +756,50 @@ def execute_cases_sequential(execution_id, test_cases, execution_path):
         
     except Exception as e:
         print(f"[EXCEL-SEQUENTIAL] Error crítico en ejecución secuencial: {str(e)}")
-        import traceback
         traceback.print_exc()
         current_app.logger.error(f"Error en ejecución secuencial: {str(e)}")
         mark_execution_failed(execution_path, str(e))
 
 def execute_cases_background(execution_id, test_cases, execution_path):
     """
-    Ejecuta los casos de prueba en paralelo usando browser-use
+    Ejecuta los casos de prueba en paralelo con un número acotado de workers
+    (BULK_MAX_PARALLEL) y un tiempo máximo por caso (BULK_CASE_TIMEOUT)
     """
     try:
-        results = []
         total_cases = len(test_cases)
+        max_parallel = _get_bulk_max_parallel(total_cases)
+        show_browser = _read_show_browser(execution_path)
+        max_tiempo = _get_bulk_case_timeout()
+        results = []
         
-        # Para ejecución paralela, usamos threading
-        def execute_case_thread(case, case_index):
-            return execute_single_case_with_browser_use(case, case_index, total_cases, execution_path)
+        # Las escrituras del archivo de ejecución son leer-modificar-escribir: se serializan
+        # con este lock para que los workers no se pisen las actualizaciones entre sí
+        progress_lock = threading.Lock()
         
-        # Crear threads para cada caso (máximo 3 en paralelo para no sobrecargar)
-        max_parallel = min(3, total_cases)
-        threads = []
-        case_results = [None] * total_cases
+        print(f"[EXCEL-PARALLEL] Iniciando ejecución paralela para {total_cases} casos ({max_parallel} workers)")
         
-        for i in range(0, total_cases, max_parallel):
-            batch = test_cases[i:i+max_parallel]
-            batch_threads = []
-            
-            for j, case in enumerate(batch):
-                case_index = i + j
-                thread = threading.Thread(
-                    target=lambda idx=case_index, c=case: case_results.__setitem__(idx, execute_case_thread(c, idx))
-                )
-                thread.start()
-                batch_threads.append(thread)
-            
-            # Esperar a que termine el batch
-            for thread in batch_threads:
-                thread.join()
-            
-            # Actualizar progreso
-            completed = i + len(batch)
-            progress = (completed / total_cases) * 100
-            current_results = [r for r in case_results[:completed] if r is not None]
-            update_execution_progress(execution_path, current_results, total_cases, progress)
+        def run_case(i, case):
+            with progress_lock:
+                update_current_case_status(execution_path, i, 'ejecutando', case.get('nombre', f'Caso {i+1}'))
+            return execute_excel_case(execution_id, case, i, total_cases, show_browser, max_tiempo,
+                                      log_prefix='[EXCEL-PARALLEL]')
         
-        # Recopilar todos los resultados
-        results = [r for r in case_results if r is not None]
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='excel-bulk') as executor:
+            futures = {executor.submit(run_case, i, case): (i, case) for i, case in enumerate(test_cases)}
+            
+            for future in as_completed(futures):
+                i, case = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[EXCEL-PARALLEL] Error ejecutando caso {i+1}: {str(e)}")
+                    result = _excel_case_error_result(case, i, e)
+                
+                # Actualizar progreso a medida que termina cada caso
+                with progress_lock:
+                    results.append(result)
+                    results.sort(key=lambda r: r['case_index'])
+                    update_execution_progress(execution_path, list(results), total_cases)
         
         # Finalizar ejecución
         finalize_execution(execution_path, results)
@@ -1448,6 +809,22 @@ def execute_cases_background(execution_id, test_cases, execution_path):
         current_app.logger.error(f"Error en ejecución paralela: {str(e)}")
         mark_execution_failed(execution_path, str(e))
 
+def publish_bulk_event(execution_record, event):
+    """Publica el progreso de una ejecución masiva en el canal de eventos (SSE)"""
+    topic = bulk_topic(execution_record.get('id', ''))
+    if not event_bus.has_subscribers(topic):
+        return
+    event_bus.publish(topic, event, {
+        'status': execution_record.get('status'),
+        'progress': execution_record.get('progress', 0),
+        'total_cases': execution_record.get('total_cases', 0),
+        'completed_cases': execution_record.get('completed_cases', 0),
+        'successful_cases': execution_record.get('successful_cases', 0),
+        'failed_cases': execution_record.get('failed_cases', 0),
+        'results': execution_record.get('results', []),
+        'error': execution_record.get('error')
+    })
+
 def update_current_case_status(execution_path, case_index, status, case_name):
     """Actualiza el estado del caso actual en ejecución"""
     try:
@@ -1464,20 +841,6 @@ def update_current_case_status(execution_path, case_index, status, case_name):
         print(f"Error actualizando estado del caso actual: {e}")
         print(f"Traceback: {traceback.format_exc()}")
 
-def update_case_execution_progress(execution_path, case_index, case_progress, step_description):
-    """Actualiza el progreso del caso individual en ejecución"""
-    try:
-        execution_record = safe_read_execution_file(execution_path)
-        
-        execution_record['current_case_progress'] = case_progress
-        execution_record['current_step_description'] = step_description
-        
-        safe_write_execution_file(execution_path, execution_record)
-            
-    except Exception as e:
-        print(f"Error actualizando progreso del caso: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
-
 def update_execution_progress(execution_path, results, total_cases, overall_progress=None):
     """Actualiza el progreso de la ejecución"""
     try:
@@ -1502,6 +865,7 @@ def update_execution_progress(execution_path, results, total_cases, overall_prog
         execution_record['success_rate'] = round((successful_cases / len(results)) * 100, 2) if results else 0
         
         safe_write_execution_file(execution_path, execution_record)
+        publish_bulk_event(execution_record, 'progress')
             
     except Exception as e:
         print(f"Error actualizando progreso: {e}")
@@ -1525,6 +889,7 @@ def finalize_execution(execution_path, results):
         execution_record['progress'] = 100
         
         safe_write_execution_file(execution_path, execution_record)
+        publish_bulk_event(execution_record, 'finished')
         print(f"✅ Ejecución finalizada exitosamente. Estado: completado, Progreso: 100%")
             
     except Exception as e:
@@ -1541,12 +906,38 @@ def mark_execution_failed(execution_path, error_message):
         execution_record['end_timestamp'] = datetime.now().isoformat()
         
         safe_write_execution_file(execution_path, execution_record)
+        publish_bulk_event(execution_record, 'finished')
         print(f"❌ Ejecución marcada como fallida: {error_message}")
             
     except Exception as e:
         print(f"Error marcando ejecución como fallida: {e}")
         print(f"Traceback: {traceback.format_exc()}")
 
+@excel_bp.route('/events/bulk/<execution_id>', methods=['GET'])
+def stream_bulk_execution_events(execution_id):
+    """
+    Canal SSE de una ejecución masiva: 'snapshot', 'progress' y 'finished'
+    """
+    try:
+        subscription = event_bus.subscribe(bulk_topic(execution_id))
+    except TooManySubscribers as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    
+    execution_path = os.path.join(tempfile.gettempdir(), f"bulk_execution_{execution_id}.json")
+    try:
+        snapshot = safe_read_execution_file(execution_path)
+    except Exception:
+        snapshot = {'id': execution_id, 'status': 'no_encontrado'}
+    
+    def finished(event, data):
+        return event == 'finished' or (event == 'snapshot' and data.get('status') in ('completado', 'fallido', 'no_encontrado'))
+    
+    return current_app.response_class(
+        iter_sse(subscription, get_heartbeat_seconds(), initial_events=[('snapshot', snapshot)], is_finished=finished),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @excel_bp.route('/execution_status/<execution_id>', methods=['GET'])
 def get_execution_status(execution_id):
     """
@@ -1941,4 +1332,10 @@ def generate_bulk_word_report(execution_id):
 # Función para registrar el blueprint en la aplicación principal
 def register_excel_routes(app):
     """Registra las rutas de Excel en la aplicación Flask"""
-    app.register_blueprint(excel_bp) 
\ No newline at end of file
+    app.register_blueprint(excel_bp)
+    
+    # Reanudar los análisis huérfanos (su proceso dueño se detuvo antes de terminarlos)
+    try:
+        get_analysis_job_manager().resume_pending()
+    except OSError as e:
+        print(f"⚠️ No se pudieron reanudar los trabajos de análisis: {e}") 
\ No newline at end of file
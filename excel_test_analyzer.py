@@ -8,11 +8,147 @@ import pandas as pd
 import re
 import json
 import os
-from typing import Dict, List, Tuple, Optional
+import functools
+import itertools
+from typing import Any, Dict, Iterator, List, Tuple, Optional
 from dataclasses import dataclass, asdict
 import anthropic
 from urllib.parse import urlparse
 
+from ai_analysis_engine import ConcurrentAIAnalyzer
+from analysis_cache import get_analysis_cache, make_key
+
+# Modelo y versión del prompt de análisis; forman parte de la clave de la caché de análisis,
+# incrementar PROMPT_VERSION al cambiar _create_focused_analysis_prompt o _parse_claude_response
+AI_MODEL = "claude-3-sonnet-20240229"
+PROMPT_VERSION = "1"
+
+# Filas iniciales de cada hoja en las que se buscan los headers
+HEADER_SCAN_ROWS = 20
+
+# Filas que se validan y convierten juntas (acota la memoria al leer planillas grandes)
+ROW_CHUNK_SIZE = 2000
+
+# Textos que delatan filas de header o metadatos del documento
+ROW_EXCLUDE_PATTERN = re.compile('documento|analista|proyecto|fecha|version')
+
+# Patrones para detectar URLs, en orden de prioridad
+URL_PATTERNS = [
+    re.compile(r'https?://[^\s]+', re.IGNORECASE),
+    re.compile(r'www\.[^\s]+', re.IGNORECASE),
+    re.compile(r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}[^\s]*', re.IGNORECASE),
+]
+
+# Indicadores de que un caso es del sistema interno de postulación/admisión (Template.xlsx)
+INTERNAL_INDICATORS = [
+    'postulante', 'postulación', 'ingreso postulante',
+    'rut', 'dv k', 'relacion academica', 'dec', '3ra base',
+    'módulo', 'admisión', 'actualización', 'datos del postulante'
+]
+INTERNAL_INDICATORS_PATTERN = '|'.join(re.escape(indicator) for indicator in INTERNAL_INDICATORS)
+
+# Palabras que indican pasos bien estructurados para automatización
+AUTOMATION_KEYWORDS = ['localizar', 'hacer clic', 'escribir', 'presionar', 'verificar']
+
+# Numeración de pasos ("1.", "2)", "Paso 3:") que se elimina al optimizar instrucciones
+STEP_NUMBERING_PATTERN = re.compile(r'^(\d+[\.\)]\s*|paso\s*\d+[\.\:]\s*)', re.IGNORECASE)
+
+# Patrones de mejora para hacer instrucciones más específicas, aplicados en orden
+INSTRUCTION_IMPROVEMENTS = [(re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in [
+    # Búsquedas
+    (r'buscar (.+)', r'localizar la barra de búsqueda y escribir "\1", luego presionar Enter'),
+    (r'escribir (.+) en (.+)', r'localizar el campo "\2" y escribir "\1"'),
+    (r'ingresar (.+)', r'escribir "\1" en el campo correspondiente'),
+    
+    # Clicks y navegación
+    (r'hacer clic en (.+)', r'localizar y hacer clic en el elemento "\1"'),
+    (r'presionar (.+)', r'localizar y hacer clic en el botón "\1"'),
+    (r'seleccionar (.+)', r'localizar y seleccionar la opción "\1"'),
+    (r'ir a (.+)', r'navegar hacia la sección "\1"'),
+    
+    # Verificaciones
+    (r'verificar (.+)', r'comprobar que "\1" esté visible en la página'),
+    (r'revisar (.+)', r'verificar que "\1" se muestre correctamente'),
+    
+    # Filtros y opciones
+    (r'filtrar por (.+)', r'localizar los filtros y seleccionar "\1"'),
+    (r'expandir (.+)', r'hacer clic para expandir la sección "\1"'),
+]]
+
+@functools.lru_cache(maxsize=4096)
+def _executable_instruction(instruction: str) -> str:
+    """
+    Implementación de ExcelTestAnalyzer._make_instruction_executable; las planillas repiten
+    mucho los mismos pasos (login, cerrar sesión...), por eso se memoriza el resultado
+    """
+    instruction = instruction.strip()
+    
+    # Aplicar mejoras
+    for pattern, replacement in INSTRUCTION_IMPROVEMENTS:
+        instruction = pattern.sub(replacement, instruction)
+    
+    # Agregar contexto de espera si es necesario
+    if any(word in instruction.lower() for word in ['localizar', 'buscar', 'encontrar']):
+        instruction += ', esperando a que el elemento esté visible'
+    
+    return instruction
+
+def _is_empty(value: Any) -> bool:
+    """Celda vacía: None (openpyxl) o NaN/NaT (pandas)"""
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+def _iter_sheet_rows(file_path: str, all_sheets: bool = False) -> Iterator[Tuple[str, Iterator[tuple]]]:
+    """
+    Genera (nombre de hoja, iterador de filas como tuplas de valores).
+    
+    Los .xlsx se leen con openpyxl en modo read-only (streaming, sin cargar la hoja en
+    memoria); los .xls antiguos, que openpyxl no soporta, se leen con pandas.
+    """
+    if file_path.lower().endswith('.xls'):
+        sheets = pd.read_excel(file_path, sheet_name=None if all_sheets else 0, header=None)
+        if isinstance(sheets, pd.DataFrame):
+            sheets = {0: sheets}
+        for sheet_name, df in sheets.items():
+            yield str(sheet_name), df.itertuples(index=False, name=None)
+        return
+    
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheets = workbook.worksheets if all_sheets else workbook.worksheets[:1]
+        for worksheet in worksheets:
+            # Algunos generadores escriben dimensiones incorrectas que truncan la lectura read-only
+            worksheet.reset_dimensions()
+            yield worksheet.title, worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _column_names(header_values: tuple) -> List[str]:
+    """Nombres de columna a partir de la fila de headers, con la misma convención que pandas"""
+    columns = []
+    seen: Dict[str, int] = {}
+    for i, value in enumerate(header_values):
+        name = f"Unnamed: {i}" if _is_empty(value) or str(value).strip() == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+def _normalize_url_candidate(candidate: str) -> Optional[str]:
+    """URL completa a partir de un texto que parece URL, o None si no tiene dominio"""
+    url = candidate.rstrip('.,;)')
+    if not url.startswith('http'):
+        url = f'https://{url}'
+    try:
+        return url if urlparse(url).netloc else None
+    except ValueError:
+        return None
+
+
 @dataclass
 class TestCase:
     """Estructura de un caso de prueba"""
@@ -61,7 +197,8 @@ class ExcelTestAnalyzer:
                     print(f"Error leyendo .env: {e}")
         
         if self.anthropic_api_key:
-            self.client = anthropic.Anthropic(api_key=self.anthropic_api_key)
+            # Los reintentos ante 429/529 los gestiona ConcurrentAIAnalyzer con backoff y jitter
+            self.client = anthropic.Anthropic(api_key=self.anthropic_api_key, max_retries=0)
             print("✅ Análisis con Claude IA habilitado")
         else:
             self.client = None
@@ -162,43 +299,50 @@ class ExcelTestAnalyzer:
         print(f"[HEADER-DETECT] ✅ Mejor coincidencia: fila {best_row} con {best_match} matches")
         return best_row, best_columns
     
-    def extract_test_cases(self, file_path: str) -> List[TestCase]:
-        """Extrae casos de prueba del archivo Excel"""
+    def extract_test_cases(self, file_path: str, all_sheets: bool = False) -> List[TestCase]:
+        """Extrae casos de prueba del archivo Excel (la primera hoja, o todas con all_sheets=True)"""
         
         try:
-            # Leer la primera hoja del Excel
-            excel_file = pd.ExcelFile(file_path)
-            first_sheet = excel_file.sheet_names[0]
-            
-            # Leer sin header para detectar estructura
-            df_raw = pd.read_excel(file_path, sheet_name=first_sheet, header=None)
-            
-            # Detectar headers
-            header_row, header_columns = self.detect_headers(df_raw)
-            
+            return list(self.iter_test_cases(file_path, all_sheets))
+        except Exception as e:
+            raise Exception(f"Error al procesar el archivo Excel: {str(e)}")
+    
+    def iter_test_cases(self, file_path: str, all_sheets: bool = False) -> Iterator[TestCase]:
+        """
+        Genera los casos de prueba leyendo el archivo en una sola pasada.
+        
+        Sólo las primeras HEADER_SCAN_ROWS filas de cada hoja se retienen para detectar
+        los headers; el resto se valida y convierte a TestCase en bloques de ROW_CHUNK_SIZE
+        filas sin cargar la hoja completa.
+        """
+        case_counter = 1
+        headers_found = False
+        
+        for sheet_name, rows in _iter_sheet_rows(file_path, all_sheets):
+            # Retener sólo las primeras filas para detectar la estructura
+            head = list(itertools.islice(rows, HEADER_SCAN_ROWS))
+            if not head:
+                continue
+            header_row, _ = self.detect_headers(pd.DataFrame(head))
             if header_row == -1:
-                raise ValueError("No se pudieron detectar los headers del archivo Excel")
-            
-            # Leer con el header detectado
-            df = pd.read_excel(file_path, sheet_name=first_sheet, header=header_row)
-            
-            # Mapear columnas a nuestros campos
-            column_mapping = self._map_columns(df.columns)
-            
-            test_cases = []
-            case_counter = 1
-            
-            for idx, row in df.iterrows():
-                if self._is_valid_row(row):
-                    test_case = self._create_test_case(row, column_mapping, case_counter)
-                    if test_case:
-                        test_cases.append(test_case)
-                        case_counter += 1
+                print(f"[EXCEL-READ] ⚠️ Hoja '{sheet_name}' sin headers reconocibles, se omite")
+                continue
+            headers_found = True
             
-            return test_cases
+            columns = _column_names(head[header_row])
+            column_mapping = self._map_columns(columns)
             
-        except Exception as e:
-            raise Exception(f"Error al procesar el archivo Excel: {str(e)}")
+            data_rows = itertools.chain(head[header_row + 1:], rows)
+            while True:
+                chunk = list(itertools.islice(data_rows, ROW_CHUNK_SIZE))
+                if not chunk:
+                    break
+                for test_case in self._rows_to_test_cases(columns, chunk, column_mapping, case_counter):
+                    case_counter += 1
+                    yield test_case
+        
+        if not headers_found:
+            raise ValueError("No se pudieron detectar los headers del archivo Excel")
     
     def _map_columns(self, columns: List[str]) -> Dict[str, str]:
         """Mapea las columnas del Excel a nuestros campos estándar"""
@@ -294,71 +438,63 @@ class ExcelTestAnalyzer:
         
         return mapping
     
-    def _is_valid_row(self, row: pd.Series) -> bool:
-        """Verifica si una fila contiene un caso de prueba válido"""
-        
-        # Verificar que no sea una fila completamente vacía
-        non_null_values = row.dropna()
-        if len(non_null_values) < 2:
-            return False
-        
-        # Verificar que contenga texto relevante
-        row_text = ' '.join([str(val) for val in non_null_values]).lower()
-        
-        # Excluir filas que parecen ser headers o metadatos
-        exclude_patterns = ['documento', 'analista', 'proyecto', 'fecha', 'version']
-        if any(pattern in row_text for pattern in exclude_patterns):
-            return False
+    def _rows_to_test_cases(self, columns: List[str], rows: List[tuple], column_mapping: Dict[str, str],
+                            case_counter: int) -> List[TestCase]:
+        """
+        Valida un bloque de filas y crea los TestCase de las válidas.
         
-        return True
-    
-    def _create_test_case(self, row: pd.Series, column_mapping: Dict[str, str], case_counter: int) -> Optional[TestCase]:
-        """Crea un objeto TestCase desde una fila del Excel"""
+        Las filas se recorren como tuplas (sin armar un dict ni un DataFrame por bloque): la
+        posición de cada campo se resuelve una vez y los patrones están precompilados.
+        """
+        positions = {field: columns.index(column) for field, column in column_mapping.items() if column in columns}
         
-        try:
-            # Extraer valores usando el mapeo de columnas
-            def get_value(field: str) -> str:
-                if field in column_mapping and column_mapping[field] in row.index:
-                    val = row[column_mapping[field]]
-                    return str(val) if pd.notna(val) else ""
+        def get_value(values: tuple, field: str) -> str:
+            position = positions.get(field)
+            if position is None or position >= len(values):
                 return ""
+            val = values[position]
+            return "" if _is_empty(val) else str(val)
+        
+        test_cases = []
+        from_column = 0
+        extracted = 0
+        for values in rows:
+            # Una fila es válida si tiene al menos 2 valores y no parece un header o metadato
+            non_null_values = [val for val in values if isinstance(val, str) or not _is_empty(val)]
+            if len(non_null_values) < 2:
+                continue
+            if ROW_EXCLUDE_PATTERN.search(' '.join(map(str, non_null_values)).lower()):
+                continue
             
-            # Generar ID si no existe
-            case_id = get_value('id')
+            case_id = get_value(values, 'id')
             if not case_id or case_id.lower() in ['nan', 'none', '']:
-                case_id = f"CP-{case_counter:03d}"
+                case_id = f"CP-{case_counter + len(test_cases):03d}"
+            pasos = get_value(values, 'pasos')
+            datos_prueba = get_value(values, 'datos_prueba')
             
             # Extraer URL: primero de columna específica, luego de pasos/datos
-            pasos = get_value('pasos')
-            datos_prueba = get_value('datos_prueba')
-            url_destino = get_value('url_destino')  # Nueva: columna específica de URL
-            
-            # Priorizar URL de columna específica
-            if url_destino and url_destino.strip():
-                url_extraida = url_destino.strip()
-                print(f"[URL-EXTRACT] 🎯 URL extraída de columna destino: {url_extraida}")
+            url_extraida = get_value(values, 'url_destino').strip()
+            if url_extraida:
+                from_column += 1
             else:
                 url_extraida = self._extract_url(pasos + " " + datos_prueba)
-                if url_extraida:
-                    print(f"[URL-EXTRACT] 🔍 URL extraída de pasos/datos: {url_extraida}")
+                extracted += url_extraida is not None
             
-            test_case = TestCase(
+            test_cases.append(TestCase(
                 id=case_id,
-                nombre=get_value('nombre'),
-                historia_usuario=get_value('historia_usuario'),
-                objetivo=get_value('objetivo'),
-                precondicion=get_value('precondicion'),
+                nombre=get_value(values, 'nombre'),
+                historia_usuario=get_value(values, 'historia_usuario'),
+                objetivo=get_value(values, 'objetivo'),
+                precondicion=get_value(values, 'precondicion'),
                 pasos=pasos,
                 datos_prueba=datos_prueba,
-                resultado_esperado=get_value('resultado_esperado'),
+                resultado_esperado=get_value(values, 'resultado_esperado'),
                 url_extraida=url_extraida
-            )
-            
-            return test_case
-            
-        except Exception as e:
-            print(f"Error al crear caso de prueba: {str(e)}")
-            return None
+            ))
+        
+        print(f"[URL-EXTRACT] 🎯 URLs: {from_column} de columna destino, "
+              f"{extracted} extraídas de pasos/datos, de {len(test_cases)} filas")
+        return test_cases
     
     def _extract_url(self, text: str) -> Optional[str]:
         """Extrae URL del texto de pasos o datos de prueba"""
@@ -366,24 +502,12 @@ class ExcelTestAnalyzer:
         if not text:
             return None
         
-        # Patrones para detectar URLs
-        url_patterns = [
-            r'https?://[^\s]+',
-            r'www\.[^\s]+',
-            r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}[^\s]*'
-        ]
-        
-        for pattern in url_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                url = matches[0].rstrip('.,;)')
-                # Validar que sea una URL válida
-                try:
-                    parsed = urlparse(url if url.startswith('http') else f'https://{url}')
-                    if parsed.netloc:
-                        return url if url.startswith('http') else f'https://{url}'
-                except:
-                    continue
+        for pattern in URL_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                url = _normalize_url_candidate(match.group())
+                if url:
+                    return url
         
         return None
     
@@ -417,23 +541,40 @@ class ExcelTestAnalyzer:
         if problematic_cases and self.client:
             print("🤖 Fase 2: Análisis con IA para casos problemáticos...")
             
-            for i, test_case in enumerate(problematic_cases):
+            # Análisis con IA solo si realmente lo necesita; los casos ya analizados salen de la caché
+            ai_cases = []
+            cached_count = 0
+            for test_case in problematic_cases:
+                if not self._needs_ai_analysis(test_case):
+                    continue
+                cached = self._get_cached_analysis(test_case, data_mode)
+                if cached is None:
+                    ai_cases.append(test_case)
+                else:
+                    self._update_case_with_ai_result(test_case, cached)
+                    cached_count += 1
+            if cached_count:
+                print(f"💾 Análisis obtenidos de caché: {cached_count}")
+            
+            def on_progress(completed, total, test_case):
+                if progress_callback:
+                    progress = 75 + (completed / total) * 15  # 75-90%
+                    progress_callback(int(progress), f"IA: Analizado caso {completed}/{total}", 
+                                    f"Optimizando caso '{test_case.nombre[:30]}...'")
+            
+            engine = ConcurrentAIAnalyzer.from_env()
+            results = engine.run(ai_cases, lambda tc: self._analyze_single_case_with_ai(tc, data_mode), on_progress)
+            
+            for test_case, (analysis_result, error) in zip(ai_cases, results):
+                if error is not None:
+                    print(f"Error al analizar caso {test_case.id} con IA: {str(error)}")
+                    continue  # Mantener validación básica
                 try:
-                    if progress_callback:
-                        progress = 75 + (i / len(problematic_cases)) * 15  # 75-90%
-                        progress_callback(int(progress), f"IA: Analizando caso {i+1}/{len(problematic_cases)}", 
-                                        f"Optimizando caso '{test_case.nombre[:30]}...'")
-                    
-                    # Análisis con IA solo si realmente lo necesita
-                    if self._needs_ai_analysis(test_case):
-                        analysis_result = self._analyze_single_case_with_ai(test_case, data_mode)
-                        self._update_case_with_ai_result(test_case, analysis_result)
-                    
-                    analyzed_cases.append(test_case)
-                    
+                    self._update_case_with_ai_result(test_case, analysis_result)
                 except Exception as e:
-                    print(f"Error al analizar caso {test_case.id} con IA: {str(e)}")
-                    analyzed_cases.append(test_case)  # Mantener validación básica
+                    print(f"Error al aplicar análisis IA al caso {test_case.id}: {str(e)}")
+            
+            analyzed_cases.extend(problematic_cases)
         else:
             analyzed_cases.extend(problematic_cases)
         
@@ -461,10 +602,24 @@ class ExcelTestAnalyzer:
     def _enhanced_basic_validation(self, test_cases: List[TestCase]) -> List[TestCase]:
         """Validación optimizada para estructura URL + Paso a Paso (tolerante y práctica)"""
         
-        for test_case in test_cases:
+        if not test_cases:
+            return test_cases
+        
+        # Métricas de todos los casos de una vez (operaciones de texto de pandas por columna)
+        pasos = pd.Series([tc.pasos for tc in test_cases], dtype=object).fillna('')
+        pasos_lower = pasos.str.lower()
+        objetivo_lower = pd.Series([tc.objetivo for tc in test_cases], dtype=object).fillna('').str.lower()
+        is_internal = (pasos_lower.str.contains(INTERNAL_INDICATORS_PATTERN)
+                       | objetivo_lower.str.contains(INTERNAL_INDICATORS_PATTERN)).tolist()
+        pasos_length = pasos.str.strip().str.len().tolist()
+        keyword_counts = sum(
+            pasos_lower.str.contains(keyword, regex=False).astype(int) for keyword in AUTOMATION_KEYWORDS
+        ).tolist()
+        
+        for i, test_case in enumerate(test_cases):
             # PARCHE ESPECÍFICO: Si es caso del Template.xlsx (sistema interno), marcarlo como válido automáticamente
-            if self._is_template_internal_case(test_case):
-                if test_case.nombre.strip() and test_case.pasos.strip():
+            if is_internal[i]:
+                if test_case.nombre.strip() and pasos_length[i]:
                     print(f"[TEMPLATE-PATCH] Marcando caso {test_case.id} como válido automáticamente")
                     test_case.es_valido = True
                     test_case.problemas = []
@@ -479,13 +634,13 @@ class ExcelTestAnalyzer:
             sugerencias = []
             
             # VALIDACIÓN ESENCIAL 1: Verificar que tenga URL Y pasos (lo mínimo ejecutable)
-            if test_case.url_extraida and test_case.pasos and len(test_case.pasos.strip()) > 10:
+            if test_case.url_extraida and pasos_length[i] > 10:
                 # ✅ CASO VÁLIDO: Tiene URL y pasos detallados
                 test_case.es_valido = True
                 sugerencias.append("✅ Estructura URL + Paso a Paso completa - Listo para ejecución")
                 print(f"[VALIDATION] ✅ Caso {test_case.id} VÁLIDO - URL: {test_case.url_extraida[:50]}...")
                 
-            elif test_case.pasos and len(test_case.pasos.strip()) > 20:
+            elif pasos_length[i] > 20:
                 # ✅ CASO VÁLIDO: Pasos muy detallados (URL puede estar implícita)
                 test_case.es_valido = True
                 sugerencias.append("✅ Pasos detallados detectados - Ejecutable")
@@ -496,7 +651,7 @@ class ExcelTestAnalyzer:
                 test_case.es_valido = False
                 if not test_case.url_extraida:
                     problemas.append("No se detectó URL de destino")
-                if not test_case.pasos or len(test_case.pasos.strip()) < 10:
+                if pasos_length[i] < 10:
                     problemas.append("Faltan pasos de ejecución detallados")
                 print(f"[VALIDATION] ❌ Caso {test_case.id} INVÁLIDO - Falta información crítica")
             
@@ -506,9 +661,7 @@ class ExcelTestAnalyzer:
                     sugerencias.append("🎯 URL detectada desde columna de destino")
                 
                 # Verificar calidad de los pasos
-                automation_keywords = ['localizar', 'hacer clic', 'escribir', 'presionar', 'verificar']
-                pasos_lower = test_case.pasos.lower()
-                keyword_count = sum(1 for keyword in automation_keywords if keyword in pasos_lower)
+                keyword_count = keyword_counts[i]
                 
                 if keyword_count >= 3:
                     sugerencias.append("🔧 Pasos bien estructurados para automatización")
@@ -549,13 +702,27 @@ class ExcelTestAnalyzer:
         
         return False
     
+    def _analysis_cache_key(self, test_case: TestCase, data_mode='simulated') -> str:
+        """Clave de caché: campos usados en el prompt, modo de datos, versión del prompt y modelo"""
+        return make_key(
+            [test_case.id, test_case.nombre, test_case.objetivo, test_case.pasos, test_case.datos_prueba],
+            data_mode, PROMPT_VERSION, AI_MODEL,
+        )
+    
+    def _get_cached_analysis(self, test_case: TestCase, data_mode='simulated') -> Optional[Dict]:
+        """Resultado de IA guardado para este caso, o None"""
+        cache = get_analysis_cache()
+        if not cache:
+            return None
+        return cache.get(self._analysis_cache_key(test_case, data_mode))
+    
     def _analyze_single_case_with_ai(self, test_case: TestCase, data_mode='simulated') -> Dict:
-        """Analiza un solo caso con IA de forma optimizada"""
+        """Analiza un solo caso con IA de forma optimizada y guarda el resultado en caché"""
         
         analysis_prompt = self._create_focused_analysis_prompt(test_case, data_mode)
         
         response = self.client.messages.create(
-            model="claude-3-sonnet-20240229",
+            model=AI_MODEL,
             max_tokens=1000,  # Reducido para respuestas más rápidas
             messages=[{
                 "role": "user",
@@ -563,7 +730,15 @@ class ExcelTestAnalyzer:
             }]
         )
         
-        return self._parse_claude_response(response.content[0].text)
+        response_text = response.content[0].text
+        result = self._extract_json(response_text)
+        if result is None:
+            # Respuesta no válida: no se guarda en caché para reintentarla la próxima vez
+            return self._parse_claude_response(response_text)
+        cache = get_analysis_cache()
+        if cache:
+            cache.put(self._analysis_cache_key(test_case, data_mode), result)
+        return result
     
     def _create_focused_analysis_prompt(self, test_case: TestCase, data_mode='simulated') -> str:
         """Crea un prompt enfocado para análisis rápido con IA"""
@@ -733,8 +908,7 @@ Paso mejorado: "Escribir en el campo de RUT (selector: '#input-rut' o 'input[nam
                 continue
             
             # Limpiar numeración y hacer más directo
-            import re
-            line = re.sub(r'^(\d+[\.\)]\s*|paso\s*\d+[\.\:]\s*)', '', line, flags=re.IGNORECASE)
+            line = STEP_NUMBERING_PATTERN.sub('', line)
             
             if line:
                 # Convertir a instrucciones más ejecutables
@@ -750,39 +924,7 @@ Paso mejorado: "Escribir en el campo de RUT (selector: '#input-rut' o 'input[nam
     def _make_instruction_executable(self, instruction: str) -> str:
         """Convierte una instrucción a formato más ejecutable para browser-use"""
         
-        instruction = instruction.strip()
-        
-        # Patrones de mejora para hacer instrucciones más específicas
-        improvements = {
-            # Búsquedas
-            r'buscar (.+)': r'localizar la barra de búsqueda y escribir "\1", luego presionar Enter',
-            r'escribir (.+) en (.+)': r'localizar el campo "\2" y escribir "\1"',
-            r'ingresar (.+)': r'escribir "\1" en el campo correspondiente',
-            
-            # Clicks y navegación
-            r'hacer clic en (.+)': r'localizar y hacer clic en el elemento "\1"',
-            r'presionar (.+)': r'localizar y hacer clic en el botón "\1"',
-            r'seleccionar (.+)': r'localizar y seleccionar la opción "\1"',
-            r'ir a (.+)': r'navegar hacia la sección "\1"',
-            
-            # Verificaciones
-            r'verificar (.+)': r'comprobar que "\1" esté visible en la página',
-            r'revisar (.+)': r'verificar que "\1" se muestre correctamente',
-            
-            # Filtros y opciones
-            r'filtrar por (.+)': r'localizar los filtros y seleccionar "\1"',
-            r'expandir (.+)': r'hacer clic para expandir la sección "\1"'
-        }
-        
-        # Aplicar mejoras
-        for pattern, replacement in improvements.items():
-            instruction = re.sub(pattern, replacement, instruction, flags=re.IGNORECASE)
-        
-        # Agregar contexto de espera si es necesario
-        if any(word in instruction.lower() for word in ['localizar', 'buscar', 'encontrar']):
-            instruction += ', esperando a que el elemento esté visible'
-        
-        return instruction
+        return _executable_instruction(instruction)
 
     def _create_browser_use_instructions(self, test_case: TestCase) -> str:
         """Crea instrucciones desde cero optimizadas para browser-use con estructura URL + Misión"""
@@ -1042,14 +1184,7 @@ Paso mejorado: "Escribir en el campo de RUT (selector: '#input-rut' o 'input[nam
         pasos_lower = test_case.pasos.lower()
         objetivo_lower = test_case.objetivo.lower()
         
-        # Indicadores de que es sistema interno de postulación/admisión
-        internal_indicators = [
-            'postulante', 'postulación', 'ingreso postulante',
-            'rut', 'dv k', 'relacion academica', 'dec', '3ra base',
-            'módulo', 'admisión', 'actualización', 'datos del postulante'
-        ]
-        
-        return any(indicator in pasos_lower or indicator in objetivo_lower for indicator in internal_indicators)
+        return any(indicator in pasos_lower or indicator in objetivo_lower for indicator in INTERNAL_INDICATORS)
     
     def _convert_internal_to_web_instructions(self, test_case: TestCase) -> str:
         """Convierte pasos de sistema interno a acciones web para MercadoLibre"""
@@ -1335,6 +1470,17 @@ Analiza el siguiente caso de prueba y determina si es ejecutable en QA-Pilot (he
 Sé analítico pero constructivo. Si hay problemas menores, sugiere cómo corregirlos.
 """
     
+    def _extract_json(self, response_text: str) -> Optional[Dict]:
+        """Objeto JSON contenido en la respuesta de Claude, o None si no hay uno válido"""
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            result = json.loads(json_match.group())
+        except json.JSONDecodeError:
+            return None
+        return result if isinstance(result, dict) else None
+    
     def _parse_claude_response(self, response_text: str) -> Dict:
         """Parsea la respuesta de Claude"""
         
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Almacén de logs (stdout/stderr) por tarea con buffers circulares acotados.
+
+Cada stream de cada tarea guarda sus últimas líneas en memoria en un `deque`
+acotado; las líneas que salen del buffer se vuelcan (opcionalmente) a un
+archivo de segmento en disco, de modo que el log completo sigue disponible
+sin crecer en memoria. Cada línea recibe un número de secuencia que sirve
+como cursor: los clientes piden sólo las líneas nuevas desde su último cursor.
+
+Configuración mediante variables de entorno:
+    LOG_BUFFER_MAX_LINES   líneas en memoria por stream (defecto 2000)
+    LOG_MAX_LINE_LENGTH    caracteres máximos por línea (defecto 4000)
+    LOG_STORE_MAX_TASKS    tareas retenidas antes de descartar las más antiguas terminadas (defecto 200)
+    LOG_SPILL_ENABLED      volcar a disco las líneas expulsadas del buffer (defecto true)
+    LOG_SPILL_DIR          directorio de los segmentos (defecto <tmp>/qa_pilot_logs)
+"""
+
+import os
+import logging
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOG_STREAMS = ('stdout', 'stderr')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class TaskLogBuffer:
+    """Buffer circular de líneas de un stream, con volcado opcional a disco"""
+
+    def __init__(self, max_lines: int, max_line_length: int, spill_path: Optional[str] = None):
+        self.max_lines = max_lines
+        self.max_line_length = max_line_length
+        self.spill_path = spill_path
+        self._lines = deque()
+        self._first_seq = 0  # secuencia de la línea más antigua en memoria
+        self._next_seq = 0
+        self._partial = ''  # texto sin salto de línea final, pendiente de completar
+        self._spill_file = None
+        self._lock = threading.Lock()
+
+    def append(self, text: str) -> List[str]:
+        """
+        Agrega texto al stream; se divide en líneas conservando los saltos.
+
+        Returns:
+            las líneas completas agregadas
+        """
+        added: List[str] = []
+        if not text:
+            return added
+        with self._lock:
+            # Sólo '\n' termina una línea: '\r' de barras de progreso queda dentro de ella
+            *lines, self._partial = (self._partial + text).split('\n')
+            for line in lines:
+                added.append(self._push(line + '\n'))
+        return added
+
+    def _push(self, line: str) -> str:
+        if len(line) > self.max_line_length:
+            line = line[:self.max_line_length] + '...[truncado]\n'
+        if len(self._lines) >= self.max_lines:
+            self._spill(self._lines.popleft())
+            self._first_seq += 1
+        self._lines.append(line)
+        self._next_seq += 1
+        return line
+
+    def _spill(self, line: str):
+        if not self.spill_path:
+            return
+        try:
+            if self._spill_file is None:
+                # Tras close() el segmento ya volcado se conserva: sólo el primer volcado lo crea
+                mode = 'a' if self._first_seq else 'w'
+                self._spill_file = open(self.spill_path, mode, encoding='utf-8', newline='\n')
+            self._spill_file.write(line)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo volcar log a disco ({self.spill_path}): {e}")
+            self.spill_path = None
+
+    def _read_spilled(self, start: int, end: int) -> List[str]:
+        """Lee del segmento en disco las líneas con secuencia en [start, end)"""
+        if not self.spill_path or start >= end:
+            return []
+        if self._spill_file is not None:
+            self._spill_file.flush()
+        lines = []
+        try:
+            with open(self.spill_path, 'r', encoding='utf-8', newline='\n') as f:
+                for seq, line in enumerate(f):
+                    if seq >= end:
+                        break
+                    if seq >= start:
+                        lines.append(line)
+        except OSError:
+            pass
+        return lines
+
+    @property
+    def cursor(self) -> int:
+        """Secuencia de la próxima línea (cursor para la siguiente lectura)"""
+        return self._next_seq
+
+    def read(self, cursor: int = 0, limit: Optional[int] = None) -> Tuple[List[str], int, bool]:
+        """
+        Devuelve las líneas desde `cursor`.
+
+        Returns:
+            (líneas, siguiente cursor, truncated) donde `truncated` indica que parte de las
+            líneas pedidas ya no estaban disponibles (expulsadas sin volcado a disco)
+        """
+        with self._lock:
+            start = max(0, min(cursor, self._next_seq))
+            end = self._next_seq if limit is None else min(self._next_seq, start + limit)
+            truncated = False
+            lines: List[str] = []
+
+            if start < self._first_seq:
+                spill_end = min(end, self._first_seq)
+                spilled = self._read_spilled(start, spill_end)
+                if len(spilled) < spill_end - start:
+                    # Las líneas ya no existen: continuar desde lo que queda en memoria
+                    truncated = True
+                    start = self._first_seq
+                    end = self._next_seq if limit is None else min(self._next_seq, start + limit)
+                else:
+                    lines.extend(spilled)
+
+            for seq in range(max(start, self._first_seq), end):
+                lines.append(self._lines[seq - self._first_seq])
+            return lines, end, truncated
+
+    def text(self) -> str:
+        """Texto completo del stream (segmento en disco + memoria + línea parcial)"""
+        with self._lock:
+            spilled = self._read_spilled(0, self._first_seq)
+            return ''.join(spilled) + ''.join(self._lines) + self._partial
+
+    def tail(self) -> str:
+        """Texto en memoria (últimas `max_lines` líneas)"""
+        with self._lock:
+            return ''.join(self._lines) + self._partial
+
+    def close(self):
+        """Completa la línea parcial y cierra el segmento en disco"""
+        with self._lock:
+            if self._partial:
+                self._push(self._partial + '\n')
+                self._partial = ''
+            if self._spill_file is not None:
+                try:
+                    self._spill_file.close()
+                except OSError:
+                    pass
+                self._spill_file = None
+
+    def discard(self):
+        self.close()
+        if self.spill_path and os.path.exists(self.spill_path):
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+
+
+class TaskLogStore:
+    """Logs de todas las tareas, indexados por task_id y stream ('stdout' / 'stderr')"""
+
+    def __init__(self, max_lines: int = 2000, max_line_length: int = 4000, max_tasks: int = 200,
+                 spill_dir: Optional[str] = None):
+        self.max_lines = max_lines
+        self.max_line_length = max_line_length
+        self.max_tasks = max_tasks
+        self.spill_dir = spill_dir
+        self._tasks: 'OrderedDict[str, Dict[str, TaskLogBuffer]]' = OrderedDict()
+        self._finished = set()
+        self._lock = threading.Lock()
+        self.on_lines = None  # callable(task_id, stream, lineas, cursor) tras cada append
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> 'TaskLogStore':
+        spill_enabled = os.getenv('LOG_SPILL_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes')
+        spill_dir = os.getenv('LOG_SPILL_DIR') or os.path.join(tempfile.gettempdir(), 'qa_pilot_logs')
+        return cls(
+            max_lines=_env_int('LOG_BUFFER_MAX_LINES', 2000),
+            max_line_length=_env_int('LOG_MAX_LINE_LENGTH', 4000),
+            max_tasks=_env_int('LOG_STORE_MAX_TASKS', 200),
+            spill_dir=spill_dir if spill_enabled else None,
+        )
+
+    def _spill_path(self, task_id: str, stream: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        safe_id = ''.join(c for c in task_id if c.isalnum() or c in '-_')
+        return os.path.join(self.spill_dir, f"{safe_id}_{stream}.log")
+
+    def _get_buffer(self, task_id: str, stream: str, create: bool) -> Optional[TaskLogBuffer]:
+        with self._lock:
+            streams = self._tasks.get(task_id)
+            if streams is None:
+                if not create:
+                    return None
+                streams = self._tasks[task_id] = {}
+                self._evict()
+            buffer = streams.get(stream)
+            if buffer is None and create:
+                buffer = streams[stream] = TaskLogBuffer(
+                    self.max_lines, self.max_line_length, self._spill_path(task_id, stream)
+                )
+            return buffer
+
+    def _evict(self):
+        """Descarta las tareas terminadas más antiguas cuando se supera max_tasks"""
+        while len(self._tasks) > self.max_tasks:
+            victim = next((tid for tid in self._tasks if tid in self._finished), None)
+            if victim is None:
+                return
+            for buffer in self._tasks.pop(victim).values():
+                buffer.discard()
+            self._finished.discard(victim)
+
+    def reset(self, task_id: str):
+        """Inicia logs vacíos para una tarea (descarta los anteriores si existían)"""
+        with self._lock:
+            old = self._tasks.pop(task_id, None)
+            self._finished.discard(task_id)
+        for buffer in (old or {}).values():
+            buffer.discard()
+
+    def append(self, task_id: str, stream: str, text: str):
+        buffer = self._get_buffer(task_id, stream, create=True)
+        lines = buffer.append(text)
+        if lines and self.on_lines is not None:
+            try:
+                self.on_lines(task_id, stream, lines, buffer.cursor)
+            except Exception as e:
+                logger.debug(f"Error notificando líneas de log: {e}")
+
+    def read(self, task_id: str, stream: str, cursor: int = 0,
+             limit: Optional[int] = None) -> Tuple[List[str], int, bool]:
+        """Líneas nuevas desde `cursor`: (líneas, siguiente cursor, truncated)"""
+        buffer = self._get_buffer(task_id, stream, create=False)
+        if buffer is None:
+            return [], 0, False
+        return buffer.read(cursor, limit)
+
+    def get_cursor(self, task_id: str, stream: str) -> int:
+        buffer = self._get_buffer(task_id, stream, create=False)
+        return buffer.cursor if buffer else 0
+
+    def get_text(self, task_id: str, stream: str) -> str:
+        """Log completo de un stream, incluyendo lo volcado a disco"""
+        buffer = self._get_buffer(task_id, stream, create=False)
+        return buffer.text() if buffer else ''
+
+    def get_tail(self, task_id: str, stream: str) -> str:
+        """Sólo la parte del log que está en memoria"""
+        buffer = self._get_buffer(task_id, stream, create=False)
+        return buffer.tail() if buffer else ''
+
+    def has_task(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._tasks
+
+    def finish(self, task_id: str):
+        """Marca la tarea como terminada: cierra segmentos y la hace elegible para descarte"""
+        with self._lock:
+            streams = self._tasks.get(task_id)
+            if streams is None:
+                return
+            self._finished.add(task_id)
+            buffers = list(streams.values())
+        for buffer in buffers:
+            buffer.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'tasks': len(self._tasks),
+                'finished_tasks': len(self._finished),
+                'max_tasks': self.max_tasks,
+                'max_lines_per_stream': self.max_lines,
+                'spill_enabled': bool(self.spill_dir),
+            }
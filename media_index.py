@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Índice en memoria de capturas de pantalla y scripts de test.
+
+La vista de historial necesita saber qué capturas existen en cada directorio de
+test y qué script corresponde a cada ejecución. En lugar de llamar a
+`os.path.exists` / `os.listdir` por cada item en cada petición, se mantiene un
+índice que actualizan los propios escritores (captura con pyautogui, detección
+de capturas del navegador en stream_reader, generación del script) y que un
+reconciliador periódico resincroniza con el disco para recoger archivos
+creados o eliminados por otros medios.
+
+El índice se guarda en un manifiesto JSON tras cada reconciliación, de modo que
+al reiniciar el servidor está disponible de inmediato. Mientras no haya ni
+manifiesto ni una primera reconciliación, las consultas recurren al disco.
+
+Configuración mediante variables de entorno:
+    MEDIA_INDEX_RECONCILE_SECONDS  segundos entre reconciliaciones, 0 = desactivado (defecto 300)
+    MEDIA_INDEX_MANIFEST           ruta del manifiesto (defecto <tmp>/qa_pilot_media_index.json)
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class MediaIndex:
+    """
+    Índice directorio -> nombres de captura y nombre de archivo -> script.
+
+    Args:
+        screenshot_roots: directorios raíz bajo los que viven las capturas
+        scripts_dir: directorio de scripts generados (test_<id>.py)
+        manifest_path: manifiesto JSON donde persistir el índice (opcional)
+    """
+
+    def __init__(self, screenshot_roots: Iterable[str], scripts_dir: str,
+                 manifest_path: Optional[str] = None):
+        self.screenshot_roots = []
+        for root in screenshot_roots:
+            if root and _norm(root) not in self.screenshot_roots:
+                self.screenshot_roots.append(_norm(root))
+        self.scripts_dir = _norm(scripts_dir)
+        self.manifest_path = manifest_path
+        self._screenshots: Dict[str, Set[str]] = {}
+        self._scripts: Dict[str, float] = {}  # nombre de archivo -> mtime
+        self._recent: Dict[str, float] = {}  # capturas registradas -> instante, para no perderlas al reconciliar
+        self._ready = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_reconcile: Optional[float] = None
+        self._load_manifest()
+
+    @classmethod
+    def from_env(cls, screenshot_roots: Iterable[str], scripts_dir: str) -> 'MediaIndex':
+        manifest_path = os.getenv('MEDIA_INDEX_MANIFEST') or os.path.join(
+            tempfile.gettempdir(), 'qa_pilot_media_index.json'
+        )
+        return cls(screenshot_roots, scripts_dir, manifest_path)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    # --- Escritores ---
+
+    def register_screenshot(self, path: str):
+        """Registra una captura recién escrita"""
+        path = _norm(path)
+        directory, name = os.path.split(path)
+        with self._lock:
+            self._screenshots.setdefault(directory, set()).add(name)
+            self._recent[path] = time.time()
+
+    def discard_screenshot(self, path: str):
+        directory, name = os.path.split(_norm(path))
+        with self._lock:
+            names = self._screenshots.get(directory)
+            if names is not None:
+                names.discard(name)
+
+    def discard_directory(self, directory: str):
+        """Elimina del índice un directorio de capturas completo"""
+        with self._lock:
+            self._screenshots.pop(_norm(directory), None)
+
+    def refresh_directory(self, directory: str):
+        """Vuelve a listar un directorio (p. ej. al terminar un test que escribió capturas)"""
+        if not directory:
+            return
+        try:
+            names = {f for f in os.listdir(directory) if f.lower().endswith(SCREENSHOT_EXTENSIONS)}
+        except OSError:
+            names = set()
+        with self._lock:
+            if names:
+                self._screenshots[_norm(directory)] = names
+            else:
+                self._screenshots.pop(_norm(directory), None)
+
+    def register_script(self, path: str):
+        """Registra un script recién escrito en scripts_dir"""
+        path = _norm(path)
+        if os.path.dirname(path) != self.scripts_dir:
+            return
+        with self._lock:
+            self._scripts[os.path.basename(path)] = time.time()
+
+    def discard_script(self, path: str):
+        with self._lock:
+            self._scripts.pop(os.path.basename(_norm(path)), None)
+
+    # --- Consultas (sin acceso a disco una vez listo el índice) ---
+
+    def screenshot_exists(self, path: str) -> bool:
+        if not path:
+            return False
+        if not self._ready:
+            return os.path.exists(path)
+        directory, name = os.path.split(_norm(path))
+        with self._lock:
+            return name in self._screenshots.get(directory, ())
+
+    def list_screenshots(self, directory: str) -> List[str]:
+        """Nombres de captura de un directorio, ordenados"""
+        if not directory:
+            return []
+        if not self._ready:
+            try:
+                return sorted(f for f in os.listdir(directory) if f.lower().endswith(SCREENSHOT_EXTENSIONS))
+            except OSError:
+                return []
+        with self._lock:
+            return sorted(self._screenshots.get(_norm(directory), ()))
+
+    def script_exists(self, path: str) -> bool:
+        if not path:
+            return False
+        norm_path = _norm(path)
+        if not self._ready or os.path.dirname(norm_path) != self.scripts_dir:
+            return os.path.exists(path)
+        with self._lock:
+            return os.path.basename(norm_path) in self._scripts
+
+    def find_script(self, id_prefix: str) -> Optional[str]:
+        """Script más reciente cuyo nombre contiene `id_prefix`, o None"""
+        if not id_prefix:
+            return None
+        if not self._ready:
+            self.reconcile_scripts()
+        with self._lock:
+            matches = [(mtime, name) for name, mtime in self._scripts.items() if id_prefix in name]
+        if not matches:
+            return None
+        return os.path.join(self.scripts_dir, max(matches)[1])
+
+    # --- Reconciliación ---
+
+    def _scan_screenshots(self) -> Dict[str, Set[str]]:
+        screenshots: Dict[str, Set[str]] = {}
+        for root in self.screenshot_roots:
+            for directory, _, files in os.walk(root):
+                names = {f for f in files if f.lower().endswith(SCREENSHOT_EXTENSIONS)}
+                if names:
+                    screenshots[_norm(directory)] = names
+        return screenshots
+
+    def _scan_scripts(self) -> Dict[str, float]:
+        scripts: Dict[str, float] = {}
+        try:
+            with os.scandir(self.scripts_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.py') and entry.is_file():
+                        scripts[entry.name] = entry.stat().st_mtime
+        except OSError:
+            pass
+        return scripts
+
+    def reconcile_scripts(self):
+        scripts = self._scan_scripts()
+        with self._lock:
+            self._scripts = scripts
+
+    def reconcile(self):
+        """Reconstruye el índice desde el disco (fuera del lock) y lo reemplaza"""
+        started = time.time()
+        screenshots = self._scan_screenshots()
+        scripts = self._scan_scripts()
+        with self._lock:
+            # Las capturas registradas durante el recorrido pueden no haber sido vistas por él
+            for path, registered_at in self._recent.items():
+                if registered_at >= started:
+                    directory, name = os.path.split(path)
+                    screenshots.setdefault(directory, set()).add(name)
+            self._recent = {p: t for p, t in self._recent.items() if t >= started}
+            for name, registered_at in self._scripts.items():
+                if registered_at >= started and name not in scripts:
+                    scripts[name] = registered_at
+            self._screenshots = screenshots
+            self._scripts = scripts
+            self._ready = True
+        self.last_reconcile = time.time()
+        logger.debug(f"🗂️ Índice de medios reconciliado en {self.last_reconcile - started:.2f}s "
+                     f"({len(screenshots)} directorios, {len(scripts)} scripts)")
+        self._save_manifest()
+
+    def _load_manifest(self):
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('scripts_dir') != self.scripts_dir:
+                return
+            self._screenshots = {d: set(names) for d, names in data.get('screenshots', {}).items()}
+            self._scripts = dict(data.get('scripts', {}))
+            self._ready = True
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"⚠️ Manifiesto de medios inválido ({self.manifest_path}): {e}")
+
+    def _save_manifest(self):
+        if not self.manifest_path:
+            return
+        with self._lock:
+            data = {
+                'scripts_dir': self.scripts_dir,
+                'screenshots': {d: sorted(names) for d, names in self._screenshots.items()},
+                'scripts': dict(self._scripts),
+            }
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar el manifiesto de medios: {e}")
+
+    def start_reconciler(self, interval: int):
+        """Reconcilia ahora y luego cada `interval` segundos en un hilo de fondo"""
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    logger.error(f"❌ Error reconciliando índice de medios: {e}")
+                if not interval or self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=_loop, name='media-index-reconciler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'ready': self._ready,
+                'directories': len(self._screenshots),
+                'screenshots': sum(len(names) for names in self._screenshots.values()),
+                'scripts': len(self._scripts),
+                'last_reconcile': self.last_reconcile,
+            }
+
+
+def get_reconcile_interval() -> int:
+    return _env_int('MEDIA_INDEX_RECONCILE_SECONDS', 300)
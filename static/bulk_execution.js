@@ -91,6 +91,7 @@ class BulkExecutionManager {
         console.log('📊 Modo de datos seleccionado:', dataMode);
         
         // Mostrar progreso de análisis
+        this.analysisJobActive = false;
         this.showAnalysisProgress('Iniciando análisis del archivo Excel...');
         
         try {
@@ -99,11 +100,15 @@ class BulkExecutionManager {
                 body: formData
             });
             
-            if (!response.ok) {
-                throw new Error(`Error ${response.status}: ${response.statusText}`);
+            const job = await response.json();
+            if (!response.ok || !job.success) {
+                throw new Error(job.error || `Error ${response.status}: ${response.statusText}`);
             }
             
-            const result = await response.json();
+            // El análisis corre en segundo plano: seguir su progreso real
+            console.log('🧾 Trabajo de análisis creado:', job.job_id);
+            this.analysisJobActive = true;
+            const result = await this.monitorAnalysisJob(job.job_id);
             
             if (result.success) {
                 console.log('📊 Resultado del análisis:', result);
@@ -146,6 +151,32 @@ class BulkExecutionManager {
             console.error('Error al analizar Excel:', error);
             this.hideAnalysisProgress();
             this.showAlert(`Error al analizar el archivo: ${error.message}`, 'danger');
+        } finally {
+            this.analysisJobActive = false;
+        }
+    }
+    
+    async monitorAnalysisJob(jobId) {
+        // Consulta el trabajo de análisis hasta que termina y devuelve su resultado
+        const pollInterval = 1000;
+        
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, pollInterval));
+            
+            const response = await fetch(`/api/analysis_jobs/${jobId}`);
+            const data = await response.json();
+            if (!response.ok || !data.success) {
+                throw new Error(data.error || `Error ${response.status} consultando el análisis`);
+            }
+            
+            const job = data.job;
+            if (job.status === 'completado') {
+                return job.result;
+            }
+            if (job.status === 'fallido') {
+                throw new Error(job.error || 'El análisis falló');
+            }
+            this.updateAnalysisProgress(job.progress || 0, job.message || 'Analizando...', job.details || '');
         }
     }
     
@@ -1657,7 +1688,8 @@ class BulkExecutionManager {
         let stepIndex = 0;
         
         const updateProgress = () => {
-            if (stepIndex < steps.length && document.getElementById('analysisProgressOverlay')?.style.display !== 'none') {
+            // La simulación se detiene en cuanto llega el progreso real del trabajo
+            if (stepIndex < steps.length && !this.analysisJobActive && document.getElementById('analysisProgressOverlay')?.style.display !== 'none') {
                 const step = steps[stepIndex];
                 progress = step.progress;
                 
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Estados de test versionados para el polling incremental de /test_status.
+
+`TestStatusDB` reemplaza al dict global `test_status_db`: cada estado que se
+guarda en él se convierte en un `VersionedStatus`, un dict que incrementa su
+número de versión en cada modificación. Las versiones salen de un contador
+global, de modo que también crecen cuando un estado se reemplaza completo.
+
+Las listas anidadas (p. ej. `screenshots`) se pueden modificar sin pasar por
+el dict; por eso la etiqueta de cambio de un estado combina su versión con el
+número de capturas y los cursores de log (ver `build_status_etag`).
+"""
+
+import json
+import zlib
+import itertools
+import threading
+
+_version_counter = itertools.count(1)
+_version_lock = threading.Lock()
+
+
+def next_version() -> int:
+    with _version_lock:
+        return next(_version_counter)
+
+
+class VersionedStatus(dict):
+    """Dict de estado que registra una versión creciente en cada escritura"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = next_version()
+        self.task_id = None
+        self.on_change = None  # callable(task_id, status) asignado por TestStatusDB
+
+    def _touch(self):
+        self.version = next_version()
+        if self.on_change is not None:
+            try:
+                self.on_change(self.task_id, self)
+            except Exception:
+                pass
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._touch()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._touch()
+        return super().setdefault(key, default)
+
+    def pop(self, key, *args):
+        if key in self:
+            self._touch()
+        return super().pop(key, *args)
+
+    def clear(self):
+        super().clear()
+        self._touch()
+
+
+class TestStatusDB(dict):
+    """
+    Dict task_id -> VersionedStatus; convierte automáticamente los dicts asignados.
+
+    Si se asigna `on_change`, se invoca con (task_id, status) en cada modificación
+    de un estado (se llama con db_lock tomado por el productor: no debe bloquear).
+    """
+
+    on_change = None
+
+    def __setitem__(self, task_id, status):
+        if not isinstance(status, VersionedStatus):
+            status = VersionedStatus(status)
+        status.task_id = task_id
+        status.on_change = self.on_change
+        super().__setitem__(task_id, status)
+        status._touch()
+
+    def update(self, *args, **kwargs):
+        for task_id, status in dict(*args, **kwargs).items():
+            self[task_id] = status
+
+    def setdefault(self, task_id, default=None):
+        if task_id not in self:
+            self[task_id] = default if default is not None else {}
+        return super().__getitem__(task_id)
+
+
+def get_status_version(status) -> int:
+    """
+    Versión de un estado. Para estados no versionados (p. ej. los que devuelven
+    los sistemas MCP) se usa un checksum del contenido.
+    """
+    version = getattr(status, 'version', None)
+    if version is not None:
+        return version
+    return zlib.crc32(json.dumps(status, sort_keys=True, default=str).encode('utf-8'))
+
+
+def build_status_etag(version: int, stdout_cursor: int, stderr_cursor: int, screenshots_count: int) -> str:
+    """ETag de un estado: cambia si cambia el dict, los logs o la lista de capturas"""
+    return f'{version}-{stdout_cursor}-{stderr_cursor}-{screenshots_count}'
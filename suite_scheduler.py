@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Planificador de ejecución paralela de suites de prueba.
+
+Ejecuta los casos de una suite con N casos simultáneos, respetando tres límites:
+    - por suite: casos en paralelo de una misma ejecución
+    - global: casos en paralelo entre todas las suites activas
+    - por dominio: casos en paralelo contra un mismo host (opcional)
+
+Configuración mediante variables de entorno:
+    SUITE_MAX_PARALLEL              casos en paralelo por suite (defecto 2)
+    SUITE_MAX_PARALLEL_GLOBAL       casos en paralelo en todo el servidor (defecto 4)
+    SUITE_MAX_PARALLEL_PER_DOMAIN   casos en paralelo por dominio, 0 = sin límite (defecto 0)
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_domain(url: Optional[str]) -> str:
+    """Extrae el host de una URL para aplicar límites por dominio"""
+    try:
+        return (urlparse(url or '').hostname or '').lower()
+    except ValueError:
+        return ''
+
+
+class ConcurrencyLimiter:
+    """
+    Límite compartido de casos en ejecución, global y por dominio.
+
+    Se usa un único `threading.Condition` para que liberar un cupo despierte
+    inmediatamente a los casos que esperan, sin sondeos periódicos.
+    """
+
+    def __init__(self, max_global: int, max_per_domain: int = 0):
+        self.max_global = max_global
+        self.max_per_domain = max_per_domain
+        self._condition = threading.Condition()
+        self._running = 0
+        self._running_by_domain: Dict[str, int] = {}
+
+    def _has_slot(self, domain: str) -> bool:
+        if self._running >= self.max_global:
+            return False
+        if self.max_per_domain and domain:
+            return self._running_by_domain.get(domain, 0) < self.max_per_domain
+        return True
+
+    def acquire(self, domain: str, cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Bloquea hasta obtener un cupo.
+
+        Returns:
+            False si `cancel_event` se activó mientras se esperaba
+        """
+        with self._condition:
+            while not self._has_slot(domain):
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                self._condition.wait()
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            self._running += 1
+            self._running_by_domain[domain] = self._running_by_domain.get(domain, 0) + 1
+            return True
+
+    def release(self, domain: str):
+        with self._condition:
+            self._running -= 1
+            remaining = self._running_by_domain.get(domain, 1) - 1
+            if remaining > 0:
+                self._running_by_domain[domain] = remaining
+            else:
+                self._running_by_domain.pop(domain, None)
+            self._condition.notify_all()
+
+    def wake_all(self):
+        """Despierta a los casos en espera para que revisen su evento de cancelación"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'running': self._running,
+                'max_global': self.max_global,
+                'max_per_domain': self.max_per_domain,
+                'running_by_domain': dict(self._running_by_domain),
+            }
+
+
+_limiter: Optional[ConcurrencyLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_concurrency_limiter() -> ConcurrencyLimiter:
+    """Obtiene el limitador global compartido por todas las suites"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ConcurrencyLimiter(
+                max_global=_env_int('SUITE_MAX_PARALLEL_GLOBAL', 4),
+                max_per_domain=_env_int('SUITE_MAX_PARALLEL_PER_DOMAIN', 0, minimum=0),
+            )
+        return _limiter
+
+
+def get_suite_max_parallel(requested: Optional[int] = None) -> int:
+    """Casos en paralelo por suite: el valor pedido o SUITE_MAX_PARALLEL"""
+    if requested:
+        try:
+            return max(1, int(requested))
+        except (TypeError, ValueError):
+            pass
+    return _env_int('SUITE_MAX_PARALLEL', 2)
+
+
+class SuiteScheduler:
+    """
+    Ejecuta los casos de una suite en paralelo y entrega cada resultado apenas termina.
+
+    Args:
+        run_case: función `run_case(index, case) -> dict` que ejecuta un caso de forma
+            bloqueante y devuelve su resultado
+        get_url: función que obtiene la URL de un caso (para el límite por dominio)
+        max_parallel: casos simultáneos de esta suite
+        stop_flag: evento que detiene el lanzamiento de nuevos casos (usar `stop()` para
+            activarlo y despertar a los casos en espera)
+        limiter: límite global/por dominio compartido (por defecto el global)
+        error_result: función `error_result(index, case, error) -> dict` que arma el resultado
+            de un caso cuya ejecución lanzó una excepción (por defecto `default_error_result`)
+    """
+
+    def __init__(self, run_case: Callable[[int, Dict], Dict], get_url: Callable[[Dict], str],
+                 max_parallel: int, stop_flag: threading.Event,
+                 limiter: Optional[ConcurrencyLimiter] = None,
+                 error_result: Optional[Callable[[int, Dict, Exception], Dict]] = None):
+        self.run_case = run_case
+        self.get_url = get_url
+        self.error_result = error_result or default_error_result
+        self.max_parallel = max_parallel
+        self.stop_flag = stop_flag
+        self.limiter = limiter or get_concurrency_limiter()
+        self._case_events = set()
+        self._case_events_lock = threading.Lock()
+
+    def _run_with_limits(self, index: int, case: Dict) -> Optional[Dict]:
+        domain = get_domain(self.get_url(case))
+        if not self.limiter.acquire(domain, self.stop_flag):
+            return None
+        try:
+            return self.run_case(index, case)
+        finally:
+            self.limiter.release(domain)
+
+    def wait_case(self, case_event: threading.Event, timeout: float):
+        """
+        Espera a que `case_event` se active (fin del caso) o a que se detenga la suite.
+
+        El llamador debe revisar `stop_flag` al volver para distinguir ambos casos.
+        """
+        with self._case_events_lock:
+            if self.stop_flag.is_set():
+                return
+            self._case_events.add(case_event)
+        try:
+            case_event.wait(timeout)
+        finally:
+            with self._case_events_lock:
+                self._case_events.discard(case_event)
+
+    def stop(self):
+        """Detiene el lanzamiento de casos pendientes y despierta a los que esperan"""
+        self.stop_flag.set()
+        self.limiter.wake_all()
+        with self._case_events_lock:
+            for case_event in self._case_events:
+                case_event.set()
+
+    def run(self, cases: List[Dict], on_result: Callable[[int, Dict], None]) -> bool:
+        """
+        Ejecuta todos los casos y llama `on_result(index, result)` a medida que terminan.
+
+        Returns:
+            True si todos los casos se ejecutaron, False si la ejecución fue detenida
+        """
+        if not cases:
+            return True
+
+        workers = min(self.max_parallel, len(cases))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='suite-case') as executor:
+            pending = {executor.submit(self._run_with_limits, i, case): i for i, case in enumerate(cases)}
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # El caso cuenta en el resumen de la suite como error, no se omite
+                        logger.error(f"❌ Error no controlado en caso {index + 1} de la suite: {e}")
+                        result = self.error_result(index, cases[index], e)
+                    if result is not None:
+                        on_result(index, result)
+
+        return not self.stop_flag.is_set()
+
+
+def default_error_result(index: int, case: Dict, error: Exception) -> Dict:
+    """Resultado de un caso cuya ejecución lanzó una excepción"""
+    return {
+        'case_index': index,
+        'status': 'error',
+        'message': f'Error: {error}',
+        'error': str(error),
+    }